@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+
+# Parameter animations: interpolating all values per tick in a Python loop against LightbullAnimation, and the
+# requests of a fade sent every tick against only the changed values.
+
+import argparse
+import random
+import time
+
+import lightbull
+from lightbull.animation import LightbullAnimation
+from lightbull.fakeserver import LightbullFakeServer
+
+
+def python_values(tracks, at):
+    values = {}
+    for parameter_id, keyframes in tracks.items():
+        (t0, v0), (t1, v1) = keyframes
+        fraction = min(max((at - t0) / (t1 - t0), 0), 1)
+        if isinstance(v0, dict):
+            values[parameter_id] = {key: round(v0[key] + (v1[key] - v0[key]) * fraction) for key in ("r", "g", "b")}
+        else:
+            values[parameter_id] = round(v0 + (v1 - v0) * fraction)
+    return values
+
+
+def random_tracks(count, duration):
+    tracks = {}
+    for i in range(count):
+        if i % 2:
+            color = lambda: {"r": random.randrange(256), "g": random.randrange(256), "b": random.randrange(256)}
+            tracks["parameter{}".format(i)] = [(0, color()), (duration, color())]
+        else:
+            tracks["parameter{}".format(i)] = [(0, random.randrange(101)), (duration, random.randrange(101))]
+    return tracks
+
+
+def bench_compute(count, ticks):
+    tracks = random_tracks(count, 1)
+    animation = LightbullAnimation(None)
+    for parameter_id, keyframes in tracks.items():
+        animation.animate(parameter_id, keyframes)
+    animation.values(0)
+
+    start = time.perf_counter()
+    for tick in range(ticks):
+        python_values(tracks, tick / ticks)
+    python = (time.perf_counter() - start) / ticks
+
+    arrays = animation._build()
+    start = time.perf_counter()
+    for tick in range(ticks):
+        animation._evaluate(arrays, tick / ticks)
+    vectorized = (time.perf_counter() - start) / ticks
+
+    print(
+        "values of {} parameters per tick: python {:.3f} ms, numpy {:.3f} ms".format(
+            count, python * 1000, vectorized * 1000
+        )
+    )
+
+
+def bench_sends(args):
+    with LightbullFakeServer(latency=args.latency) as server:
+        with lightbull.Lightbull(server.url, server.password, pool_size=args.jobs) as bull:
+            show = bull.shows.new_show("benchmark animation")
+            visual = bull.shows.new_visual(show["id"], "visual")
+            parameter_ids = []
+            for _ in range(args.parameters):
+                group = bull.shows.new_group(visual["id"], ["head"], "blink")
+                parameter_ids.append(group["effect"]["parameters"][1]["id"])
+
+            # slow fades: most values stay the same from one tick to the next
+            tracks = {parameter_id: [(0, 0), (args.duration, 20)] for parameter_id in parameter_ids}
+
+            start = time.monotonic()
+            requests = 0
+            ticks = 0
+            unchanged = 0
+            previous = {}
+            while time.monotonic() - start < args.duration:
+                tick = time.monotonic()
+                ticks += 1
+                for parameter_id, value in python_values(tracks, tick - start).items():
+                    bull.shows.update_parameter(parameter_id, current=value)
+                    requests += 1
+                    unchanged += previous.get(parameter_id) == value
+                    previous[parameter_id] = value
+                time.sleep(max(0, 1 / args.rate - (time.monotonic() - tick)))
+            print(
+                "loop:      {:5d} requests, {:.2f} s, {} ticks, {} unchanged".format(
+                    requests, time.monotonic() - start, ticks, unchanged
+                )
+            )
+
+            animation = LightbullAnimation(bull, max_rate=args.rate, max_workers=args.jobs)
+            for parameter_id, keyframes in tracks.items():
+                animation.animate(parameter_id, keyframes)
+            start = time.monotonic()
+            with animation:
+                animation.wait()
+            stats = animation.stats()
+            print(
+                "animation: {:5d} requests, {:.2f} s, {} ticks, {} unchanged (not sent)".format(
+                    stats["sent"], time.monotonic() - start, stats["ticks"], stats["unchanged"]
+                )
+            )
+            bull.shows.delete_show(show["id"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parameter animations")
+    parser.add_argument("--latency", type=float, default=0.002, help="Latency of the fake server in seconds")
+    parser.add_argument("--parameters", type=int, default=40, help="Number of animated parameters")
+    parser.add_argument("--duration", type=float, default=2, help="Duration of the fades in seconds")
+    parser.add_argument("--rate", type=float, default=30, help="Ticks per second")
+    parser.add_argument("-j", "--jobs", type=int, default=8, help="Number of concurrent requests")
+    args = parser.parse_args()
+
+    bench_compute(1000, 200)
+    bench_compute(10000, 50)
+    bench_sends(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+
+# Startup time of the CLI: wall time of complete runs and the slowest imports reported by "python -X importtime".
+# Results can be written as JSON to compare them across changes.
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+
+def run(args, count):
+    durations = []
+    for _ in range(count):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-m", "lightbull", *args], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def import_times(args):
+    r = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "lightbull", *args],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+
+    # lines look like "import time:  self [us] | cumulative | imported package"
+    times = {}
+    for line in r.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if not name.startswith("  "):
+            # top level imports only, their time includes everything they import
+            times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CLI startup")
+    parser.add_argument("-n", "--count", type=int, default=20, help="Number of runs per command")
+    parser.add_argument("-o", "--output", type=str, help="Write results as JSON to this file")
+    parser.add_argument(
+        "command",
+        nargs=argparse.REMAINDER,
+        help="CLI arguments (default: --help, add -u/-p to run real commands like 'current blank')",
+    )
+    args = parser.parse_args()
+    command = args.command or ["--help"]
+
+    durations = run(command, args.count)
+    imports = import_times(command)
+    slowest = sorted(imports.items(), key=lambda item: item[1], reverse=True)[:10]
+
+    print("command:   {}".format(" ".join(command)))
+    print(
+        "wall time: median {:.1f} ms, min {:.1f} ms".format(statistics.median(durations) * 1000, min(durations) * 1000)
+    )
+    print("imports:   {:.1f} ms".format(sum(imports.values()) * 1000))
+    for name, duration in slowest:
+        print("    {:8.1f} ms  {}".format(duration * 1000, name))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "command": command,
+                    "python": sys.version.split()[0],
+                    "median": statistics.median(durations),
+                    "min": min(durations),
+                    "imports": dict(slowest),
+                },
+                f,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+
+# Skew of switching the current show on many fake controllers with different latencies: update_current in a loop
+# against LightbullFleet. The controllers run in process, so the real arrival of every call is known.
+
+import argparse
+import random
+import statistics
+import time
+
+import lightbull
+from lightbull.fakeserver import LightbullFakeServer
+from lightbull.fleet import LightbullFleet
+from lightbull.transport import LightbullCallableTransport
+
+
+def make_device(name, latency, jitter, arrivals):
+    server = LightbullFakeServer()
+
+    def handler(method, path, headers, body):
+        # latency in both directions
+        time.sleep(latency + random.uniform(0, jitter))
+        if method == "PUT" and path.endswith("/current"):
+            arrivals[name] = time.monotonic()
+        response = server.handle(method, path, headers, body)
+        time.sleep(latency + random.uniform(0, jitter))
+        return response
+
+    return lightbull.Lightbull(password=server.password, transport=LightbullCallableTransport(handler))
+
+
+def spread(arrivals):
+    return max(arrivals.values()) - min(arrivals.values())
+
+
+def report(name, skews):
+    print(
+        "{:<8} skew median {:7.2f} ms   max {:7.2f} ms".format(name, statistics.median(skews) * 1000, max(skews) * 1000)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark synchronized calls on many controllers")
+    parser.add_argument("-d", "--devices", type=int, default=12, help="Number of controllers")
+    parser.add_argument("--max-latency", type=float, default=0.04, help="One-way latency of the slowest controller")
+    parser.add_argument("--jitter", type=float, default=0.001, help="Jitter of every request in seconds")
+    parser.add_argument("-n", "--count", type=int, default=20, help="Number of switches")
+    args = parser.parse_args()
+
+    arrivals = {}
+    clients = {}
+    for i in range(args.devices):
+        name = "device{}".format(i)
+        latency = args.max_latency * (i + 1) / args.devices
+        clients[name] = make_device(name, latency, args.jitter, arrivals)
+
+    shows = {}
+    for name, client in clients.items():
+        show = client.shows.new_show("benchmark fleet")
+        shows[name] = (show["id"], client.shows.new_visual(show["id"], "visual")["id"])
+
+    skews = []
+    for _ in range(args.count):
+        arrivals.clear()
+        for name, client in clients.items():
+            client.shows.update_current(*shows[name])
+        skews.append(spread(arrivals))
+    report("loop", skews)
+
+    with LightbullFleet(clients) as fleet:
+        fleet.calibrate()
+        show_ids = {name: ids[0] for name, ids in shows.items()}
+        visual_ids = {name: ids[1] for name, ids in shows.items()}
+
+        skews = []
+        estimated = []
+        for _ in range(args.count):
+            arrivals.clear()
+            result = fleet.update_current(show_ids, visual_ids)
+            skews.append(spread(arrivals))
+            estimated.append(result.skew)
+        report("fleet", skews)
+        report("reported", estimated)
+
+
+if __name__ == "__main__":
+    main()
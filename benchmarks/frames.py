@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+
+# Decoding simulator frames: Python lists of (r, g, b) tuples against decode_frame into a preallocated array.
+
+import argparse
+import json
+import random
+import timeit
+
+from lightbull.frames import LightbullFrame, decode_frame, frame_layout
+
+
+def make_body(parts, leds):
+    return json.dumps(
+        {
+            "parts": {
+                "part{}".format(part): "".join("{:06x}".format(random.getrandbits(24)) for _ in range(leds))
+                for part in range(parts)
+            }
+        }
+    ).encode()
+
+
+def decode_lists(body):
+    parts = json.loads(body)["parts"]
+    return {
+        part: [
+            (int(leds[i : i + 2], 16), int(leds[i + 2 : i + 4], 16), int(leds[i + 4 : i + 6], 16))
+            for i in range(0, len(leds), 6)
+        ]
+        for part, leds in parts.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark frame decoding")
+    parser.add_argument("--parts", type=int, default=8, help="Number of parts")
+    parser.add_argument("--leds", type=int, default=300, help="LEDs per part")
+    parser.add_argument("-n", "--count", type=int, default=200, help="Number of frames")
+    args = parser.parse_args()
+
+    body = make_body(args.parts, args.leds)
+    frame = LightbullFrame(frame_layout(json.loads(body)["parts"]))
+
+    lists = timeit.timeit(lambda: decode_lists(body), number=args.count) / args.count
+    arrays = timeit.timeit(lambda: decode_frame(json.loads(body)["parts"], frame), number=args.count) / args.count
+
+    print("{} parts x {} LEDs, {} bytes".format(args.parts, args.leds, len(body)))
+    print("lists:  {:8.3f} ms per frame".format(lists * 1000))
+    print("arrays: {:8.3f} ms per frame ({:.1f}x)".format(arrays * 1000, lists / arrays))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+
+# Edits during an outage of the controller: replaying the recorded calls one after another against
+# LightbullJournal.replay(), which collapses superseded updates and sends independent updates in parallel.
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import lightbull
+from lightbull.fakeserver import LightbullFakeServer
+from lightbull.journal import LightbullJournal
+from lightbull.transport import make_transport
+
+
+class OutageTransport:
+    # a transport that fails like an unreachable controller while down is set
+    def __init__(self, transport):
+        self.url = transport.url
+        self.down = False
+        self._transport = transport
+
+    def request(self, method, path, headers, body, timeout=None):
+        if self.down:
+            raise ConnectionRefusedError("Controller is down")
+        return self._transport.request(method, path, headers, body, timeout)
+
+    def close(self):
+        self._transport.close()
+
+
+def edit(journal, visual_id, parameter_ids, args):
+    # faders moved during the outage, and a few new groups with their colors
+    for _ in range(args.updates):
+        journal.update_parameter(random.choice(parameter_ids), current=random.randrange(101))
+    for _ in range(args.groups):
+        group = journal.new_group(visual_id, ["head"], "singlecolor")
+        journal.update_group(group["id"], parts=["head", "tail"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark replaying the journal after an outage")
+    parser.add_argument("--latency", type=float, default=0.005, help="Latency of the fake server in seconds")
+    parser.add_argument("--parameters", type=int, default=40, help="Number of parameters changed")
+    parser.add_argument("--updates", type=int, default=1000, help="Number of parameter updates during the outage")
+    parser.add_argument("--groups", type=int, default=10, help="Number of groups created during the outage")
+    parser.add_argument("-j", "--jobs", type=int, default=8, help="Number of concurrent requests")
+    args = parser.parse_args()
+
+    with LightbullFakeServer(latency=args.latency) as server:
+        transport = OutageTransport(make_transport(server.url, args.jobs, True, None))
+        with lightbull.Lightbull(server.url, server.password, transport=transport, retries=0) as bull:
+            show = bull.shows.new_show("benchmark journal")
+            visual = bull.shows.new_visual(show["id"], "visual")
+            parameter_ids = []
+            for _ in range(args.parameters):
+                group = bull.shows.new_group(visual["id"], ["head"], "blink")
+                parameter_ids.append(group["effect"]["parameters"][1]["id"])
+
+            directory = tempfile.mkdtemp()
+            for name, workers, collapsed in (("in order", 1, False), ("journal", args.jobs, True)):
+                journal = LightbullJournal(bull, os.path.join(directory, name + ".jsonl"), max_workers=workers)
+                # the breaker would open during the outage and delay the replay
+                bull._breaker = None
+                transport.down = True
+                random.seed(1)
+                start = time.perf_counter()
+                edit(journal, visual["id"], parameter_ids, args)
+                journaled = time.perf_counter() - start
+                transport.down = False
+
+                if not collapsed:
+                    # every call as it was made
+                    requests = server.requests.copy()
+                    start = time.perf_counter()
+                    for entry in list(journal._entries):
+                        journal._execute(entry)
+                    duration = time.perf_counter() - start
+                    sent = sum(server.requests.values()) - sum(requests.values())
+                    print(
+                        "{:9s} {:5d} calls, {:5d} requests, {:.2f} s".format(
+                            name, len(journal._entries), sent, duration
+                        )
+                    )
+                    continue
+
+                requests = server.requests.copy()
+                report = journal.replay()
+                sent = sum(server.requests.values()) - sum(requests.values())
+                print(
+                    "{:9s} {:5d} calls, {:5d} requests, {:.2f} s ({} collapsed, {:.0f} calls/s, {} failed)".format(
+                        name,
+                        report.entries,
+                        sent,
+                        report.duration,
+                        report.collapsed,
+                        report.throughput,
+                        len(report.failed),
+                    )
+                )
+                print("journaling {} calls took {:.3f} s".format(report.entries, journaled))
+
+            bull.shows.delete_show(show["id"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+# Compare the memory used by snapshots as dicts (as returned by the API) and as model objects.
+
+import argparse
+import gc
+import json
+import tracemalloc
+import uuid
+
+from lightbull.models import Show
+
+
+def sample_show(visuals, groups, parts):
+    return {
+        "id": str(uuid.uuid4()),
+        "name": "Show",
+        "favorite": False,
+        "visuals": [
+            {
+                "id": str(uuid.uuid4()),
+                "name": "Visual {}".format(i),
+                "groups": [
+                    {
+                        "id": str(uuid.uuid4()),
+                        "parts": parts,
+                        "effect": {
+                            "type": "blink",
+                            "parameters": [
+                                {
+                                    "id": str(uuid.uuid4()),
+                                    "key": "color",
+                                    "name": "Color",
+                                    "type": "color",
+                                    "current": {"r": 255, "g": 0, "b": 0},
+                                    "default": {"r": 255, "g": 0, "b": 0},
+                                },
+                                {
+                                    "id": str(uuid.uuid4()),
+                                    "key": "speed",
+                                    "name": "Speed",
+                                    "type": "percent",
+                                    "current": 50,
+                                    "default": 50,
+                                },
+                            ],
+                        },
+                    }
+                    for _ in range(groups)
+                ],
+            }
+            for i in range(visuals)
+        ],
+    }
+
+
+def measure(func):
+    gc.collect()
+    tracemalloc.start()
+    result = func()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark memory of dicts and model objects")
+    parser.add_argument("--snapshots", type=int, default=20, help="Number of snapshots kept in memory")
+    parser.add_argument("--shows", type=int, default=20, help="Shows per snapshot")
+    parser.add_argument("--visuals", type=int, default=10, help="Visuals per show")
+    parser.add_argument("--groups", type=int, default=4, help="Groups per visual")
+    args = parser.parse_args()
+
+    parts = ["horn_left", "horn_right", "hole_left", "hole_right"]
+    shows = [sample_show(args.visuals, args.groups, parts) for _ in range(args.shows)]
+    body = json.dumps({"shows": shows})
+
+    # every snapshot is parsed from a response, like it would be fetched from the controller
+    dicts, dicts_size = measure(lambda: [json.loads(body)["shows"] for _ in range(args.snapshots)])
+    del dicts
+    models, models_size = measure(
+        lambda: [[Show.from_dict(show) for show in json.loads(body)["shows"]] for _ in range(args.snapshots)]
+    )
+    del models
+
+    print("dicts:  {:8.2f} MiB".format(dicts_size / 2**20))
+    print("models: {:8.2f} MiB".format(models_size / 2**20))
+    print("ratio:  {:8.2f}x".format(dicts_size / models_size))
+
+
+if __name__ == "__main__":
+    main()
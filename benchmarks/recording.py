@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+
+# Recording simulator frames: JSON lines of the responses against a LightbullRecorder file, both for writing and for
+# the mean brightness of every part over the whole recording.
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from lightbull.frames import LightbullFrame, decode_frame, frame_layout
+from lightbull.recording import LightbullRecorder, LightbullRecording
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark simulator recordings")
+    parser.add_argument("--parts", type=int, default=8, help="Number of parts")
+    parser.add_argument("--leds", type=int, default=300, help="LEDs per part")
+    parser.add_argument("-n", "--count", type=int, default=3000, help="Number of frames")
+    args = parser.parse_args()
+
+    bodies = []
+    for _ in range(20):
+        parts = {
+            "part{}".format(part): "".join("{:06x}".format(random.getrandbits(24)) for _ in range(args.leds))
+            for part in range(args.parts)
+        }
+        bodies.append(json.dumps({"parts": parts}))
+
+    with tempfile.TemporaryDirectory() as directory:
+        json_path = os.path.join(directory, "frames.jsonl")
+        recording_path = os.path.join(directory, "frames.lbr")
+
+        start = time.perf_counter()
+        with open(json_path, "w") as f:
+            for i in range(args.count):
+                f.write('{{"timestamp": {}, "frame": {}}}\n'.format(i / 30, bodies[i % len(bodies)]))
+        json_write = time.perf_counter() - start
+
+        frame = LightbullFrame(frame_layout(json.loads(bodies[0])["parts"]))
+        start = time.perf_counter()
+        with LightbullRecorder(recording_path) as recorder:
+            for i in range(args.count):
+                decode_frame(json.loads(bodies[i % len(bodies)])["parts"], frame)
+                frame.timestamp = i / 30
+                recorder.append(frame)
+        recording_write = time.perf_counter() - start
+
+        start = time.perf_counter()
+        totals = {}
+        with open(json_path) as f:
+            for line in f:
+                for part, leds in json.loads(line)["frame"]["parts"].items():
+                    values = bytes.fromhex(leds)
+                    totals[part] = totals.get(part, 0) + sum(values) / len(values) / 255
+        json_scan = time.perf_counter() - start
+
+        start = time.perf_counter()
+        LightbullRecording(recording_path).brightness().mean(axis=0)
+        recording_scan = time.perf_counter() - start
+
+        print("{} frames of {} parts x {} LEDs".format(args.count, args.parts, args.leds))
+        print("json lines: {:9.1f} KiB".format(os.path.getsize(json_path) / 1024))
+        print("recording:  {:9.1f} KiB".format(os.path.getsize(recording_path) / 1024))
+    # the recording includes decoding, which a frame stream does anyway
+    print(
+        "write:      json {:8.1f} ms   recording {:8.1f} ms (with decoding)".format(
+            json_write * 1000, recording_write * 1000
+        )
+    )
+    print("brightness: json {:8.1f} ms   recording {:8.1f} ms".format(json_scan * 1000, recording_scan * 1000))
+
+
+if __name__ == "__main__":
+    main()
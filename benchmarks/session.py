@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+
+# Compare round trips with a new connection per request against the pooled session of the client.
+
+import argparse
+import statistics
+import time
+
+import requests
+
+import lightbull
+
+
+def measure(func, count):
+    durations = []
+    for _ in range(count):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def report(name, durations):
+    print(
+        "{:<20} mean {:7.2f} ms   median {:7.2f} ms   max {:7.2f} ms".format(
+            name,
+            statistics.mean(durations) * 1000,
+            statistics.median(durations) * 1000,
+            max(durations) * 1000,
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark connection reuse")
+    parser.add_argument("-u", "--url", type=str, help="URL of the server")
+    parser.add_argument("-p", "--password", type=str, help="Password for API")
+    parser.add_argument("-n", "--count", type=int, default=200, help="Number of requests")
+    args = parser.parse_args()
+
+    with lightbull.Lightbull(args.url, args.password) as bull:
+        url = bull._build_url("current")
+
+        # new connection per request, like the client did before
+        fresh = measure(lambda: requests.get(url, headers=bull._get_headers()).raise_for_status(), args.count)
+
+        # pooled keep-alive session
+        pooled = measure(bull.shows.get_current, args.count)
+
+    report("new connection", fresh)
+    report("pooled session", pooled)
+    print("speedup: {:.2f}x".format(statistics.mean(fresh) / statistics.mean(pooled)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+
+# Client and CLI benchmarks against the fake controller (or a real one with -u/-p). Results are written as JSON and
+# can be compared with the results of an earlier run.
+
+import argparse
+import concurrent.futures
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import lightbull
+from lightbull.bundle import BUNDLE_VERSION
+from lightbull.fakeserver import LightbullFakeServer
+
+NAME_PREFIX = "benchmark "
+
+
+def measure(func, count):
+    durations = []
+    for _ in range(count):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return summarize(durations, sum(durations))
+
+
+def measure_parallel(func, count, jobs):
+    durations = []
+
+    def timed():
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+        for future in [executor.submit(timed) for _ in range(count)]:
+            future.result()
+    return summarize(durations, time.perf_counter() - start)
+
+
+def summarize(durations, total):
+    ordered = sorted(durations)
+    return {
+        "count": len(durations),
+        "total": total,
+        "ops_per_second": len(durations) / total if total else None,
+        "mean": statistics.mean(durations),
+        "median": statistics.median(durations),
+        "p90": percentile(ordered, 0.9),
+        "p99": percentile(ordered, 0.99),
+        "min": ordered[0],
+        "max": ordered[-1],
+    }
+
+
+def percentile(ordered, q):
+    # nearest rank
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def make_bundle(name, visuals, groups):
+    effects = ["singlecolor", "blink", "rainbow"]
+    return {
+        "version": BUNDLE_VERSION,
+        "show": {
+            "name": name,
+            "favorite": False,
+            "visuals": [
+                {
+                    "name": "visual {}".format(v),
+                    "groups": [{"parts": ["horn_left"], "effect": effects[g % len(effects)]} for g in range(groups)],
+                }
+                for v in range(visuals)
+            ],
+        },
+    }
+
+
+def run_client(bull, args):
+    results = {}
+    bundle = make_bundle(NAME_PREFIX + "tree", args.visuals, args.groups)
+    show = bull.shows.import_show(bundle)
+    parameter_id = bull.shows.get_show_tree(show["id"]).shows[0]["visuals"][0]["groups"][0]["effect"]["parameters"][0]
+    parameter_id = parameter_id["id"]
+
+    results["get_current"] = measure(bull.shows.get_current, args.count)
+    results["get_show"] = measure(lambda: bull.shows.get_show(show["id"]), args.count)
+
+    values = iter(range(10**9))
+    update = lambda: bull.shows.update_parameter(parameter_id, default={"r": next(values) % 256, "g": 0, "b": 0})
+    results["update_parameter"] = measure(update, args.count)
+    results["update_parameter_parallel"] = measure_parallel(update, args.count, args.jobs)
+
+    results["show_tree"] = measure(lambda: bull.shows.get_show_tree(show["id"], max_workers=args.jobs), args.repeat)
+
+    created = []
+    results["import_show"] = measure(
+        lambda: created.append(bull.shows.import_show(bundle, NAME_PREFIX + "import", max_workers=args.jobs)),
+        args.repeat,
+    )
+
+    for show_id in [show["id"]] + [show["id"] for show in created]:
+        bull.shows.delete_show(show_id)
+
+    return results
+
+
+def run_cli(url, password, args):
+    # isolated home directory, so that the token cache of the user is not touched
+    with tempfile.TemporaryDirectory() as home:
+        env = dict(os.environ, HOME=home)
+        command = [sys.executable, "-m", "lightbull", "-u", url, "-p", password, "--format", "plain"]
+
+        def cli(*cli_args, input=None):
+            subprocess.run(
+                [*command, *cli_args],
+                input=input,
+                env=env,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                check=True,
+                text=True,
+            )
+
+        results = {}
+        results["cli_current_get"] = measure(lambda: cli("current", "get"), args.cli_count)
+
+        lines = "current get\n" * args.count
+        batch = measure(lambda: cli("batch", "--jobs", str(args.jobs), input=lines), args.cli_count)
+        batch["commands"] = args.count
+        results["cli_batch"] = batch
+        return results
+
+
+def compare(results, baseline):
+    print("{:<28} {:>12} {:>12} {:>8}".format("benchmark", "baseline", "median", "change"))
+    for name, result in results.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+        print(
+            "{:<28} {:>9.2f} ms {:>9.2f} ms {:>+7.1f}%".format(
+                name, old["median"] * 1000, result["median"] * 1000, (result["median"] / old["median"] - 1) * 100
+            )
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the lightbull client and CLI")
+    parser.add_argument("-u", "--url", type=str, help="URL of a real server (default: start a fake server)")
+    parser.add_argument("-p", "--password", type=str, help="Password for API")
+    parser.add_argument("--latency", type=float, default=0.001, help="Latency of the fake server in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0005, help="Jitter of the fake server in seconds")
+    parser.add_argument("-n", "--count", type=int, default=200, help="Number of single calls")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="Number of tree fetches and show imports")
+    parser.add_argument("--cli-count", type=int, default=5, help="Number of CLI runs")
+    parser.add_argument("--visuals", type=int, default=10, help="Visuals per show")
+    parser.add_argument("--groups", type=int, default=4, help="Groups per visual")
+    parser.add_argument("-j", "--jobs", type=int, default=8, help="Number of concurrent requests")
+    parser.add_argument("--no-cli", action="store_true", help="Skip CLI benchmarks")
+    parser.add_argument("-o", "--output", type=str, help="Write results as JSON to this file")
+    parser.add_argument("-c", "--compare", type=str, help="Compare with results of an earlier run")
+    args = parser.parse_args()
+
+    server = None
+    if args.url:
+        url, password = args.url, args.password
+    else:
+        server = LightbullFakeServer(latency=args.latency, jitter=args.jitter).start()
+        url, password = server.url, server.password
+
+    try:
+        with lightbull.Lightbull(url, password, pool_size=max(10, args.jobs)) as bull:
+            results = run_client(bull, args)
+        if not args.no_cli:
+            results.update(run_cli(url, password, args))
+    finally:
+        if server is not None:
+            server.stop()
+
+    for name, result in results.items():
+        print(
+            "{:<28} median {:8.2f} ms   p99 {:8.2f} ms   {:9.1f} ops/s".format(
+                name, result["median"] * 1000, result["p99"] * 1000, result["ops_per_second"]
+            )
+        )
+
+    output = {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "server": url if server is None else {"latency": args.latency, "jitter": args.jitter},
+        "parameters": {
+            "count": args.count,
+            "repeat": args.repeat,
+            "visuals": args.visuals,
+            "groups": args.groups,
+            "jobs": args.jobs,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(output, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            print()
+            compare(results, json.load(f)["results"])
+
+
+if __name__ == "__main__":
+    main()
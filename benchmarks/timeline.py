@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+
+# Timing of cues against the fake controller: a loop that sleeps between the calls against LightbullTimeline, without
+# and with lead. The timing error is the estimated arrival at the controller (half of the round trip) compared to the
+# planned time of a cue.
+
+import argparse
+import statistics
+import time
+
+import lightbull
+from lightbull.fakeserver import LightbullFakeServer
+from lightbull.timeline import LightbullCue, LightbullTimeline
+
+
+def make_cues(bull, count, interval):
+    show = bull.shows.new_show("benchmark timeline")
+    visuals = [bull.shows.new_visual(show["id"], "visual {}".format(v)) for v in range(2)]
+    group = bull.shows.new_group(visuals[0]["id"], ["horn_left"], "singlecolor")
+    parameter_id = group["effect"]["parameters"][0]["id"]
+
+    cues = []
+    for i in range(count):
+        if i % 2:
+            cues.append(
+                LightbullCue(i * interval, "parameter", parameter=parameter_id, current={"r": i % 256, "g": 0, "b": 0})
+            )
+        else:
+            cues.append(LightbullCue(i * interval, "current", show=show["id"], visual=visuals[i // 2 % 2]["id"]))
+    return show["id"], cues
+
+
+def run_sleep_loop(bull, cues):
+    errors = []
+    start = time.monotonic()
+    for cue in cues:
+        remaining = start + cue.at - time.monotonic()
+        if remaining > 0:
+            time.sleep(remaining)
+        sent = time.monotonic()
+        cue.run(bull)
+        errors.append(sent + (time.monotonic() - sent) / 2 - start - cue.at)
+    return errors
+
+
+def run_timeline(bull, cues, lead):
+    timeline = LightbullTimeline(bull, cues, lead=lead)
+    timeline.start()
+    timeline.wait()
+    timeline.stop()
+    return [result.timing_error for result in timeline.results if result.timing_error is not None]
+
+
+def report(name, errors, count):
+    absolute = sorted(abs(error) for error in errors)
+    print(
+        "{:<18} sent {:4d}/{:<4d} mean {:7.2f} ms   median {:7.2f} ms   max {:7.2f} ms   drift {:+7.2f} ms".format(
+            name,
+            len(errors),
+            count,
+            statistics.mean(absolute) * 1000,
+            statistics.median(absolute) * 1000,
+            absolute[-1] * 1000,
+            # timing error of the last cues compared to the first ones
+            (statistics.mean(errors[-10:]) - statistics.mean(errors[:10])) * 1000,
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the cue timeline")
+    parser.add_argument("--latency", type=float, default=0.02, help="Latency of the fake server in seconds")
+    parser.add_argument("--jitter", type=float, default=0.015, help="Jitter of the fake server in seconds")
+    parser.add_argument("-n", "--count", type=int, default=100, help="Number of cues")
+    parser.add_argument("-i", "--interval", type=float, default=0.05, help="Seconds between cues")
+    args = parser.parse_args()
+
+    with LightbullFakeServer(latency=args.latency, jitter=args.jitter) as server:
+        with lightbull.Lightbull(server.url, server.password) as bull:
+            show_id, cues = make_cues(bull, args.count, args.interval)
+            report("sleep loop", run_sleep_loop(bull, cues), len(cues))
+            report("timeline", run_timeline(bull, cues, 0), len(cues))
+            report("timeline (lead)", run_timeline(bull, cues, "auto"), len(cues))
+            bull.shows.delete_show(show_id)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+
+# Round trips of the client over pooled HTTP, a Unix domain socket and in process, against the fake server.
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+import lightbull
+from lightbull.fakeserver import LightbullFakeServer
+from lightbull.transport import LightbullCallableTransport
+
+
+def measure(func, count):
+    durations = []
+    for _ in range(count):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def run(bull, count):
+    show = bull.shows.new_show("benchmark")
+    try:
+        return {
+            "get_current": measure(bull.shows.get_current, count),
+            "get_show": measure(lambda: bull.shows.get_show(show["id"]), count),
+        }
+    finally:
+        bull.shows.delete_show(show["id"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark transports")
+    parser.add_argument("-n", "--count", type=int, default=1000, help="Number of requests")
+    parser.add_argument("-o", "--output", type=str, help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = {}
+    with LightbullFakeServer() as server:
+        with lightbull.Lightbull(server.url, server.password) as bull:
+            results["http"] = run(bull, args.count)
+
+    with tempfile.TemporaryDirectory() as directory:
+        with LightbullFakeServer(unix_socket=os.path.join(directory, "lightbull.sock")) as server:
+            with lightbull.Lightbull(server.url, server.password) as bull:
+                results["unix"] = run(bull, args.count)
+
+    server = LightbullFakeServer()
+    transport = LightbullCallableTransport(server.handle)
+    with lightbull.Lightbull(password=server.password, transport=transport) as bull:
+        results["callable"] = run(bull, args.count)
+    server.stop()
+
+    summary = {}
+    for transport, calls in results.items():
+        for call, durations in calls.items():
+            summary["{} {}".format(transport, call)] = {
+                "median": statistics.median(durations),
+                "mean": statistics.mean(durations),
+                "max": max(durations),
+            }
+            print(
+                "{:<24} median {:8.3f} ms   mean {:8.3f} ms".format(
+                    "{} {}".format(transport, call),
+                    statistics.median(durations) * 1000,
+                    statistics.mean(durations) * 1000,
+                )
+            )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
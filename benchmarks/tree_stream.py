@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+
+# Listing all shows with their visuals: loading the whole tree with snapshot() before printing against streaming it
+# with iter_tree(), as the CLI does with "shows tree". Measures the time to the first visual, the total time and the
+# peak memory of the client.
+
+import argparse
+import io
+import json
+import time
+import tracemalloc
+
+import lightbull
+from lightbull.fakeserver import LightbullFakeServer
+
+
+def measure(name, func):
+    out = io.StringIO()
+    tracemalloc.start()
+    start = time.perf_counter()
+    first = func(out, start)
+    duration = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        "{:9s} first visual {:7.1f} ms, total {:7.1f} ms, peak memory {:7.0f} KiB".format(
+            name, first * 1000, duration * 1000, peak / 1024
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark streaming the tree of shows")
+    parser.add_argument("--latency", type=float, default=0.002, help="Latency of the fake server in seconds")
+    parser.add_argument("--shows", type=int, default=100, help="Number of shows")
+    parser.add_argument("--visuals", type=int, default=5, help="Number of visuals per show")
+    parser.add_argument("--groups", type=int, default=4, help="Number of groups per visual")
+    parser.add_argument("-j", "--jobs", type=int, default=8, help="Number of concurrent requests")
+    args = parser.parse_args()
+
+    with LightbullFakeServer(latency=0) as server:
+        with lightbull.Lightbull(server.url, server.password, pool_size=args.jobs) as bull:
+            for i in range(args.shows):
+                show = bull.shows.new_show("benchmark tree {}".format(i))
+                for j in range(args.visuals):
+                    visual = bull.shows.new_visual(show["id"], "visual {}".format(j))
+                    for _ in range(args.groups):
+                        bull.shows.new_group(visual["id"], ["head"], "rainbow")
+            server.latency = args.latency
+
+            def snapshot(out, start):
+                tree = bull.shows.snapshot(args.jobs).shows
+                first = time.perf_counter() - start
+                for show in tree:
+                    for visual in show["visuals"]:
+                        out.write(json.dumps(visual) + "\n")
+                return first
+
+            def stream(out, start):
+                first = None
+                for show_id, entity in bull.shows.iter_tree(max_workers=args.jobs):
+                    if show_id is not None and first is None:
+                        first = time.perf_counter() - start
+                    out.write(json.dumps(entity) + "\n")
+                return first
+
+            measure("snapshot", snapshot)
+            measure("stream", stream)
+
+            server.latency = 0
+            for show in bull.shows.get_shows():
+                bull.shows.delete_show(show["id"])
+
+
+if __name__ == "__main__":
+    main()
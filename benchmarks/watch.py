@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+
+# Following the current show: polling get_current() at a fixed interval against LightbullWatcher, with a change of
+# the current visual every few seconds. Counts requests to the controller and CPU time of the client.
+
+import argparse
+import itertools
+import threading
+import time
+
+import lightbull
+from lightbull.fakeserver import LightbullFakeServer
+
+
+def switch_visuals(bull, show_id, visual_ids, every, stop, switches):
+    # visual_ids cycles through the visuals over all runs, so that every switch is a change
+    while not stop.wait(every):
+        bull.shows.update_current(show_id, next(visual_ids))
+        switches.append(time.monotonic())
+
+
+def delays(switches, seen):
+    # time from every switch to the first change seen after it
+    result = []
+    for switch in switches:
+        later = [t for t in seen if t >= switch]
+        if later:
+            result.append(later[0] - switch)
+    return result
+
+
+def run(server, bull, show_id, visual_ids, args, follow):
+    stop = threading.Event()
+    switches = []
+    switcher = threading.Thread(target=switch_visuals, args=(bull, show_id, visual_ids, args.every, stop, switches))
+    before = server.requests.get("GET /current", 0)
+    start = time.process_time()
+    switcher.start()
+    seen = follow()
+    stop.set()
+    switcher.join()
+    return server.requests.get("GET /current", 0) - before, time.process_time() - start, delays(switches, seen)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark watching the current show")
+    parser.add_argument("-d", "--duration", type=float, default=10, help="Seconds per run")
+    parser.add_argument("--every", type=float, default=3, help="Seconds between changes of the visual")
+    parser.add_argument("-i", "--interval", type=float, default=0.1, help="Polling interval in seconds")
+    parser.add_argument("--idle-interval", type=float, default=1, help="Longest polling interval of the watcher")
+    args = parser.parse_args()
+
+    with LightbullFakeServer() as server, lightbull.Lightbull(server.url, server.password) as bull:
+        show = bull.shows.new_show("benchmark watch")
+        visual_ids = [bull.shows.new_visual(show["id"], "visual {}".format(i))["id"] for i in range(2)]
+        # a second client, so that the switches do not count as CPU time of the polling one
+        switcher = lightbull.Lightbull(server.url, server.password)
+
+        def poll():
+            seen = []
+            last = None
+            end = time.monotonic() + args.duration
+            while time.monotonic() < end:
+                current = bull.shows.get_current()
+                if last is not None and current != last:
+                    seen.append(time.monotonic())
+                last = current
+                time.sleep(args.interval)
+            return seen
+
+        def watch():
+            seen = []
+            with bull.watch(args.interval, args.idle_interval) as watcher:
+                watcher.subscribe(lambda change: seen.append(time.monotonic()))
+                time.sleep(args.duration)
+            return seen
+
+        visual_ids = itertools.cycle(visual_ids)
+        for name, follow in (("polling", poll), ("watcher", watch)):
+            requests, cpu, seen = run(server, switcher, show["id"], visual_ids, args, follow)
+            if seen:
+                delay = "delay mean {:6.1f} ms, max {:6.1f} ms".format(sum(seen) / len(seen) * 1000, max(seen) * 1000)
+            else:
+                # e.g. a duration shorter than the interval of the switches
+                delay = "no changes seen"
+            print("{:<8} {:4d} requests   {:6.1f} ms CPU   {}".format(name, requests, cpu * 1000, delay))
+
+        bull.shows.delete_show(show["id"])
+
+
+if __name__ == "__main__":
+    main()
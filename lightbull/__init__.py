@@ -1,2 +1,14 @@
 from .lightbull import Lightbull
-from .error import LightbullError
+from .error import LightbullCircuitOpenError, LightbullError, LightbullHTTPError, LightbullTimeoutError
+from .fleet import LightbullFleet
+from .live import LightbullLiveUpdater
+from .metrics import LightbullMetrics
+
+
+def __getattr__(name):
+    # the async client imports asyncio, which is only loaded when it is used
+    if name == "AsyncLightbull":
+        from .aio import AsyncLightbull
+
+        return AsyncLightbull
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
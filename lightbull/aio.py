@@ -0,0 +1,237 @@
+import asyncio
+import json
+import time
+
+from .base import LightbullBase, _parse_json
+from .error import LightbullError, LightbullHTTPError
+
+
+class AsyncLightbull(LightbullBase):
+    def __init__(self, api_url=None, password=None, pool_size=100, keep_alive=True, timeout=None):
+        self._prepare_auth(api_url, password)
+        self._pool_size = pool_size
+        self._keep_alive = keep_alive
+        self._timeout = timeout
+
+        # the session and the lock are created on first use, as they must belong to the running event loop
+        self._session = None
+        self._auth_lock = None
+
+        self.config = AsyncLightbullConfig(self)
+        self.shows = AsyncLightbullShows(self)
+        self.system = AsyncLightbullSystem(self)
+
+    async def simulator(self):
+        return await self._send_get("simulator")
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        self._auth_lock = None
+
+    async def __aenter__(self):
+        await self._reauth_if_required()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def _get_session(self):
+        if self._session is None:
+            try:
+                import aiohttp
+            except ImportError:
+                raise LightbullError("AsyncLightbull requires aiohttp (pip install lightbull[async])") from None
+
+            connector = aiohttp.TCPConnector(limit=self._pool_size, force_close=not self._keep_alive)
+            self._session = aiohttp.ClientSession(
+                connector=connector, timeout=aiohttp.ClientTimeout(total=self._timeout)
+            )
+        return self._session
+
+    async def _auth(self):
+        # get jwt
+        status, body = await self._send("POST", ("auth",), {"password": self._password}, None)
+        if status != 200:
+            raise LightbullHTTPError("Authentication failed", status)
+
+        self._store_jwt(json.loads(body)["jwt"])
+
+    async def _reauth_if_required(self):
+        if self._reauth_required():
+            # only one coroutine authenticates, the others wait for its token
+            if self._auth_lock is None:
+                self._auth_lock = asyncio.Lock()
+            async with self._auth_lock:
+                if self._reauth_required():
+                    await self._auth()
+
+    async def _send(self, method, parts, data, headers):
+        session = self._get_session()
+        start = time.perf_counter()
+        try:
+            async with session.request(method, self._build_url(*parts), headers=headers, json=data) as r:
+                status, body = r.status, await r.read()
+        except Exception:
+            if self._observers:
+                self._notify(method, parts, None, 0, time.perf_counter() - start)
+            raise
+        if self._observers:
+            self._notify(method, parts, status, len(body), time.perf_counter() - start)
+        return status, body
+
+    async def _request(self, method, *parts, data=None):
+        await self._reauth_if_required()
+        status, body = await self._send(method, parts, data, self._get_headers())
+        if status >= 400:
+            raise LightbullHTTPError(f"API Error: HTTP {status} - {body.decode(errors='replace')}", status)
+
+        return body
+
+    async def _send_get(self, *parts):
+        return _parse_json(await self._request("GET", *parts))
+
+    async def _send_post(self, *parts, data={}):
+        return _parse_json(await self._request("POST", *parts, data=data))
+
+    async def _send_put(self, *parts, data={}):
+        return _parse_json(await self._request("PUT", *parts, data=data))
+
+    async def _send_delete(self, *parts):
+        await self._request("DELETE", *parts)
+
+
+class AsyncLightbullConfig:
+    def __init__(self, lightbull):
+        self._lightbull = lightbull
+
+    async def get(self):
+        return await self._lightbull._send_get("config")
+
+    async def get_parts(self):
+        return await self._lightbull._send_get("config", "parts")
+
+
+class AsyncLightbullShows:
+    def __init__(self, lightbull):
+        self._lightbull = lightbull
+
+    async def get_shows(self):
+        tmp = await self._lightbull._send_get("shows")
+        try:
+            return tmp["shows"]
+        except KeyError:
+            return LightbullError("Unexpected data returned from /shows endpoint: {}".format(tmp))
+
+    async def get_show(self, show_id):
+        return await self._lightbull._send_get("shows", show_id)
+
+    async def new_show(self, name, favorite=False):
+        return await self._lightbull._send_post("shows", data={"name": name, "favorite": favorite})
+
+    async def update_show(self, show_id, name=None, favorite=None):
+        # only fetch the show if a field is missing
+        if name is None or favorite is None:
+            show = await self.get_show(show_id)
+            name = show["name"] if name is None else name
+            favorite = show["favorite"] if favorite is None else favorite
+
+        data = {
+            "name": name,
+            "favorite": favorite,
+        }
+
+        await self._lightbull._send_put("shows", show_id, data=data)
+
+    async def delete_show(self, show_id):
+        await self._lightbull._send_delete("shows", show_id)
+
+    async def get_visual(self, visual_id):
+        return await self._lightbull._send_get("visuals", visual_id)
+
+    async def new_visual(self, show_id, name):
+        return await self._lightbull._send_post("visuals", data={"showId": show_id, "name": name})
+
+    async def update_visual(self, visual_id, name=None):
+        if name is None:
+            name = (await self.get_visual(visual_id))["name"]
+
+        data = {"name": name}
+
+        await self._lightbull._send_put("visuals", visual_id, data=data)
+
+    async def delete_visual(self, visual_id):
+        await self._lightbull._send_delete("visuals", visual_id)
+
+    async def get_group(self, group_id):
+        return await self._lightbull._send_get("groups", group_id)
+
+    async def new_group(self, visual_id, parts, effect):
+        return await self._lightbull._send_post(
+            "groups", data={"visualId": visual_id, "parts": parts, "effectType": effect}
+        )
+
+    async def update_group(self, group_id, parts=None, effect=None):
+        if parts is None or effect is None:
+            group = await self.get_group(group_id)
+            parts = group["parts"] if parts is None else parts
+            effect = group["effect"]["type"] if effect is None else effect
+
+        data = {
+            "parts": parts,
+            "effectType": effect,
+        }
+
+        await self._lightbull._send_put("groups", group_id, data=data)
+
+    async def delete_group(self, group_id):
+        await self._lightbull._send_delete("groups", group_id)
+
+    async def get_parameter(self, parameter_id):
+        return await self._lightbull._send_get("parameters", parameter_id)
+
+    async def update_parameter(self, parameter_id, current=None, default=None):
+        data = {}
+        if current is not None:
+            data["current"] = current
+        if default is not None:
+            data["default"] = default
+
+        await self._lightbull._send_put("parameters", parameter_id, data=data)
+
+    async def get_current(self):
+        return await self._lightbull._send_get("current")
+
+    async def update_current(self, show_id=None, visual_id=None):
+        data = {}
+        if show_id:
+            data["showId"] = show_id
+        if visual_id:
+            data["visualId"] = visual_id
+
+        await self._lightbull._send_put("current", data=data)
+
+    async def blank(self):
+        return await self._lightbull._send_delete("current")
+
+
+class AsyncLightbullSystem:
+    def __init__(self, lightbull):
+        self._lightbull = lightbull
+
+    async def shutdown(self):
+        return await self._lightbull._send_post("shutdown")
+
+    async def get_ethernet(self):
+        return await self._lightbull._send_get("ethernet")
+
+    async def update_ethernet(self, mode, ip=None, gateway=None, dns=None):
+        data = {
+            "mode": mode,
+            "ip": ip,
+            "gateway": gateway,
+            "dns": dns,
+        }
+
+        await self._lightbull._send_put("ethernet", data=data)
@@ -0,0 +1,341 @@
+import concurrent.futures
+import threading
+import time
+
+from .error import LightbullError
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# easing of the way to a keyframe, by name and code in the keyframe arrays
+EASINGS = ["linear", "ease_in", "ease_out", "ease_in_out", "step"]
+
+# weight of new measurements in the moving averages of the request latency and of the changes per tick
+_SMOOTHING = 0.2
+
+# value of a channel that was never sent or has to be sent again
+_UNSENT = -1
+
+
+def _ease(fraction, easing):
+    # fraction and easing codes are arrays of the same shape
+    return np.select(
+        [easing == 1, easing == 2, easing == 3, easing == 4],
+        [
+            fraction * fraction,
+            1 - (1 - fraction) * (1 - fraction),
+            fraction * fraction * (3 - 2 * fraction),
+            np.floor(fraction),
+        ],
+        fraction,
+    )
+
+
+def _channels(value):
+    # colors have three channels, other parameters one
+    if isinstance(value, dict):
+        return [value["r"], value["g"], value["b"]]
+    return [value, 0, 0]
+
+
+class LightbullAnimationTrack:
+    # keyframes of a parameter: (time, value) or (time, value, easing of the way to it), times in seconds
+    __slots__ = ("parameter_id", "times", "values", "easings", "color", "loop", "delay")
+
+    def __init__(self, parameter_id, keyframes, loop=False, delay=0):
+        if not keyframes:
+            raise LightbullError("Animation of parameter {} has no keyframes".format(parameter_id))
+
+        keyframes = sorted(keyframes, key=lambda keyframe: keyframe[0])
+        colors = {isinstance(keyframe[1], dict) for keyframe in keyframes}
+        if len(colors) > 1:
+            raise LightbullError("Keyframes of parameter {} mix colors and numbers".format(parameter_id))
+
+        self.parameter_id = parameter_id
+        self.times = [float(keyframe[0]) for keyframe in keyframes]
+        self.values = [_channels(keyframe[1]) for keyframe in keyframes]
+        self.easings = []
+        for keyframe in keyframes:
+            easing = keyframe[2] if len(keyframe) > 2 else "linear"
+            if easing not in EASINGS:
+                raise LightbullError("Unknown easing '{}'".format(easing))
+            self.easings.append(EASINGS.index(easing))
+        self.color = colors.pop()
+        self.loop = loop
+        self.delay = delay
+
+    @property
+    def duration(self):
+        return self.times[-1]
+
+
+class LightbullAnimation:
+    # Animates many parameters at once: every tick, the values of all parameters are interpolated together with NumPy
+    # and only the parameters whose value changed since the last send are sent. A parameter is not sent again while its
+    # last request is still running. The tick rate follows how many requests the controller can take, between
+    # min_rate and max_rate. Values are rounded to integers, like colors and percentages of the API.
+
+    def __init__(self, lightbull, max_rate=30, min_rate=2, max_workers=4):
+        if np is None:
+            raise LightbullError("Animations require numpy (pip install lightbull[numpy])")
+
+        self._lightbull = lightbull
+        self._max_rate = max_rate
+        self._min_rate = min_rate
+        self._max_workers = max_workers
+        self.rate = max_rate
+
+        self._lock = threading.Condition()
+        self._tracks = {}
+        self._arrays = None
+        self._indices = {}
+        self._sent = None
+        self._busy = None
+        self._start = None
+        self._thread = None
+        self._executor = None
+        self._running = False
+
+        self._latency = None
+        self._changes = None
+        self._ticks = 0
+        self._sends = 0
+        self._unchanged = 0
+        self._skipped = 0
+        self._failed = 0
+        self.last_error = None
+
+    def animate(self, parameter_id, keyframes, loop=False, delay=0):
+        # replaces the animation of the parameter, delay is the time after the start of the animation
+        track = LightbullAnimationTrack(parameter_id, keyframes, loop, delay)
+        with self._lock:
+            self._tracks[parameter_id] = track
+            self._arrays = None
+
+    def remove(self, parameter_id):
+        with self._lock:
+            if self._tracks.pop(parameter_id, None) is not None:
+                self._arrays = None
+
+    def values(self, at):
+        # values of all parameters at a time of the animation (seconds), as sent to the API
+        with self._lock:
+            arrays = self._build()
+        return dict(zip(arrays["ids"], self._encode(arrays["color"], np.rint(self._evaluate(arrays, at)))))
+
+    def start(self):
+        with self._lock:
+            if self._running:
+                return self
+            self._running = True
+            self._start = time.monotonic()
+
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self._max_workers, thread_name_prefix="lightbull-animation"
+        )
+        self._thread = threading.Thread(target=self._run, name="lightbull-animation", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        with self._lock:
+            self._running = False
+            self._lock.notify_all()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def wait(self, timeout=None):
+        # until all animations that do not loop ended and their last values were sent, False after the timeout
+        end = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            while self._running and not self._finished():
+                remaining = None if end is None else end - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._lock.wait(remaining)
+            return True
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "parameters": len(self._tracks),
+                "ticks": self._ticks,
+                "rate": self.rate,
+                "sent": self._sends,
+                "unchanged": self._unchanged,
+                "skipped": self._skipped,
+                "failed": self._failed,
+                "latency": self._latency,
+            }
+
+    def _build(self):
+        # keyframes of all tracks as arrays, padded to the same number of keyframes (with the lock held)
+        if self._arrays is not None:
+            return self._arrays
+
+        tracks = list(self._tracks.values())
+        count = max((len(track.times) for track in tracks), default=1)
+        times = np.full((len(tracks), count + 1), np.inf)
+        values = np.zeros((len(tracks), count + 1, 3))
+        easings = np.zeros((len(tracks), count + 1), dtype=np.int8)
+        for i, track in enumerate(tracks):
+            n = len(track.times)
+            times[i, :n] = track.times
+            values[i, :n] = track.values
+            # the padding keeps the last value
+            values[i, n:] = track.values[-1]
+            easings[i, :n] = track.easings
+
+        self._arrays = {
+            "ids": [track.parameter_id for track in tracks],
+            "tracks": tracks,
+            "times": times,
+            "values": values,
+            "easings": easings,
+            "counts": np.array([len(track.times) for track in tracks], dtype=np.int64),
+            "durations": np.array([track.duration for track in tracks], dtype=float),
+            "delays": np.array([track.delay for track in tracks], dtype=float),
+            "loop": np.array([track.loop for track in tracks], dtype=bool),
+            "color": np.array([track.color for track in tracks], dtype=bool),
+        }
+
+        # what was sent for parameters that are still animated is kept
+        sent = np.full((len(tracks), 3), _UNSENT, dtype=np.int64)
+        busy = np.zeros(len(tracks), dtype=bool)
+        if self._sent is not None:
+            for i, parameter_id in enumerate(self._arrays["ids"]):
+                previous = self._indices.get(parameter_id)
+                if previous is not None:
+                    sent[i] = self._sent[previous]
+                    busy[i] = self._busy[previous]
+        self._indices = {parameter_id: i for i, parameter_id in enumerate(self._arrays["ids"])}
+        self._sent = sent
+        self._busy = busy
+        return self._arrays
+
+    def _evaluate(self, arrays, at):
+        # (tracks, 3) array of the values at time at of the animation
+        rows = np.arange(len(arrays["ids"]))
+        local = at - arrays["delays"]
+        looping = arrays["loop"] & (arrays["durations"] > 0) & (local > 0)
+        local = np.where(looping, np.mod(local, np.where(looping, arrays["durations"], 1)), local)
+
+        # segment from keyframe index to index + 1
+        index = (arrays["times"] <= local[:, None]).sum(axis=1) - 1
+        index = np.clip(index, 0, np.maximum(arrays["counts"] - 2, 0))
+        start = arrays["times"][rows, index]
+        end = arrays["times"][rows, index + 1]
+        length = end - start
+        with np.errstate(invalid="ignore", divide="ignore"):
+            fraction = np.where(length > 0, (local - start) / length, 1)
+        fraction = np.where(np.isinf(end), 0, np.clip(fraction, 0, 1))
+        fraction = _ease(fraction, arrays["easings"][rows, index + 1])
+
+        first = arrays["values"][rows, index]
+        second = arrays["values"][rows, index + 1]
+        return first + (second - first) * fraction[:, None]
+
+    def _encode(self, colors, rounded):
+        return [
+            {"r": int(r), "g": int(g), "b": int(b)} if color else int(r)
+            for (r, g, b), color in zip(rounded.tolist(), colors.tolist())
+        ]
+
+    def _finished(self):
+        # with the lock held
+        arrays = self._build()
+        if arrays["loop"].any() or self._busy.any():
+            return False
+        local = time.monotonic() - self._start - arrays["delays"]
+        if (local < arrays["durations"]).any():
+            return False
+        return bool(
+            (self._sent == np.rint(arrays["values"][np.arange(len(arrays["ids"])), arrays["counts"] - 1])).all()
+        )
+
+    def _run(self):
+        next_tick = time.monotonic()
+        while True:
+            with self._lock:
+                while self._running and time.monotonic() < next_tick:
+                    self._lock.wait(next_tick - time.monotonic())
+                if not self._running:
+                    return
+                self._tick()
+                self._lock.notify_all()
+
+            next_tick = max(next_tick + 1 / self.rate, time.monotonic())
+
+    def _tick(self):
+        # with the lock held
+        arrays = self._build()
+        self._ticks += 1
+        if not arrays["ids"]:
+            return
+
+        rounded = np.rint(self._evaluate(arrays, time.monotonic() - self._start)).astype(np.int64)
+        changed = (rounded != self._sent).any(axis=1)
+        ready = changed & ~self._busy
+        self._unchanged += int((~changed).sum())
+        self._skipped += int((changed & self._busy).sum())
+
+        indices = np.flatnonzero(ready)
+        self._sent[indices] = rounded[indices]
+        self._busy[indices] = True
+        values = self._encode(arrays["color"][indices], rounded[indices])
+        for index, value in zip(indices.tolist(), values):
+            self._executor.submit(self._send, arrays["ids"][index], value)
+
+        count = len(indices)
+        self._changes = count if self._changes is None else self._changes + _SMOOTHING * (count - self._changes)
+        self._adapt()
+
+    def _adapt(self):
+        # ticks per second that the controller can keep up with for the parameters changing per tick
+        if self._latency is None or not self._changes:
+            self.rate = self._max_rate
+            return
+        capacity = self._max_workers / max(self._latency, 1e-6)
+        self.rate = min(self._max_rate, max(self._min_rate, capacity / max(self._changes, 1)))
+
+    def _send(self, parameter_id, value):
+        start = time.monotonic()
+        try:
+            self._lightbull.shows.update_parameter(parameter_id, current=value)
+            error = None
+        except Exception as e:
+            # anything that fails must still free the parameter, otherwise it is never sent again
+            error = e
+        latency = time.monotonic() - start
+
+        with self._lock:
+            if error is None:
+                self._sends += 1
+                self._latency = (
+                    latency if self._latency is None else self._latency + _SMOOTHING * (latency - self._latency)
+                )
+            else:
+                self._failed += 1
+                self.last_error = error
+
+            # the parameter may have been removed meanwhile
+            index = self._indices.get(parameter_id)
+            if index is not None:
+                self._busy[index] = False
+                if error is not None:
+                    # send again with the next tick
+                    self._sent[index] = _UNSENT
+            self._lock.notify_all()
@@ -0,0 +1,76 @@
+import configparser
+import datetime
+import json
+import pathlib
+
+from .error import LightbullError
+from .metrics import LightbullRequest, endpoint_template
+from .token import jwt_expiry
+
+
+class LightbullBase:
+    # authentication, URL handling and observers shared by the sync and async clients
+
+    # called with a LightbullRequest after every request, including authentication. The tuple is replaced on changes,
+    # so that requests iterate it without locking.
+    _observers = ()
+
+    def add_observer(self, observer):
+        self._observers = (*self._observers, observer)
+
+    def remove_observer(self, observer):
+        self._observers = tuple(o for o in self._observers if o is not observer)
+
+    def _notify(self, method, parts, status, size, duration, attempt=0):
+        request = LightbullRequest(method, endpoint_template(parts), status, size, duration, attempt)
+        for observer in self._observers:
+            observer(request)
+
+    def _prepare_auth(self, api_url, password):
+        if api_url is not None and password is not None:
+            # everything there, let's use it
+            self._api_url = api_url
+            self._password = password
+        else:
+            # try to read config file
+            try:
+                config = configparser.ConfigParser()
+                config.read(pathlib.Path.home() / ".lightbull")
+                self._api_url = config["lightbull"]["api_url"]
+                self._password = config["lightbull"]["password"]
+            except KeyError:
+                raise LightbullError("Cannot retrieve API URL and password from config file") from None
+
+        self._jwt = None
+        self._jwt_expiry = None
+
+    def _store_jwt(self, jwt):
+        # store expiry date and JWT
+        self._jwt_expiry = jwt_expiry(jwt)
+        self._jwt = jwt
+
+    def _reauth_required(self):
+        if self._jwt is None:
+            return True
+        return datetime.datetime.now() > self._jwt_expiry - datetime.timedelta(minutes=5)
+
+    def _jwt_expired(self):
+        if self._jwt is None:
+            return True
+        return datetime.datetime.now() > self._jwt_expiry - datetime.timedelta(seconds=30)
+
+    def _build_url(self, *parts):
+        return "/".join([self._api_url, "api", *parts])
+
+    def _build_path(self, *parts):
+        return "/".join(["", "api", *parts])
+
+    def _get_headers(self):
+        return {"Authorization": f"Bearer {self._jwt}"}
+
+
+def _parse_json(body):
+    try:
+        return json.loads(body)
+    except:
+        return None
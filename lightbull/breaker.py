@@ -0,0 +1,85 @@
+import threading
+import time
+
+from .error import LightbullCircuitOpenError
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class LightbullCircuitBreaker:
+    # After threshold consecutive failures (connection problems, timeouts, HTTP 5xx), requests fail immediately for
+    # reset_timeout seconds. Then a single request probes the controller: success closes the circuit again, failure
+    # keeps it open for another reset_timeout. Can be shared by clients for the same controller.
+
+    def __init__(self, threshold=5, reset_timeout=5):
+        self._threshold = threshold
+        self._reset_timeout = reset_timeout
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = None
+        self._open_since = None
+        self._probing = False
+
+        self._opened = 0
+        self._rejected = 0
+        self._open_time = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state
+
+    def acquire(self):
+        with self._lock:
+            if self._state == CLOSED:
+                return
+
+            now = time.monotonic()
+            if self._state == OPEN and now >= self._opened_at + self._reset_timeout:
+                self._state = HALF_OPEN
+            if self._state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+
+            self._rejected += 1
+            retry = max(0, self._opened_at + self._reset_timeout - now)
+            raise LightbullCircuitOpenError("Circuit open after repeated failures, retry in {:.1f} s".format(retry))
+
+    def record(self, success):
+        with self._lock:
+            probe = self._probing
+            self._probing = False
+
+            if success:
+                self._failures = 0
+                if self._state != CLOSED:
+                    self._state = CLOSED
+                    self._open_time += time.monotonic() - self._open_since
+                    self._open_since = None
+                return
+
+            self._failures += 1
+            if probe or (self._state == CLOSED and self._failures >= self._threshold):
+                now = time.monotonic()
+                if self._state == CLOSED:
+                    self._opened += 1
+                    self._open_since = now
+                self._state = OPEN
+                self._opened_at = now
+
+    def stats(self):
+        with self._lock:
+            open_time = self._open_time
+            if self._open_since is not None:
+                open_time += time.monotonic() - self._open_since
+            return {
+                "state": self._state,
+                "failures": self._failures,
+                "opened": self._opened,
+                "rejected": self._rejected,
+                "open_time": open_time,
+            }
@@ -0,0 +1,56 @@
+import gzip
+import json
+
+# Shows are exported as gzip compressed JSON:
+#
+#   {"version": 1, "show": {"name": ..., "favorite": ..., "visuals": [
+#       {"name": ..., "groups": [
+#           {"parts": [...], "effect": <effect type>, "parameters": {<key>: {"current": ..., "default": ...}}}
+#       ]}
+#   ]}}
+
+BUNDLE_VERSION = 1
+
+
+def write_bundle(bundle, file):
+    data = json.dumps(bundle, separators=(",", ":")).encode()
+    with open(file, "wb") as f:
+        f.write(gzip.compress(data))
+
+
+def read_bundle(file):
+    with open(file, "rb") as f:
+        data = f.read()
+
+    # also accept plain JSON, e.g. written by hand
+    if data[:2] == b"\x1f\x8b":
+        data = gzip.decompress(data)
+    return json.loads(data)
+
+
+def show_to_bundle(show):
+    # show as returned by LightbullShows.get_show_tree()
+    return {
+        "version": BUNDLE_VERSION,
+        "show": {
+            "name": show["name"],
+            "favorite": show["favorite"],
+            "visuals": [
+                {
+                    "name": visual["name"],
+                    "groups": [
+                        {
+                            "parts": group["parts"],
+                            "effect": group["effect"]["type"],
+                            "parameters": {
+                                parameter["key"]: {"current": parameter["current"], "default": parameter["default"]}
+                                for parameter in group["effect"]["parameters"]
+                            },
+                        }
+                        for group in visual.get("groups") or []
+                    ],
+                }
+                for visual in show["visuals"]
+            ],
+        },
+    }
@@ -0,0 +1,126 @@
+import collections
+import copy
+import threading
+import time
+
+
+class LightbullCache:
+    # Entities by (type, ID) with a time to live and LRU eviction. Entities embed their children (a visual contains
+    # its groups, a group its parameters), so invalidating an entity also invalidates its parents and children.
+
+    def __init__(self, ttl=5, size=1024):
+        self._ttl = ttl
+        self._size = size
+
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()
+        self._children = {}
+        self._parents = {}
+        # relations are pruned when there are more than this, see _prune()
+        self._relation_limit = 4 * size
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, entity_type, entity_id):
+        key = (entity_type, entity_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            value = entry[1]
+
+        # callers may modify what they get
+        return copy.deepcopy(value)
+
+    def put(self, entity_type, entity_id, value, children=()):
+        key = (entity_type, entity_id)
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self._ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._size:
+                self._entries.popitem(last=False)
+
+            # relations are kept after eviction, so that invalidation still cascades, until no related entity is cached
+            self._children[key] = set(children)
+            for child in children:
+                self._parents[child] = key
+            self._prune_if_required()
+
+    def link(self, parent_type, parent_id, child_type, child_id):
+        # relation of a new entity, before its parent is fetched again
+        with self._lock:
+            self._children.setdefault((parent_type, parent_id), set()).add((child_type, child_id))
+            self._parents[child_type, child_id] = (parent_type, parent_id)
+            self._prune_if_required()
+
+    def invalidate(self, entity_type, entity_id, cascade=False):
+        key = (entity_type, entity_id)
+        with self._lock:
+            self._entries.pop(key, None)
+
+            # everything that embeds the entity
+            parent = self._parents.get(key)
+            while parent is not None:
+                self._entries.pop(parent, None)
+                parent = self._parents.get(parent)
+
+            # everything the entity embeds, e.g. when it was deleted
+            if cascade:
+                stack = [key]
+                while stack:
+                    key = stack.pop()
+                    self._entries.pop(key, None)
+                    self._parents.pop(key, None)
+                    stack.extend(self._children.pop(key, ()))
+
+    def _prune_if_required(self):
+        # with the lock held, amortized: the limit grows with the relations that are still required
+        if len(self._parents) + len(self._children) > self._relation_limit:
+            self._prune()
+            self._relation_limit = max(4 * self._size, 2 * (len(self._parents) + len(self._children)))
+
+    def _prune(self):
+        # Invalidating an entity must reach its cached ancestors and, with cascade, its cached descendants. So only
+        # relations of entities that are cached or have a cached ancestor or descendant are kept.
+        below_cached = set()
+        above_cached = set()
+        for key in self._entries:
+            stack = list(self._children.get(key, ()))
+            while stack:
+                child = stack.pop()
+                if child not in below_cached:
+                    below_cached.add(child)
+                    stack.extend(self._children.get(child, ()))
+            parent = self._parents.get(key)
+            while parent is not None and parent not in above_cached:
+                above_cached.add(parent)
+                parent = self._parents.get(parent)
+
+        related = below_cached | above_cached | self._entries.keys()
+        self._parents = {key: parent for key, parent in self._parents.items() if key in below_cached}
+        self._children = {
+            key: {child for child in children if child in related}
+            for key, children in self._children.items()
+            if key in related
+        }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._children.clear()
+            self._parents.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
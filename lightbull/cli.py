@@ -1,31 +1,60 @@
 import argparse
+import concurrent.futures
+import copy
+import io
+import itertools
 import json
 import os
+import shlex
 import sys
+import time
 
-from rich.console import Console, Group
-from rich.table import Table
-from rich.panel import Panel
-
+from .bundle import read_bundle, write_bundle
 from .lightbull import Lightbull, LightbullError
 
 
+class LightbullArgumentParser(argparse.ArgumentParser):
+    # parser of the commands in batch mode, errors are raised to be printed with the output of the command
+    def error(self, message):
+        raise LightbullError("{}: {}".format(self.prog, message))
+
+
 class LightbullCLI:
     def run(self):
-        # init rich console
-        self._console = Console()
-        self._error_console = Console(stderr=True)
+        # rich consoles are created on first output
+        self._console = None
+        self._error_console = None
+        self._out = sys.stdout
+        self._err = sys.stderr
+        self._format = "rich"
 
         # parse arguments and connect to lightbull API
         self._parse_arguments()
+        self._format = self._args.format
+        pool_size = max(10, self._args.jobs) if self._args.command == "batch" else 10
         try:
             if self._args.url and self._args.password:
-                self._api = Lightbull(self._args.url, self._args.password)
+                self._api = Lightbull(
+                    self._args.url, self._args.password, pool_size=pool_size, token_cache=True, index_cache=True
+                )
             else:
-                self._api = Lightbull()
+                self._api = Lightbull(pool_size=pool_size, token_cache=True, index_cache=True)
         except (LightbullError, OSError) as e:
             self._fail("Cannot connect to lightbull API: {}".format(e))
 
+        if self._args.command == "batch":
+            self._run_batch()
+        else:
+            self._run_command()
+
+    def _run_command(self):
+        # with a cached token, the controller is first contacted by the command
+        try:
+            self._call_handler()
+        except OSError as e:
+            self._fail("Cannot connect to lightbull API: {}".format(e))
+
+    def _call_handler(self):
         # call correct handler
         if self._args.command == "config":
             self._run_config()
@@ -41,34 +70,87 @@ class LightbullCLI:
             self._run_parameters()
         elif self._args.command == "current":
             self._run_current()
+        elif self._args.command == "play":
+            self._run_play()
         else:
             self._print_help()
 
-    def _parse_arguments(self):
-        parser = argparse.ArgumentParser(description="Lightbull CLI")
+    def _parse_arguments(self, argv=None):
+        argv = sys.argv[1:] if argv is None else argv
+
+        # only the subparser of the selected command is built, all of them for help and for the commands of batch mode
+        command = self._find_command(argv)
+        parser = self._build_parser(command)
+
+        self._args = parser.parse_args(argv)
+        self._parser = parser
+        self._print_help = parser.print_help
+
+    def _find_command(self, argv):
+        args = iter(argv)
+        for arg in args:
+            if arg in ("-u", "--url", "-p", "--password", "--format"):
+                # skip value
+                next(args, None)
+            elif not arg.startswith("-"):
+                return arg
+        return None
+
+    def _build_parser(self, command=None, parser_class=argparse.ArgumentParser):
+        # subparsers are of the same class
+        parser = parser_class(description="Lightbull CLI")
         subparser = parser.add_subparsers(title="commands", dest="command")
 
         # global parameters
         parser.add_argument("-u", "--url", type=str, help="URL of the server")
         parser.add_argument("-p", "--password", type=str, help="Password for API")
+        parser.add_argument(
+            "--format",
+            choices=["rich", "plain", "json", "ndjson"],
+            default="rich",
+            help="Output format (default: rich), json and ndjson for shows, visuals and config",
+        )
+
+        builders = {
+            "config": self._build_config_parser,
+            "shutdown": self._build_shutdown_parser,
+            "shows": self._build_shows_parser,
+            "visuals": self._build_visuals_parser,
+            "groups": self._build_groups_parser,
+            "parameters": self._build_parameters_parser,
+            "current": self._build_current_parser,
+            "batch": self._build_batch_parser,
+            "play": self._build_play_parser,
+        }
+        for name, builder in builders.items():
+            if command is None or command == name:
+                builder(subparser)
+            else:
+                subparser.add_parser(name)
+
+        return parser
 
-        # config
+    def _build_config_parser(self, subparser):
         self._cmd_config = subparser.add_parser("config")
         cmd_config_subparser = self._cmd_config.add_subparsers(title="actions", dest="action")
         cmd_config_subparser.add_parser("get")
         cmd_config_subparser.add_parser("parts")
 
-        # shutdown
+    def _build_shutdown_parser(self, subparser):
         subparser.add_parser("shutdown")
 
-        # shows
+    def _build_shows_parser(self, subparser):
         self._cmd_shows = subparser.add_parser("shows")
         cmd_shows_subparser = self._cmd_shows.add_subparsers(title="actions", dest="action")
         # shows list
         cmd_shows_subparser.add_parser("list")
         # shows get
         cmd_shows_get = cmd_shows_subparser.add_parser("get")
-        cmd_shows_get.add_argument("--id", type=str, required=True, help="ID of show")
+        self._add_show_selector(cmd_shows_get)
+        # shows tree
+        cmd_shows_tree = cmd_shows_subparser.add_parser("tree", help="List shows with their visuals and groups")
+        self._add_show_selector(cmd_shows_tree)
+        cmd_shows_tree.add_argument("--jobs", type=int, default=8, help="Number of visuals to fetch at the same time")
         # shows new
         cmd_shows_new = cmd_shows_subparser.add_parser("new")
         cmd_shows_new.add_argument("--name", type=str, required=True, help="Name of show")
@@ -78,71 +160,85 @@ class LightbullCLI:
         )
         # shows update
         cmd_shows_update = cmd_shows_subparser.add_parser("update")
-        cmd_shows_update.add_argument("--id", type=str, required=True, help="ID of show")
+        self._add_show_selector(cmd_shows_update)
         cmd_shows_update.add_argument("--name", type=str, help="Name of show")
         cmd_shows_update.add_argument("--favorite", help="Set as favorite", action="store_true", dest="favorite")
         cmd_shows_update.add_argument(
             "--no-favorite", help="Do not set as favorite", action="store_false", dest="favorite"
         )
+        cmd_shows_update.set_defaults(favorite=None)
         # shows delete
         cmd_shows_delete = cmd_shows_subparser.add_parser("delete")
-        cmd_shows_delete.add_argument("--id", type=str, required=True, help="ID of show")
-
-        # visuals
+        self._add_show_selector(cmd_shows_delete)
+        # shows export
+        cmd_shows_export = cmd_shows_subparser.add_parser("export")
+        self._add_show_selector(cmd_shows_export)
+        cmd_shows_export.add_argument("--file", type=str, required=True, help="File to write the show to")
+        # shows import
+        cmd_shows_import = cmd_shows_subparser.add_parser("import")
+        cmd_shows_import.add_argument("--file", type=str, required=True, help="File to read the show from")
+        cmd_shows_import.add_argument("--name", type=str, help="Name of the new show (default: name in file)")
+        # shows sync
+        cmd_shows_sync = cmd_shows_subparser.add_parser("sync")
+        cmd_shows_sync.add_argument("--file", type=str, required=True, help="File with the desired show")
+        cmd_shows_sync.add_argument("--id", type=str, help="ID of show (default: show with the name in file)")
+        cmd_shows_sync.add_argument("--show", type=str, help="Name of show instead of ID")
+        cmd_shows_sync.add_argument("--dry-run", help="Only print the changes", action="store_true")
+
+    def _build_visuals_parser(self, subparser):
         self._cmd_visuals = subparser.add_parser("visuals")
         cmd_visuals_subparser = self._cmd_visuals.add_subparsers(title="actions", dest="action")
         # visuals get
         cmd_visuals_get = cmd_visuals_subparser.add_parser("get")
-        cmd_visuals_get.add_argument("--id", type=str, required=True, help="ID of visual")
+        self._add_visual_selector(cmd_visuals_get)
         # visuals new
         cmd_visuals_new = cmd_visuals_subparser.add_parser("new")
         cmd_visuals_new.add_argument("--name", type=str, required=True, help="Name of visual")
-        cmd_visuals_new.add_argument(
-            "--show-id", type=str, required=True, help="ID of show where the visual belongs to"
-        )
+        cmd_visuals_new.add_argument("--show-id", type=str, help="ID of show where the visual belongs to")
+        cmd_visuals_new.add_argument("--show", type=str, help="Name of show instead of ID")
         # visuals update
         cmd_visuals_update = cmd_visuals_subparser.add_parser("update")
-        cmd_visuals_update.add_argument("--id", type=str, required=True, help="ID of visual")
+        self._add_visual_selector(cmd_visuals_update)
         cmd_visuals_update.add_argument("--name", type=str, required=True, help="Name of visual")
         # shows delete
         cmd_visuals_delete = cmd_visuals_subparser.add_parser("delete")
-        cmd_visuals_delete.add_argument("--id", type=str, required=True, help="ID of visual")
+        self._add_visual_selector(cmd_visuals_delete)
 
-        # groups
+    def _build_groups_parser(self, subparser):
         self._cmd_groups = subparser.add_parser("groups")
         cmd_groups_subparser = self._cmd_groups.add_subparsers(title="actions", dest="action")
         # groups get
         cmd_groups_get = cmd_groups_subparser.add_parser("get")
-        cmd_groups_get.add_argument("--id", type=str, required=True, help="ID of group")
+        self._add_group_selector(cmd_groups_get)
         # groups new
         cmd_groups_new = cmd_groups_subparser.add_parser("new")
-        cmd_groups_new.add_argument(
-            "--visual-id", type=str, required=True, help="ID of visual where the group belongs to"
-        )
+        cmd_groups_new.add_argument("--visual-id", type=str, help="ID of visual where the group belongs to")
+        cmd_groups_new.add_argument("--show", type=str, help="Name of show, with --visual instead of --visual-id")
+        cmd_groups_new.add_argument("--visual", type=str, help="Name of visual instead of ID")
         cmd_groups_new.add_argument("--parts", type=str, required=True, help="List of parts (comma separated)")
         cmd_groups_new.add_argument("--effect-type", type=str, required=True, help="Effect type")
         # groups update
         cmd_groups_update = cmd_groups_subparser.add_parser("update")
-        cmd_groups_update.add_argument("--id", type=str, required=True, help="ID of group")
+        self._add_group_selector(cmd_groups_update)
         cmd_groups_update.add_argument("--parts", type=str, help="List of parts (comma separated)")
         cmd_groups_update.add_argument("--effect-type", type=str, help="Effect type")
         # groups delete
         cmd_groups_delete = cmd_groups_subparser.add_parser("delete")
-        cmd_groups_delete.add_argument("--id", type=str, required=True, help="ID of group")
+        self._add_group_selector(cmd_groups_delete)
 
-        # parameters
+    def _build_parameters_parser(self, subparser):
         self._cmd_parameters = subparser.add_parser("parameters")
         cmd_parameters_subparser = self._cmd_parameters.add_subparsers(title="actions", dest="action")
         # parameters get
         cmd_parameters_get = cmd_parameters_subparser.add_parser("get")
-        cmd_parameters_get.add_argument("--id", type=str, required=True, help="ID of parameter")
+        self._add_parameter_selector(cmd_parameters_get)
         # parameters update
         cmd_parameters_update = cmd_parameters_subparser.add_parser("update")
-        cmd_parameters_update.add_argument("--id", type=str, required=True, help="ID of parameter")
+        self._add_parameter_selector(cmd_parameters_update)
         cmd_parameters_update.add_argument("--current", type=str, help="Current value as JSON")
         cmd_parameters_update.add_argument("--default", type=str, help="Default value as JSON")
 
-        # current
+    def _build_current_parser(self, subparser):
         self._cmd_current = subparser.add_parser("current")
         cmd_current_subparser = self._cmd_current.add_subparsers(title="actions", dest="action")
         # current get
@@ -151,38 +247,104 @@ class LightbullCLI:
         cmd_current_update = cmd_current_subparser.add_parser("update")
         cmd_current_update.add_argument("--show-id", type=str, help="ID of show")
         cmd_current_update.add_argument("--visual-id", type=str, help="ID of visual")
+        cmd_current_update.add_argument("--show", type=str, help="Name of show instead of ID")
+        cmd_current_update.add_argument("--visual", type=str, help="Name of visual instead of ID (with --show)")
         # current blank
         cmd_current_subparser.add_parser("blank")
 
-        self._args = parser.parse_args()
-        self._print_help = parser.print_help
+    # Entities are selected by ID or by names, which are looked up in the index of the controller
+
+    def _add_show_selector(self, parser):
+        parser.add_argument("--id", type=str, help="ID of show")
+        parser.add_argument("--show", type=str, help="Name of show instead of ID")
+
+    def _add_visual_selector(self, parser):
+        parser.add_argument("--id", type=str, help="ID of visual")
+        parser.add_argument("--show", type=str, help="Name of show, with --visual instead of ID")
+        parser.add_argument("--visual", type=str, help="Name of visual")
+
+    def _add_group_selector(self, parser, entity="group"):
+        parser.add_argument("--id", type=str, help="ID of {}".format(entity))
+        parser.add_argument("--show", type=str, help="Name of show, with --visual instead of ID")
+        parser.add_argument("--visual", type=str, help="Name of visual")
+        parser.add_argument("--group-parts", type=str, help="Parts of the group (comma separated)")
+        parser.add_argument("--group-effect", type=str, help="Effect type of the group")
+
+    def _add_parameter_selector(self, parser):
+        self._add_group_selector(parser, "parameter")
+        parser.add_argument("--key", type=str, help="Key of parameter, with --show and --visual instead of ID")
+
+    def _select_show(self, id=None):
+        if id:
+            return id
+        if self._args.show:
+            return self._api.shows.find_show(self._args.show)
+        self._fail("Select the show by ID or with --show")
+
+    def _select_visual(self, id=None):
+        if id:
+            return id
+        if self._args.show and self._args.visual:
+            return self._api.shows.find_visual(self._args.show, self._args.visual)
+        self._fail("Select the visual by ID or with --show and --visual")
+
+    def _select_group(self):
+        if self._args.id:
+            return self._args.id
+        if self._args.show and self._args.visual:
+            return self._api.shows.find_group(
+                self._args.show, self._args.visual, self._args.group_parts, self._args.group_effect
+            )
+        self._fail("Select the group with --id or with --show and --visual")
+
+    def _select_parameter(self):
+        if self._args.id:
+            return self._args.id
+        if self._args.show and self._args.visual and self._args.key:
+            return self._api.shows.find_parameter(
+                self._args.show, self._args.visual, self._args.key, self._args.group_parts, self._args.group_effect
+            )
+        self._fail("Select the parameter with --id or with --show, --visual and --key")
+
+    def _build_batch_parser(self, subparser):
+        cmd_batch = subparser.add_parser("batch", help="Run commands from a file, one per line")
+        cmd_batch.add_argument("--file", type=str, help="File with commands (default: stdin)")
+        cmd_batch.add_argument("--jobs", type=int, default=1, help="Number of commands to run at the same time")
+
+    def _build_play_parser(self, subparser):
+        cmd_play = subparser.add_parser("play", help="Play a timeline of cues from a JSON file")
+        cmd_play.add_argument("file", type=str, help="JSON file with cues")
+        cmd_play.add_argument(
+            "--lead", type=str, default="auto", help="Send cues earlier by seconds or 'auto' for the network latency"
+        )
+        cmd_play.add_argument("--delay", type=float, default=0, help="Seconds to wait before the start")
+        cmd_play.add_argument("--position", type=float, default=0, help="Start at this time of the timeline")
+        cmd_play.add_argument("--jobs", type=int, default=4, help="Number of cues that can be sent at the same time")
 
     def _run_config(self):
         if self._args.action == "get":
             config = self._api.config.get()
+            if self._format in ("json", "ndjson"):
+                self._print_json(config)
+                return
 
-            self._console.print("[bold]Parts:[/bold]")
+            self._print_heading("Parts")
             for part in config["parts"]:
-                self._console.print(part)
+                self._print_text(part)
 
-            self._console.print()
+            self._print_text()
 
-            self._console.print("[bold]Effects:[/bold]")
-            table = Table()
-            table.add_column("Name")
-            table.add_column("Type")
-            for type, name in config["effects"].items():
-                table.add_row(name, type)
-            self._console.print(table)
+            self._print_heading("Effects")
+            self._print_table(["Name", "Type"], [(name, type) for type, name in config["effects"].items()])
 
-            self._console.print()
+            self._print_text()
 
-            self._console.print("[bold]Features:[/bold]")
+            self._print_heading("Features")
             for feature in config["features"]:
-                self._console.print(feature)
+                self._print_text(feature)
         elif self._args.action == "parts":
             parts = self._api.config.get_parts()
-            print(parts)
+            print(parts, file=self._out)
         else:
             self._cmd_config.print_help()
 
@@ -192,31 +354,37 @@ class LightbullCLI:
     def _run_shows(self):
         if self._args.action == "list":
             shows = self._api.shows.get_shows()
-            table = Table()
-            table.add_column("Name")
-            table.add_column("ID")
-            table.add_column("Favorite")
-            for show in shows:
-                table.add_row(show["name"], show["id"], ":star:" if show["favorite"] else "")
-            self._console.print(table)
+            if self._format in ("json", "ndjson"):
+                self._print_records(shows)
+                return
+
+            star = ":star:" if self._format == "rich" else "*"
+            self._print_table(
+                ["Name", "ID", "Favorite"],
+                ((show["name"], show["id"], star if show["favorite"] else "") for show in shows),
+            )
         elif self._args.action == "get":
             try:
-                show = self._api.shows.get_show(self._args.id)
+                show = self._api.shows.get_show(self._select_show(self._args.id))
+                if self._format in ("json", "ndjson"):
+                    self._print_json(show)
+                    return
 
-                self._console.print("[bold]Name:[/bold] {}".format(show["name"]))
-                self._console.print("[bold]Favorite:[/bold] {}".format("Yes" if show["name"] else "No"))
-                self._console.print()
+                self._print_field("Name", show["name"])
+                self._print_field("Favorite", "Yes" if show["favorite"] else "No")
+                self._print_text()
 
-                self._console.print("[bold]Visuals:[/bold]")
-                table = Table()
-                table.add_column("Name")
-                table.add_column("ID")
-                for visual in show["visuals"]:
-                    table.add_row(visual["name"], visual["id"])
-                self._console.print(table)
+                self._print_heading("Visuals")
+                self._print_table(["Name", "ID"], [(visual["name"], visual["id"]) for visual in show["visuals"]])
 
             except LightbullError as e:
                 self._fail("Cannot get show: {}".format(e))
+        elif self._args.action == "tree":
+            try:
+                show_id = self._select_show(self._args.id) if self._args.id or self._args.show else None
+                self._print_tree(self._api.shows.iter_tree(show_id, self._args.jobs))
+            except (LightbullError, OSError) as e:
+                self._fail("Cannot get shows: {}".format(e))
         elif self._args.action == "new":
             try:
                 self._api.shows.new_show(self._args.name, self._args.favorite)
@@ -224,43 +392,68 @@ class LightbullCLI:
                 self._fail("Cannot create new show: {}".format(e))
         elif self._args.action == "update":
             try:
-                self._api.shows.update_show(self._args.id, self._args.name, self._args.favorite)
+                self._api.shows.update_show(self._select_show(self._args.id), self._args.name, self._args.favorite)
             except LightbullError as e:
                 self._fail("Cannot update show: {}".format(e))
         elif self._args.action == "delete":
             try:
-                self._api.shows.delete_show(self._args.id)
+                self._api.shows.delete_show(self._select_show(self._args.id))
             except LightbullError as e:
                 self._fail("Cannot delete show: {}".format(e))
+        elif self._args.action == "export":
+            try:
+                bundle = self._api.shows.export_show(self._select_show(self._args.id))
+                write_bundle(bundle, self._args.file)
+            except (LightbullError, OSError) as e:
+                self._fail("Cannot export show: {}".format(e))
+        elif self._args.action == "import":
+            try:
+                bundle = read_bundle(self._args.file)
+                show = self._api.shows.import_show(bundle, self._args.name)
+                self._print_field("New show ID", show["id"])
+            except (LightbullError, OSError, ValueError, KeyError) as e:
+                self._fail("Cannot import show: {}".format(e))
+        elif self._args.action == "sync":
+            try:
+                bundle = read_bundle(self._args.file)
+                show_id = self._select_show(self._args.id) if self._args.id or self._args.show else None
+                plan = self._api.shows.sync_show(bundle, show_id, self._args.dry_run)
+                for operation in plan.operations:
+                    self._print_text(operation.description)
+                self._print_field("Operations", "{}{}".format(len(plan), " (dry run)" if self._args.dry_run else ""))
+            except (LightbullError, OSError, ValueError, KeyError) as e:
+                self._fail("Cannot sync show: {}".format(e))
         else:
             self._cmd_shows.print_help()
 
     def _run_visuals(self):
         if self._args.action == "get":
             try:
-                visual = self._api.shows.get_visual(self._args.id)
+                visual = self._api.shows.get_visual(self._select_visual(self._args.id))
+                if self._format in ("json", "ndjson"):
+                    self._print_json(visual)
+                    return
 
-                self._console.print("[bold]Name: {}".format(visual["name"]))
-                self._console.print()
+                self._print_field("Name", visual["name"])
+                self._print_text()
 
                 for group in visual["groups"]:
-                    rendered_group = self._render_group(group)
-                    self._console.print(Panel(rendered_group))
+                    self._print_group(group, panel=True)
             except LightbullError as e:
                 self._fail("Cannot get visual: {}".format(e))
         elif self._args.action == "new":
             try:
-                self._api.shows.new_visual(self._args.show_id, self._args.name)
+                self._api.shows.new_visual(self._select_show(self._args.show_id), self._args.name)
             except LightbullError as e:
                 self._fail("Cannot create new visual: {}".format(e))
         elif self._args.action == "update":
             try:
-                self._api.shows.update_visual(self._args.id, self._args.name)
+                self._api.shows.update_visual(self._select_visual(self._args.id), self._args.name)
             except LightbullError as e:
                 self._fail("Cannot update visual: {}".format(e))
         elif self._args.action == "delete":
             try:
-                self._api.shows.delete_visual(self._args.id)
+                self._api.shows.delete_visual(self._select_visual(self._args.id))
             except LightbullError as e:
                 self._fail("Cannot delete visual: {}".format(e))
         else:
@@ -269,49 +462,46 @@ class LightbullCLI:
     def _run_groups(self):
         if self._args.action == "get":
             try:
-                group = self._api.shows.get_group(self._args.id)
-                rendered_group = self._render_group(group)
-                self._console.print(rendered_group)
+                group = self._api.shows.get_group(self._select_group())
+                self._print_group(group)
             except LightbullError as e:
                 self._fail("Cannot get group: {}".format(e))
         elif self._args.action == "new":
             try:
                 parts = self._args.parts.split(",")
-                self._api.shows.new_group(self._args.visual_id, parts, self._args.effect_type)
+                self._api.shows.new_group(self._select_visual(self._args.visual_id), parts, self._args.effect_type)
             except LightbullError as e:
                 self._fail("Cannot create new group: {}".format(e))
         elif self._args.action == "update":
             try:
                 parts = self._args.parts.split(",") if self._args.parts else None
-                self._api.shows.update_group(self._args.id, parts, self._args.effect_type)
+                self._api.shows.update_group(self._select_group(), parts, self._args.effect_type)
             except LightbullError as e:
                 self._fail("Cannot update group: {}".format(e))
         elif self._args.action == "delete":
             try:
-                self._api.shows.delete_group(self._args.id)
+                self._api.shows.delete_group(self._select_group())
             except LightbullError as e:
                 self._fail("Cannot delete group: {}".format(e))
         else:
-            self._cmd_visuals.print_help()
+            self._cmd_groups.print_help()
 
     def _run_parameters(self):
         if self._args.action == "get":
             try:
-                parameter = self._api.shows.get_parameter(self._args.id)
-                table = Table()
-                table.add_column("Name")
-                table.add_column("Key")
-                table.add_column("Type")
-                table.add_column("Default value")
-                table.add_column("Current value")
-                table.add_row(
-                    parameter["name"],
-                    parameter["key"],
-                    parameter["type"],
-                    json.dumps(parameter["default"]),
-                    json.dumps(parameter["current"]),
+                parameter = self._api.shows.get_parameter(self._select_parameter())
+                self._print_table(
+                    ["Name", "Key", "Type", "Default value", "Current value"],
+                    [
+                        (
+                            parameter["name"],
+                            parameter["key"],
+                            parameter["type"],
+                            json.dumps(parameter["default"]),
+                            json.dumps(parameter["current"]),
+                        )
+                    ],
                 )
-                self._console.print(table)
             except LightbullError as e:
                 self._fail("Cannot get parameter: {}".format(e))
         elif self._args.action == "update":
@@ -321,7 +511,7 @@ class LightbullCLI:
                     default = json.loads(self._args.default) if self._args.default else None
                 except ValueError:
                     self._fail("Cannot parse JSON value for parameter")
-                self._api.shows.update_parameter(self._args.id, current, default)
+                self._api.shows.update_parameter(self._select_parameter(), current, default)
             except LightbullError as e:
                 self._fail("Cannot update parameter: {}".format(e))
         else:
@@ -331,13 +521,19 @@ class LightbullCLI:
         if self._args.action == "get":
             try:
                 current = self._api.shows.get_current()
-                self._console.print("[bold]Show: {}".format(current["showId"]))
-                self._console.print("[bold]Visual: {}".format(current["visualId"]))
+                self._print_field("Show", current["showId"])
+                self._print_field("Visual", current["visualId"])
             except LightbullError as e:
                 self._fail("Cannot get current show/visual: {}".format(e))
         elif self._args.action == "update":
             try:
-                self._api.shows.update_current(self._args.show_id, self._args.visual_id)
+                show_id = self._args.show_id
+                visual_id = self._args.visual_id
+                if not show_id and self._args.show:
+                    show_id = self._api.shows.find_show(self._args.show)
+                if not visual_id and self._args.visual:
+                    visual_id = self._select_visual()
+                self._api.shows.update_current(show_id, visual_id)
             except LightbullError as e:
                 self._fail("Cannot update current show/visual: {}".format(e))
         elif self._args.action == "blank":
@@ -348,7 +544,234 @@ class LightbullCLI:
         else:
             self._cmd_current.print_help()
 
-    def _render_group(self, group):
+    def _run_play(self):
+        from .timeline import LightbullTimeline, load_cues
+
+        try:
+            cues = load_cues(self._args.file)
+        except (OSError, ValueError, KeyError, TypeError, LightbullError) as e:
+            self._fail("Cannot read cues: {}".format(e))
+
+        try:
+            lead = self._args.lead if self._args.lead == "auto" else float(self._args.lead)
+        except ValueError:
+            self._fail("Invalid lead: {}".format(self._args.lead))
+
+        def report(result):
+            # actual compared to planned time of every cue, as soon as it was sent
+            if result.error is not None:
+                status = "failed: {}".format(result.error)
+            else:
+                status = "{:+.1f} ms".format(result.timing_error * 1000)
+            self._print_text("{:10.3f}\t{}\t{}".format(result.planned, result.cue.action, status))
+
+        timeline = LightbullTimeline(self._api, cues, lead=lead, max_workers=self._args.jobs, callback=report)
+        try:
+            timeline.start(self._args.delay, self._args.position)
+            while not timeline.wait(0.5):
+                pass
+        except KeyboardInterrupt:
+            pass
+        except (LightbullError, OSError) as e:
+            self._fail("Cannot play cues: {}".format(e))
+        finally:
+            timeline.stop()
+
+        stats = timeline.stats()
+        summary = "{} cues, {} sent, {} skipped, {} failed, lead {:.1f} ms".format(
+            stats["cues"], stats["sent"], stats["skipped"], stats["failed"], stats["lead"] * 1000
+        )
+        if stats["error_mean"] is not None:
+            summary += ", timing error mean {:.1f} ms, max {:.1f} ms".format(
+                stats["error_mean"] * 1000, stats["error_max"] * 1000
+            )
+        self._print_text(summary)
+        if stats["failed"]:
+            sys.exit(1)
+
+    def _run_batch(self):
+        # Commands use the syntax of the CLI without global parameters. With several jobs, commands run in
+        # parallel up to a line with "wait", and their output is printed in order when they are done.
+        try:
+            if self._args.file:
+                with open(self._args.file) as f:
+                    lines = f.read().splitlines()
+            else:
+                lines = sys.stdin.read().splitlines()
+        except OSError as e:
+            self._fail("Cannot read commands: {}".format(e))
+
+        self._parser = self._build_parser(parser_class=LightbullArgumentParser)
+        self._print_help = self._parser.print_help
+
+        blocks = [[]]
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line == "wait":
+                blocks.append([])
+            else:
+                blocks[-1].append(line)
+
+        start = time.perf_counter()
+        results = []
+        if self._args.jobs <= 1:
+            for line in itertools.chain(*blocks):
+                ok, duration, _ = self._run_batch_line(line)
+                results.append((line, ok, duration))
+        else:
+            if self._format == "rich":
+                # consoles of the commands copy the terminal settings
+                self._get_console()
+                self._get_error_console()
+
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self._args.jobs) as executor:
+                for block in blocks:
+                    futures = [executor.submit(self._run_batch_line, line, True) for line in block]
+                    for line, future in zip(block, futures):
+                        ok, duration, cli = future.result()
+                        self._out.write(cli._out.getvalue())
+                        self._err.write(cli._err.getvalue())
+                        results.append((line, ok, duration))
+        duration = time.perf_counter() - start
+
+        # timing report on stderr, so that it does not mix with the output of the commands
+        failed = sum(1 for _, ok, _ in results if not ok)
+        summary = "{} commands, {} failed, {:.3f} s".format(len(results), failed, duration)
+        if self._format != "rich":
+            for line, ok, line_duration in results:
+                print("{}\t{}\t{:.1f} ms".format(line, "OK" if ok else "Failed", line_duration * 1000), file=self._err)
+            print(summary, file=self._err)
+        else:
+            rows = [
+                (line, "OK" if ok else "[red]Failed", "{:.1f} ms".format(line_duration * 1000))
+                for line, ok, line_duration in results
+            ]
+            self._get_error_console().print(self._build_table(["Command", "Result", "Time"], rows, title="Batch"))
+            self._get_error_console().print("[bold]{}".format(summary))
+
+        if failed:
+            sys.exit(1)
+
+    def _run_batch_line(self, line, buffered=False):
+        cli = copy.copy(self)
+        if buffered:
+            cli._out = io.StringIO()
+            cli._err = io.StringIO()
+            if self._format == "rich":
+                from rich.console import Console
+
+                cli._console = Console(
+                    file=cli._out, force_terminal=self._console.is_terminal, width=self._console.width
+                )
+                cli._error_console = Console(
+                    file=cli._err, force_terminal=self._error_console.is_terminal, width=self._error_console.width
+                )
+
+        start = time.perf_counter()
+        try:
+            try:
+                cli._args = self._parser.parse_args(shlex.split(line))
+            except (ValueError, LightbullError) as e:
+                # shlex and argparse
+                cli._fail("Cannot parse command: {}".format(e))
+            if cli._args.command == "batch":
+                cli._fail("Batch mode cannot be nested")
+            cli._run_command()
+            ok = True
+        except SystemExit as e:
+            # errors of commands end with sys.exit()
+            ok = not e.code
+        except Exception as e:
+            # a failing command does not stop the others
+            cli._print_error("Command failed: {}".format(e))
+            ok = False
+
+        return ok, time.perf_counter() - start, cli
+
+    def _get_console(self):
+        if self._console is None:
+            from rich.console import Console
+
+            self._console = Console()
+        return self._console
+
+    def _get_error_console(self):
+        if self._error_console is None:
+            from rich.console import Console
+
+            self._error_console = Console(stderr=True)
+        return self._error_console
+
+    # Output helpers. The plain format writes text without importing rich, e.g. for scripts and fast startup.
+
+    def _print_text(self, text=""):
+        if self._format != "rich":
+            print(text, file=self._out)
+        else:
+            self._get_console().print(text, markup=False)
+
+    def _print_heading(self, title):
+        if self._format != "rich":
+            print("{}:".format(title), file=self._out)
+        else:
+            self._get_console().print("[bold]{}:[/bold]".format(title))
+
+    def _print_field(self, name, value):
+        if self._format != "rich":
+            print("{}: {}".format(name, value), file=self._out)
+        else:
+            from rich.markup import escape
+
+            self._get_console().print("[bold]{}:[/bold] {}".format(name, escape(str(value))))
+
+    def _print_table(self, columns, rows, title=None):
+        if self._format != "rich":
+            print("\t".join(columns), file=self._out)
+            for row in rows:
+                print("\t".join(str(value) for value in row), file=self._out)
+        else:
+            self._get_console().print(self._build_table(columns, rows, title))
+
+    def _build_table(self, columns, rows, title=None):
+        from rich.table import Table
+
+        table = Table(title=title)
+        for column in columns:
+            table.add_column(column)
+        for row in rows:
+            table.add_row(*row)
+        return table
+
+    def _print_group(self, group, panel=False):
+        parameters = [
+            (
+                parameter["id"],
+                parameter["name"],
+                parameter["key"],
+                parameter["type"],
+                json.dumps(parameter["default"]),
+                json.dumps(parameter["current"]),
+            )
+            for parameter in group["effect"]["parameters"]
+        ]
+        columns = ["ID", "Name", "Key", "Type", "Default value", "Current value"]
+
+        if self._format != "rich":
+            self._print_field("Group ID", group["id"])
+            self._print_field("Effect", group["effect"]["type"])
+            self._print_heading("Parts")
+            for name in group["parts"]:
+                print(name, file=self._out)
+            self._print_heading("Parameters")
+            self._print_table(columns, parameters)
+            print(file=self._out)
+            return
+
+        from rich.console import Group
+        from rich.panel import Panel
+
         lines = [
             "[bold]Group ID:[/bold] {}".format(group["id"]),
             "",
@@ -367,26 +790,76 @@ class LightbullCLI:
             ]
         )
 
-        table = Table()
-        table.add_column("ID")
-        table.add_column("Name")
-        table.add_column("Key")
-        table.add_column("Type")
-        table.add_column("Default value")
-        table.add_column("Current value")
-        for parameter in group["effect"]["parameters"]:
-            table.add_row(
-                parameter["id"],
-                parameter["name"],
-                parameter["key"],
-                parameter["type"],
-                json.dumps(parameter["default"]),
-                json.dumps(parameter["current"]),
-            )
-        return Group(os.linesep.join(lines), table)
+        rendered_group = Group(os.linesep.join(lines), self._build_table(columns, parameters))
+        self._get_console().print(Panel(rendered_group) if panel else rendered_group)
+
+    # Records of the json and ndjson formats are printed as they come, as JSON array or one JSON object per line
+
+    def _print_json(self, value):
+        print(json.dumps(value), file=self._out)
+
+    def _print_records(self, records):
+        count = 0
+        for record in records:
+            if self._format == "json":
+                self._out.write(",\n" if count else "[\n")
+                self._out.write(json.dumps(record))
+            else:
+                self._out.write(json.dumps(record) + "\n")
+            # the next record may take a while, e.g. in a pipeline
+            self._out.flush()
+            count += 1
+        if self._format == "json":
+            self._out.write("\n]\n" if count else "[]\n")
+
+    def _print_tree(self, tree):
+        # shows, visuals and groups in the order their requests finish, with the ID of the show or visual they belong to
+        def records():
+            for show_id, entity in tree:
+                if show_id is None:
+                    yield dict(entity, type="show")
+                    continue
+                groups = entity.get("groups") or []
+                yield dict(
+                    {key: value for key, value in entity.items() if key != "groups"}, type="visual", showId=show_id
+                )
+                for group in groups:
+                    yield dict(group, type="group", visualId=entity["id"])
+
+        if self._format in ("json", "ndjson"):
+            self._print_records(records())
+            return
+
+        for record in records():
+            if record["type"] == "show":
+                row = (record["type"], record["id"], record["name"])
+            elif record["type"] == "visual":
+                row = (record["type"], record["id"], record["showId"], record["name"])
+            else:
+                row = (
+                    record["type"],
+                    record["id"],
+                    record["visualId"],
+                    record["effect"]["type"],
+                    ",".join(record["parts"]),
+                )
+            if self._format == "rich":
+                from rich.markup import escape
+
+                self._get_console().print(
+                    "[bold]{:6}[/bold]  {}".format(row[0], escape("  ".join(row[1:]))), soft_wrap=True
+                )
+            else:
+                print("\t".join(row), file=self._out)
+
+    def _print_error(self, msg):
+        if self._format != "rich":
+            print(msg, file=self._err)
+        else:
+            self._get_error_console().print("[bold red]{}".format(msg))
 
     def _fail(self, msg):
-        self._error_console.print("[bold red]{}".format(msg))
+        self._print_error(msg)
         sys.exit(1)
 
 
@@ -1,2 +1,19 @@
 class LightbullError(Exception):
     pass
+
+
+class LightbullTimeoutError(LightbullError, TimeoutError):
+    # deadline of a call exceeded, also an OSError like other connection problems
+    pass
+
+
+class LightbullCircuitOpenError(LightbullError):
+    # request not sent, as the controller failed repeatedly
+    pass
+
+
+class LightbullHTTPError(LightbullError):
+    # error status of the API, after all retries
+    def __init__(self, message, status):
+        super().__init__(message)
+        self.status = status
@@ -0,0 +1,434 @@
+import argparse
+import base64
+import http.server
+import json
+import os
+import random
+import socketserver
+import stat
+import threading
+import time
+import uuid
+
+# Stand-in for a lightbull controller, for benchmarks and trying the client without hardware. Everything is kept in
+# memory and every request can be delayed to simulate the network and the controller.
+
+DEFAULT_PARTS = ["horn_left", "horn_right", "head", "tail"]
+
+# parameters of the effects: key, name, type and default value
+DEFAULT_EFFECTS = {
+    "singlecolor": (
+        "Single color",
+        [("color", "Color", "color", {"r": 255, "g": 0, "b": 0})],
+    ),
+    "blink": (
+        "Blink",
+        [("color", "Color", "color", {"r": 255, "g": 255, "b": 255}), ("speed", "Speed", "percent", 50)],
+    ),
+    "rainbow": (
+        "Rainbow",
+        [("speed", "Speed", "percent", 50), ("brightness", "Brightness", "percent", 100)],
+    ),
+}
+
+
+class LightbullFakeServer:
+    def __init__(
+        self,
+        password="lightbull",
+        host="127.0.0.1",
+        port=0,
+        latency=0,
+        jitter=0,
+        parts=DEFAULT_PARTS,
+        leds=30,
+        token_lifetime=3600,
+        unix_socket=None,
+        error_rate=0,
+    ):
+        self.password = password
+        self.latency = latency
+        self.jitter = jitter
+        # fraction of requests answered with HTTP 503, like an overloaded controller
+        self.error_rate = error_rate
+        self.token_lifetime = token_lifetime
+
+        self._parts = list(parts)
+        self._leds = leds
+
+        self._lock = threading.Lock()
+        self._tokens = set()
+        self._shows = {}
+        self._visuals = {}
+        self._groups = {}
+        self._parameters = {}
+        self._current = {"showId": None, "visualId": None}
+        self._ethernet = {"mode": "dhcp", "ip": None, "gateway": None, "dns": None}
+
+        # number of requests by "METHOD /resource"
+        self.requests = {}
+
+        # HTTP over TCP or a Unix domain socket, see also handle() for calls in the same process
+        self._unix_socket = unix_socket
+        if unix_socket is None:
+            self._server = http.server.ThreadingHTTPServer((host, port), self._handler(tcp=True))
+        else:
+            # a socket file left by an earlier run
+            if os.path.exists(unix_socket) and stat.S_ISSOCK(os.stat(unix_socket).st_mode):
+                os.unlink(unix_socket)
+            self._server = socketserver.ThreadingUnixStreamServer(unix_socket, self._handler(tcp=False))
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        if self._unix_socket is not None:
+            return "unix://" + self._unix_socket
+        host, port = self._server.server_address[:2]
+        return "http://{}:{}".format(host, port)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="lightbull-fake", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+        if self._unix_socket is not None and os.path.exists(self._unix_socket):
+            os.unlink(self._unix_socket)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def handle(self, method, path, headers, body):
+        # one request, returns the status and the body of the response, see LightbullCallableTransport
+        if self.error_rate and random.random() < self.error_rate:
+            status, data = 503, {"error": "unavailable"}
+        else:
+            status, data = self._dispatch(method, path, (headers or {}).get("Authorization", ""), body or b"")
+        self._delay()
+        return status, json.dumps(data).encode() if data is not None else b""
+
+    def revoke_tokens(self):
+        # like a restart of the controller
+        with self._lock:
+            self._tokens.clear()
+
+    def _handler(self, tcp):
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = tcp
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                self._handle("GET")
+
+            def do_POST(self):
+                self._handle("POST")
+
+            def do_PUT(self):
+                self._handle("PUT")
+
+            def do_DELETE(self):
+                self._handle("DELETE")
+
+            def _handle(self, method):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                status, payload = server.handle(method, self.path, self.headers, body)
+
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                except (BrokenPipeError, ConnectionResetError):
+                    # client gave up, e.g. after its deadline
+                    self.close_connection = True
+
+        return Handler
+
+    def _delay(self):
+        delay = self.latency + (random.uniform(-self.jitter, self.jitter) if self.jitter else 0)
+        if delay > 0:
+            time.sleep(delay)
+
+    def _dispatch(self, method, path, authorization, body):
+        parts = [part for part in path.split("?")[0].split("/") if part]
+        if parts[:1] != ["api"]:
+            return 404, {"error": "not found"}
+        parts = parts[1:]
+
+        key = "{} /{}".format(method, parts[0] if parts else "")
+        with self._lock:
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+            try:
+                data = json.loads(body) if body else {}
+            except ValueError:
+                return 400, {"error": "invalid JSON"}
+
+            if parts == ["auth"] and method == "POST":
+                return self._auth(data)
+            if not authorization.startswith("Bearer ") or authorization[7:] not in self._tokens:
+                return 401, {"error": "unauthorized"}
+
+            try:
+                return self._route(method, parts, data)
+            except (KeyError, TypeError, AttributeError):
+                return 400, {"error": "invalid request"}
+
+    def _auth(self, data):
+        if data.get("password") != self.password:
+            return 401, {"error": "wrong password"}
+
+        # only the payload is used by the client, unpadded base64url like real JWTs
+        payload = json.dumps({"exp": int(time.time()) + self.token_lifetime, "jti": str(uuid.uuid4())})
+        jwt = "e30.{}.fake".format(base64.urlsafe_b64encode(payload.encode()).decode().rstrip("="))
+        self._tokens.add(jwt)
+        return 200, {"jwt": jwt}
+
+    def _route(self, method, parts, data):
+        resource, args = parts[0] if parts else "", parts[1:]
+
+        if resource == "config" and method == "GET":
+            if args == ["parts"]:
+                return 200, list(self._parts)
+            if not args:
+                return 200, {
+                    "parts": list(self._parts),
+                    "effects": {effect: name for effect, (name, _) in DEFAULT_EFFECTS.items()},
+                    "features": [],
+                }
+        elif resource == "current" and not args:
+            return self._route_current(method, data)
+        elif resource == "simulator" and method == "GET" and not args:
+            return 200, self._simulator()
+        elif resource == "ethernet" and not args:
+            if method == "GET":
+                return 200, dict(self._ethernet)
+            if method == "PUT":
+                self._ethernet.update((key, data.get(key)) for key in self._ethernet)
+                return 200, dict(self._ethernet)
+        elif resource == "shutdown" and method == "POST" and not args:
+            return 200, None
+        elif resource in ("shows", "visuals", "groups", "parameters"):
+            if not args:
+                if method == "GET" and resource == "shows":
+                    return 200, {"shows": [self._show_out(show, False) for show in self._shows.values()]}
+                if method == "POST" and resource != "parameters":
+                    return getattr(self, "_new_" + resource[:-1])(data)
+            elif len(args) == 1:
+                entities = getattr(self, "_" + resource)
+                if args[0] not in entities:
+                    return 404, {"error": "not found"}
+                entity = entities[args[0]]
+                if method == "GET":
+                    return 200, getattr(self, "_" + resource[:-1] + "_out")(entity)
+                if method == "PUT":
+                    return getattr(self, "_update_" + resource[:-1])(entity, data)
+                if method == "DELETE" and resource != "parameters":
+                    self._delete(resource, args[0])
+                    return 204, None
+
+        return 404, {"error": "not found"}
+
+    def _route_current(self, method, data):
+        if method == "GET":
+            return 200, dict(self._current)
+        if method == "PUT":
+            if "showId" in data:
+                if data["showId"] not in self._shows:
+                    return 400, {"error": "unknown show"}
+                self._current = {"showId": data["showId"], "visualId": None}
+            if "visualId" in data:
+                visual = self._visuals.get(data["visualId"])
+                if visual is None:
+                    return 400, {"error": "unknown visual"}
+                self._current = {"showId": visual["show"], "visualId": visual["id"]}
+            return 200, dict(self._current)
+        if method == "DELETE":
+            self._current = {"showId": None, "visualId": None}
+            return 204, None
+        return 404, {"error": "not found"}
+
+    def _new_show(self, data):
+        show = {"id": str(uuid.uuid4()), "name": data["name"], "favorite": bool(data.get("favorite")), "visuals": []}
+        self._shows[show["id"]] = show
+        return 201, self._show_out(show)
+
+    def _new_visual(self, data):
+        show = self._shows.get(data["showId"])
+        if show is None:
+            return 400, {"error": "unknown show"}
+
+        visual = {"id": str(uuid.uuid4()), "name": data["name"], "show": show["id"], "groups": []}
+        self._visuals[visual["id"]] = visual
+        show["visuals"].append(visual["id"])
+        return 201, self._visual_out(visual)
+
+    def _new_group(self, data):
+        visual = self._visuals.get(data["visualId"])
+        if visual is None:
+            return 400, {"error": "unknown visual"}
+        if data["effectType"] not in DEFAULT_EFFECTS:
+            return 400, {"error": "unknown effect"}
+
+        group = {"id": str(uuid.uuid4()), "visual": visual["id"], "parts": list(data["parts"]), "parameters": []}
+        self._set_effect(group, data["effectType"])
+        self._groups[group["id"]] = group
+        visual["groups"].append(group["id"])
+        return 201, self._group_out(group)
+
+    def _update_show(self, show, data):
+        show["name"] = data["name"]
+        show["favorite"] = bool(data["favorite"])
+        return 200, self._show_out(show)
+
+    def _update_visual(self, visual, data):
+        visual["name"] = data["name"]
+        return 200, self._visual_out(visual)
+
+    def _update_group(self, group, data):
+        if data["effectType"] not in DEFAULT_EFFECTS:
+            return 400, {"error": "unknown effect"}
+
+        group["parts"] = list(data["parts"])
+        if data["effectType"] != group["effect"]:
+            # new effect, new parameters
+            for parameter_id in group["parameters"]:
+                del self._parameters[parameter_id]
+            self._set_effect(group, data["effectType"])
+        return 200, self._group_out(group)
+
+    def _update_parameter(self, parameter, data):
+        for key in ("current", "default"):
+            if key in data:
+                parameter[key] = data[key]
+        return 200, self._parameter_out(parameter)
+
+    def _set_effect(self, group, effect):
+        group["effect"] = effect
+        group["parameters"] = []
+        for key, name, type, default in DEFAULT_EFFECTS[effect][1]:
+            parameter = {"id": str(uuid.uuid4()), "key": key, "name": name, "type": type}
+            parameter["current"] = parameter["default"] = default
+            self._parameters[parameter["id"]] = parameter
+            group["parameters"].append(parameter["id"])
+
+    def _delete(self, resource, entity_id):
+        entity = getattr(self, "_" + resource).pop(entity_id)
+        if resource == "shows":
+            for visual_id in list(entity["visuals"]):
+                self._delete("visuals", visual_id)
+            if self._current["showId"] == entity_id:
+                self._current = {"showId": None, "visualId": None}
+        elif resource == "visuals":
+            for group_id in list(entity["groups"]):
+                self._delete("groups", group_id)
+            if entity["show"] in self._shows:
+                self._shows[entity["show"]]["visuals"].remove(entity_id)
+            if self._current["visualId"] == entity_id:
+                self._current["visualId"] = None
+        elif resource == "groups":
+            for parameter_id in entity["parameters"]:
+                del self._parameters[parameter_id]
+            if entity["visual"] in self._visuals:
+                self._visuals[entity["visual"]]["groups"].remove(entity_id)
+
+    def _show_out(self, show, visuals=True):
+        data = {
+            "id": show["id"],
+            "name": show["name"],
+            "favorite": show["favorite"],
+            "visualIds": list(show["visuals"]),
+        }
+        if visuals:
+            data["visuals"] = [
+                {"id": visual_id, "name": self._visuals[visual_id]["name"]} for visual_id in show["visuals"]
+            ]
+        return data
+
+    def _visual_out(self, visual):
+        return {
+            "id": visual["id"],
+            "name": visual["name"],
+            "groups": [self._group_out(self._groups[group_id]) for group_id in visual["groups"]],
+        }
+
+    def _group_out(self, group):
+        return {
+            "id": group["id"],
+            "parts": list(group["parts"]),
+            "effect": {
+                "type": group["effect"],
+                "parameters": [self._parameter_out(self._parameters[p]) for p in group["parameters"]],
+            },
+        }
+
+    def _parameter_out(self, parameter):
+        return dict(parameter)
+
+    def _simulator(self):
+        # LED colors as hex strings per part, parts of the current visual get the color of their group
+        colors = dict.fromkeys(self._parts, "000000")
+        visual = self._visuals.get(self._current["visualId"])
+        for group_id in visual["groups"] if visual else ():
+            group = self._groups[group_id]
+            color = {"r": 255, "g": 255, "b": 255}
+            for parameter_id in group["parameters"]:
+                parameter = self._parameters[parameter_id]
+                if parameter["type"] == "color" and isinstance(parameter["current"], dict):
+                    color = parameter["current"]
+            for part in group["parts"]:
+                if part in colors:
+                    colors[part] = "{:02x}{:02x}{:02x}".format(color["r"], color["g"], color["b"])
+        return {"parts": {part: color * self._leds for part, color in colors.items()}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake lightbull controller for testing and benchmarks")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Address to listen on")
+    parser.add_argument("--port", type=int, default=8080, help="Port to listen on")
+    parser.add_argument("--unix-socket", type=str, help="Listen on this Unix domain socket instead")
+    parser.add_argument("-p", "--password", type=str, default="lightbull", help="Password for API")
+    parser.add_argument("--latency", type=float, default=0, help="Delay of every response in seconds")
+    parser.add_argument("--jitter", type=float, default=0, help="Random variation of the delay in seconds")
+    parser.add_argument("--error-rate", type=float, default=0, help="Fraction of requests that fail with HTTP 503")
+    args = parser.parse_args()
+
+    server = LightbullFakeServer(
+        args.password,
+        args.host,
+        args.port,
+        args.latency,
+        args.jitter,
+        unix_socket=args.unix_socket,
+        error_rate=args.error_rate,
+    )
+    print("Serving fake lightbull API on {}".format(server.url))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+import concurrent.futures
+import threading
+import time
+
+from .error import LightbullError, LightbullTimeoutError
+from .lightbull import Lightbull
+
+# weight of a new round trip time in the moving average of every device
+_SMOOTHING = 0.2
+
+# time before the send time that is waited for actively instead of sleeping
+_SPIN = 0.001
+
+# time after the timeout of a device that its thread is waited for, so that the deadline of its client fails first
+_GRACE = 0.1
+
+
+def _sleep_until(target):
+    remaining = target - time.monotonic() - _SPIN
+    if remaining > 0:
+        time.sleep(remaining)
+    while time.monotonic() < target:
+        time.sleep(0)
+
+
+class LightbullDeviceResult:
+    # times are seconds of the monotonic clock
+    __slots__ = ("name", "value", "error", "sent", "duration")
+
+    def __init__(self, name):
+        self.name = name
+        self.value = None
+        self.error = None
+        self.sent = None
+        self.duration = None
+
+    @property
+    def arrival(self):
+        # estimated arrival at the controller (half of the round trip)
+        if self.sent is None or self.duration is None:
+            return None
+        return self.sent + self.duration / 2
+
+    def __repr__(self):
+        if self.error is not None:
+            return "<LightbullDeviceResult {}: failed: {}>".format(self.name, self.error)
+        return "<LightbullDeviceResult {}: {:.1f} ms>".format(self.name, (self.duration or 0) * 1000)
+
+
+class LightbullFleetResult:
+    def __init__(self, results):
+        self.results = results
+
+    def __getitem__(self, name):
+        return self.results[name]
+
+    def __iter__(self):
+        return iter(self.results.values())
+
+    def __len__(self):
+        return len(self.results)
+
+    @property
+    def ok(self):
+        # return values of the devices without errors
+        return {name: result.value for name, result in self.results.items() if result.error is None}
+
+    @property
+    def failed(self):
+        return {name: result.error for name, result in self.results.items() if result.error is not None}
+
+    @property
+    def skew(self):
+        # seconds between the first and the last estimated arrival of the successful calls
+        return self._spread([result.arrival for result in self.results.values() if result.error is None])
+
+    @property
+    def send_skew(self):
+        return self._spread([result.sent for result in self.results.values() if result.sent is not None])
+
+    def _spread(self, times):
+        times = [t for t in times if t is not None]
+        return max(times) - min(times) if times else None
+
+    def __repr__(self):
+        skew = self.skew
+        return "<LightbullFleetResult {} ok, {} failed, skew {}>".format(
+            len(self.ok), len(self.failed), "-" if skew is None else "{:.1f} ms".format(skew * 1000)
+        )
+
+
+class LightbullFleet:
+    # Runs the same call on many controllers in parallel, one thread per device. Calls that change what is shown are
+    # synchronized: every device sends at a common time, shifted by the difference of its latency to the slowest one,
+    # so that the calls arrive at about the same time. A device is never waited for by the others, slow ones are
+    # limited by timeout (a deadline of the client), and devices that still did not answer are reported as failed.
+    #
+    # IDs differ between controllers, so ID arguments can also be dicts with a value per device name.
+
+    def __init__(self, clients, timeout=5, margin=0.01):
+        # clients: dict of name and Lightbull, or a list named by their URLs
+        if not isinstance(clients, dict):
+            clients = {client._api_url: client for client in clients}
+        self.clients = clients
+        self.unreachable = {}
+        self._timeout = timeout
+        # time to prepare (e.g. authenticate) before the common send time
+        self._margin = margin
+
+        self._lock = threading.Lock()
+        self._latency = {}
+        self._calibrated = False
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(1, len(clients)), thread_name_prefix="lightbull-fleet"
+        )
+
+    @classmethod
+    def connect(cls, urls, password, timeout=5, margin=0.01, **kwargs):
+        # connects to all controllers in parallel, the ones that fail are left out and listed in unreachable
+        if not isinstance(urls, dict):
+            urls = {url: url for url in urls}
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, len(urls))) as executor:
+            futures = {name: executor.submit(Lightbull, url, password, **kwargs) for name, url in urls.items()}
+
+        clients = {}
+        unreachable = {}
+        for name, future in futures.items():
+            try:
+                clients[name] = future.result()
+            except (LightbullError, OSError) as e:
+                unreachable[name] = e
+
+        fleet = cls(clients, timeout, margin)
+        fleet.unreachable = unreachable
+        return fleet
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        for client in self.clients.values():
+            client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self.clients)
+
+    def latency(self):
+        # estimated one-way latency of every device in seconds
+        with self._lock:
+            return dict(self._latency)
+
+    def calibrate(self, samples=3):
+        # measures the round trip times, which also opens the connections
+        self._calibrated = True
+        for _ in range(samples):
+            self.run(lambda client: client.shows.get_current(), measure=True)
+        return self.latency()
+
+    def update_current(self, show_id=None, visual_id=None):
+        return self.run(
+            lambda client, show_id, visual_id: client.shows.update_current(show_id, visual_id),
+            show_id=show_id,
+            visual_id=visual_id,
+            synchronize=True,
+            measure=True,
+        )
+
+    def blank(self):
+        return self.run(lambda client: client.shows.blank(), synchronize=True, measure=True)
+
+    def update_parameter(self, parameter_id, current=None, default=None):
+        return self.run(
+            lambda client, parameter_id: client.shows.update_parameter(parameter_id, current, default),
+            parameter_id=parameter_id,
+            synchronize=True,
+            measure=True,
+        )
+
+    def get_current(self):
+        return self.run(lambda client: client.shows.get_current())
+
+    def sync_show(self, bundle, show_id=None, dry_run=False, max_workers=8):
+        # shows are found by the name in the bundle unless show_id is given
+        return self.run(
+            lambda client, show_id: client.shows.sync_show(bundle, show_id, dry_run, max_workers), show_id=show_id
+        )
+
+    def run(self, func, synchronize=False, measure=False, **kwargs):
+        # func(client, **kwargs) on every device, kwargs that are dicts are looked up by the device name
+        # only once: devices that did not answer are measured by later calls, until then they get the latency of
+        # the slowest device
+        if synchronize and not self._calibrated:
+            self.calibrate()
+
+        latency = self.latency()
+        slowest = max(latency.values(), default=0)
+        send_time = time.monotonic() + self._margin if synchronize else None
+
+        futures = {}
+        for name, client in self.clients.items():
+            device_kwargs = {
+                key: value.get(name) if isinstance(value, dict) else value for key, value in kwargs.items()
+            }
+            offset = slowest - latency.get(name, slowest)
+            futures[name] = self._executor.submit(
+                self._call, name, client, func, device_kwargs, None if send_time is None else send_time + offset
+            )
+
+        wait = None
+        if self._timeout is not None:
+            wait = self._timeout + _GRACE + (0 if send_time is None else send_time + slowest - time.monotonic())
+        concurrent.futures.wait(futures.values(), max(0, wait) if wait is not None else None)
+
+        results = {}
+        for name, future in futures.items():
+            if future.done():
+                results[name] = future.result()
+            else:
+                # the thread of a hung device is left behind, its result is not waited for
+                future.cancel()
+                results[name] = LightbullDeviceResult(name)
+                results[name].error = LightbullTimeoutError("Controller did not answer within the timeout")
+        if measure:
+            with self._lock:
+                for name, result in results.items():
+                    if result.error is None:
+                        previous = self._latency.get(name)
+                        half = result.duration / 2
+                        self._latency[name] = half if previous is None else previous + _SMOOTHING * (half - previous)
+        return LightbullFleetResult(results)
+
+    def _call(self, name, client, func, kwargs, send_time):
+        result = LightbullDeviceResult(name)
+        try:
+            if self._timeout is None:
+                self._send(result, client, func, kwargs, send_time)
+            else:
+                with client.deadline(self._timeout + (0 if send_time is None else send_time - time.monotonic())):
+                    self._send(result, client, func, kwargs, send_time)
+        except (LightbullError, OSError) as e:
+            result.error = e
+        return result
+
+    def _send(self, result, client, func, kwargs, send_time):
+        if send_time is not None:
+            # authenticate before, so that it does not delay the call
+            client._reauth_if_required(getattr(client._local, "deadline", None))
+            _sleep_until(send_time)
+
+        result.sent = time.monotonic()
+        try:
+            result.value = func(client, **kwargs)
+        finally:
+            result.duration = time.monotonic() - result.sent
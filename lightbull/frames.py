@@ -0,0 +1,254 @@
+import collections
+import json
+import threading
+import time
+
+from .error import LightbullError
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class LightbullFrame:
+    # LED colors of one simulator frame: data is a (LEDs, 3) uint8 array of all parts, parts maps the part names to
+    # views of it. Frames of a stream reuse their arrays, see copy().
+    __slots__ = ("sequence", "timestamp", "data", "parts")
+
+    def __init__(self, layout):
+        self.sequence = None
+        self.timestamp = None
+        self.data = np.zeros((sum(size for _, size in layout), 3), dtype=np.uint8)
+        self.parts = {}
+        offset = 0
+        for part, size in layout:
+            self.parts[part] = self.data[offset : offset + size]
+            offset += size
+
+    def copy(self):
+        frame = LightbullFrame.__new__(LightbullFrame)
+        frame.sequence = self.sequence
+        frame.timestamp = self.timestamp
+        frame.data = self.data.copy()
+        frame.parts = {}
+        offset = 0
+        for part, view in self.parts.items():
+            frame.parts[part] = frame.data[offset : offset + len(view)]
+            offset += len(view)
+        return frame
+
+    def __repr__(self):
+        return "<LightbullFrame {}: {} LEDs>".format(self.sequence, len(self.data))
+
+
+def frame_layout(parts):
+    # (part, number of LEDs) for the parts of a simulator response
+    return tuple((part, _led_count(leds)) for part, leds in parts.items())
+
+
+def frame_layout_of(frame):
+    return tuple((part, len(view)) for part, view in frame.parts.items())
+
+
+def decode_frame(parts, frame):
+    # decodes the parts of a simulator response into the arrays of frame, which must have the same layout
+    values = list(parts.values())
+    if all(isinstance(leds, str) for leds in values):
+        # hex strings ("ff0000ff0000...", "#" separators allowed) of all parts in one go
+        hex = "".join(values)
+        if "#" in hex:
+            hex = hex.replace("#", "")
+        frame.data.reshape(-1)[:] = np.frombuffer(bytes.fromhex(hex), dtype=np.uint8)
+        return
+
+    for (part, view), leds in zip(frame.parts.items(), values):
+        if isinstance(leds, str):
+            view.reshape(-1)[:] = np.frombuffer(bytes.fromhex(leds.replace("#", "")), dtype=np.uint8)
+        elif leds and isinstance(leds[0], str):
+            view.reshape(-1)[:] = np.frombuffer(bytes.fromhex("".join(leds).replace("#", "")), dtype=np.uint8)
+        elif leds and isinstance(leds[0], dict):
+            view[:] = [(led["r"], led["g"], led["b"]) for led in leds]
+        else:
+            view[:] = leds
+
+
+def _led_count(leds):
+    if isinstance(leds, str):
+        return (len(leds) - leds.count("#")) // 6
+    return len(leds)
+
+
+class LightbullFrameStream:
+    # Polls the simulator in a background thread over the keep-alive connection of the client and decodes frames
+    # into preallocated arrays. Polling slows down to idle_fps while nothing changes. A consumer always gets the
+    # newest frame, frames it was too slow for are dropped. A frame is valid until the next one is requested.
+
+    def __init__(self, lightbull, fps=30, idle_fps=2):
+        if np is None:
+            raise LightbullError("Frame streams require numpy (pip install lightbull[numpy])")
+
+        self._lightbull = lightbull
+        self._interval = 1 / fps
+        self._idle_interval = max(self._interval, 1 / idle_fps if idle_fps else self._interval)
+
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+
+        # triple buffering: newest frame, frame of the consumer and the one being decoded
+        self._layout = None
+        self._free = []
+        self._latest = None
+        self._current = None
+        self._body = None
+        self._sequence = 0
+
+        self._received = 0
+        self._unchanged = 0
+        self._dropped = 0
+        self._delivered = 0
+        self._failed = 0
+        self._poll_times = collections.deque()
+        self._delivery_times = collections.deque()
+        self.last_error = None
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return self
+            self._running = True
+
+        self._thread = threading.Thread(target=self._run, name="lightbull-frames", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def __iter__(self):
+        while True:
+            frame = self.get()
+            if frame is None:
+                return
+            yield frame
+
+    def get(self, timeout=None):
+        # waits for a frame newer than the last one, returns None after the timeout or when the stream is stopped
+        end = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._latest is None:
+                if not self._running:
+                    return None
+                remaining = None if end is None else end - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+
+            self._release(self._current)
+            self._current, self._latest = self._latest, None
+            self._delivered += 1
+            self._count(self._delivery_times)
+            return self._current
+
+    def stats(self):
+        with self._cond:
+            return {
+                "received": self._received,
+                "unchanged": self._unchanged,
+                "dropped": self._dropped,
+                "delivered": self._delivered,
+                "failed": self._failed,
+                "poll_fps": self._rate(self._poll_times),
+                "fps": self._rate(self._delivery_times),
+            }
+
+    def _run(self):
+        interval = self._interval
+        while True:
+            start = time.monotonic()
+            try:
+                body = self._lightbull._request("GET", "simulator")
+            except (LightbullError, OSError) as e:
+                with self._cond:
+                    self._failed += 1
+                    self.last_error = e
+                interval = self._idle_interval
+            else:
+                if body == self._body:
+                    # nothing changed, poll less often until something does
+                    with self._cond:
+                        self._received += 1
+                        self._unchanged += 1
+                        self._count(self._poll_times)
+                    interval = min(interval * 1.5, self._idle_interval)
+                else:
+                    self._body = body
+                    interval = self._interval
+                    try:
+                        self._publish(json.loads(body))
+                    except (ValueError, KeyError, TypeError, AttributeError) as e:
+                        # unexpected data, e.g. a part with an invalid color
+                        with self._cond:
+                            self._failed += 1
+                            self.last_error = e
+
+            with self._cond:
+                end = start + interval
+                while self._running and time.monotonic() < end:
+                    self._cond.wait(end - time.monotonic())
+                if not self._running:
+                    return
+
+    def _publish(self, data):
+        parts = data.get("parts", data)
+        layout = frame_layout(parts)
+
+        with self._cond:
+            if layout != self._layout:
+                # parts changed, buffers of the old layout are not reused
+                self._layout = layout
+                self._free = []
+            frame = self._free.pop() if self._free else LightbullFrame(layout)
+
+        decode_frame(parts, frame)
+
+        with self._cond:
+            self._sequence += 1
+            frame.sequence = self._sequence
+            frame.timestamp = time.time()
+            self._received += 1
+            self._count(self._poll_times)
+            if self._latest is not None:
+                self._dropped += 1
+                self._release(self._latest)
+            self._latest = frame
+            self._cond.notify_all()
+
+    def _release(self, frame):
+        if frame is not None and len(self._free) < 2 and frame_layout_of(frame) == self._layout:
+            self._free.append(frame)
+
+    def _count(self, times):
+        now = time.monotonic()
+        times.append(now)
+        while times[0] < now - 2:
+            times.popleft()
+
+    def _rate(self, times):
+        # events per second within the last two seconds
+        if len(times) < 2 or times[-1] < time.monotonic() - 2:
+            return 0
+        return (len(times) - 1) / (times[-1] - times[0]) if times[-1] > times[0] else 0
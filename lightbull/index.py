@@ -0,0 +1,252 @@
+import concurrent.futures
+import json
+import os
+import pathlib
+import tempfile
+import threading
+
+from .error import LightbullError
+from .shows import _visual_ids
+
+DEFAULT_INDEX = pathlib.Path.home() / ".cache" / "lightbull" / "index.json"
+
+
+def load_index(file, api_url):
+    try:
+        with open(file) as f:
+            shows = json.load(f).get(api_url)
+    except (OSError, ValueError, AttributeError):
+        return {}
+    return shows if isinstance(shows, dict) else {}
+
+
+def save_index(file, api_url, shows):
+    file = pathlib.Path(file)
+    file.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+
+    # keep the indexes of other controllers
+    indexes = {}
+    try:
+        with open(file) as f:
+            indexes = json.load(f)
+        if not isinstance(indexes, dict):
+            indexes = {}
+    except (OSError, ValueError):
+        pass
+    indexes[api_url] = shows
+
+    fd, tmp = tempfile.mkstemp(dir=file.parent, prefix=".index")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(indexes, f)
+        os.replace(tmp, file)
+    except OSError:
+        os.unlink(tmp)
+        raise
+
+
+def _parts(parts):
+    # list of parts or a comma separated string
+    if isinstance(parts, str):
+        parts = parts.split(",")
+    return sorted(part.strip() for part in parts)
+
+
+def _by_name(entries, name, kind):
+    # exact name, or the only one with the name in another case
+    matches = [entry for entry in entries if entry["name"] == name]
+    if not matches:
+        matches = [entry for entry in entries if entry["name"].casefold() == name.casefold()]
+    if not matches:
+        raise KeyError("No {} named '{}'".format(kind, name))
+    if len(matches) > 1:
+        raise LightbullError("Several {}s are named '{}'".format(kind, name))
+    return matches[0]
+
+
+class LightbullIndex:
+    # Names of shows and visuals, parts and effects of groups and keys of parameters with their IDs, optionally stored
+    # in a file per controller. Before the first lookup and when a name is not found, the index is refreshed with the
+    # list of shows, only visuals of shows whose visuals changed (or that were changed by this client) are fetched.
+    # Changes of other clients within a visual are only noticed with refresh(full=True).
+
+    def __init__(self, lightbull, file=None):
+        self._lightbull = lightbull
+        self._file = file
+        self._lock = threading.RLock()
+        # loaded with the first use
+        self._shows = None
+        self._fresh = False
+
+        # requests of the last refresh
+        self.requests = 0
+
+    def refresh(self, full=False, max_workers=8):
+        with self._lock:
+            self._load()
+            shows = self._lightbull.shows.get_shows()
+            changed = [
+                show
+                for show in shows
+                if full or show["id"] not in self._shows or self._shows[show["id"]]["visualIds"] != _visual_ids(show)
+            ]
+
+            with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {
+                    show["id"]: [
+                        executor.submit(self._lightbull.shows._fetch, "visuals", visual_id)
+                        for visual_id in _visual_ids(show)
+                    ]
+                    for show in changed
+                }
+                visuals = {
+                    show_id: [future.result() for future in show_futures] for show_id, show_futures in futures.items()
+                }
+
+            index = {}
+            for show in shows:
+                if show["id"] in visuals:
+                    index[show["id"]] = {
+                        "name": show["name"],
+                        "visualIds": _visual_ids(show),
+                        "visuals": [self._index_visual(visual) for visual in visuals[show["id"]]],
+                    }
+                else:
+                    index[show["id"]] = dict(self._shows[show["id"]], name=show["name"])
+
+            self.requests = 1 + sum(len(show_visuals) for show_visuals in visuals.values())
+            modified = index != self._shows
+            self._shows = index
+            self._fresh = True
+            if modified:
+                self._save()
+            return len(changed)
+
+    def clear(self):
+        with self._lock:
+            self._shows = {}
+            self._fresh = False
+
+    def show_id(self, show):
+        return self._lookup(lambda: self._show(show)[0])
+
+    def visual_id(self, show, visual):
+        return self._lookup(lambda: self._visual(show, visual)["id"], show)
+
+    def group_id(self, show, visual, parts=None, effect=None):
+        return self._lookup(lambda: self._group(show, visual, parts, effect)["id"], show)
+
+    def parameter_id(self, show, visual, key, parts=None, effect=None):
+        # parts and effect select the group if several groups of the visual have a parameter with the key
+        def find():
+            groups = [group for group in self._groups(show, visual, parts, effect) if key in group["parameters"]]
+            if not groups:
+                raise KeyError("No parameter '{}' in visual '{}'".format(key, visual))
+            if len(groups) > 1:
+                raise LightbullError(
+                    "Several groups have a parameter '{}', select the group by parts or effect".format(key)
+                )
+            return groups[0]["parameters"][key]
+
+        return self._lookup(find, show)
+
+    # Changes by this client: the show is fetched again with the next refresh, also by other processes
+
+    def invalidate_show(self, show_id, visuals=True):
+        # with visuals=False only the name may have changed, which the list of shows contains anyway
+        with self._lock:
+            self._load()
+            if visuals and self._shows.get(show_id, {}).get("visualIds") is not None:
+                self._shows[show_id] = dict(self._shows[show_id], visualIds=None)
+                self._save()
+            self._fresh = False
+
+    def invalidate_visual(self, visual_id):
+        with self._lock:
+            self._load()
+            for show_id, show in self._shows.items():
+                if any(visual["id"] == visual_id for visual in show["visuals"]):
+                    self.invalidate_show(show_id)
+            self._fresh = False
+
+    def invalidate_group(self, group_id):
+        with self._lock:
+            self._load()
+            for show_id, show in self._shows.items():
+                if any(group["id"] == group_id for visual in show["visuals"] for group in visual["groups"]):
+                    self.invalidate_show(show_id)
+            self._fresh = False
+
+    def _lookup(self, find, show=None):
+        with self._lock:
+            if not self._fresh:
+                self.refresh()
+            try:
+                return find()
+            except KeyError:
+                pass
+
+            # the name may be new, or the visuals of the show were changed by another client
+            if show is not None:
+                try:
+                    self.invalidate_show(self._show(show)[0])
+                except KeyError:
+                    pass
+            self.refresh()
+            return self._find(find)
+
+    def _save(self):
+        if self._file is not None:
+            try:
+                save_index(self._file, self._lightbull._api_url, self._shows)
+            except OSError:
+                pass
+
+    def _load(self):
+        if self._shows is None:
+            self._shows = load_index(self._file, self._lightbull._api_url) if self._file is not None else {}
+
+    def _find(self, find):
+        try:
+            return find()
+        except KeyError as e:
+            raise LightbullError(e.args[0]) from None
+
+    def _show(self, name):
+        shows = [dict(show, id=show_id) for show_id, show in self._shows.items()]
+        show = _by_name(shows, name, "show")
+        return show["id"], show
+
+    def _visual(self, show, visual):
+        return _by_name(self._show(show)[1]["visuals"], visual, "visual")
+
+    def _groups(self, show, visual, parts=None, effect=None):
+        groups = self._visual(show, visual)["groups"]
+        if parts is not None:
+            groups = [group for group in groups if group["parts"] == _parts(parts)]
+        if effect is not None:
+            groups = [group for group in groups if group["effect"] == effect]
+        return groups
+
+    def _group(self, show, visual, parts=None, effect=None):
+        groups = self._groups(show, visual, parts, effect)
+        if not groups:
+            raise KeyError("No matching group in visual '{}'".format(visual))
+        if len(groups) > 1:
+            raise LightbullError("Several groups in visual '{}' match, select by parts and effect".format(visual))
+        return groups[0]
+
+    def _index_visual(self, visual):
+        return {
+            "id": visual["id"],
+            "name": visual["name"],
+            "groups": [
+                {
+                    "id": group["id"],
+                    "parts": _parts(group["parts"]),
+                    "effect": group["effect"]["type"],
+                    "parameters": {parameter["key"]: parameter["id"] for parameter in group["effect"]["parameters"]},
+                }
+                for group in visual.get("groups") or []
+            ],
+        }
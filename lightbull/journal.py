@@ -0,0 +1,434 @@
+import concurrent.futures
+import json
+import os
+import pathlib
+import tempfile
+import threading
+import time
+import uuid
+
+from .error import LightbullCircuitOpenError, LightbullError, LightbullHTTPError
+from .lightbull import RETRY_STATUSES
+
+# prefix of the IDs of entities that were created while the controller was unreachable
+TEMPORARY_PREFIX = "tmp:"
+
+# mutations of LightbullShows: ID argument of the entity it changes, or the type of entity it creates
+UPDATES = {
+    "update_show": ("shows", "show_id"),
+    "delete_show": ("shows", "show_id"),
+    "update_visual": ("visuals", "visual_id"),
+    "delete_visual": ("visuals", "visual_id"),
+    "update_group": ("groups", "group_id"),
+    "delete_group": ("groups", "group_id"),
+    "update_parameter": ("parameters", "parameter_id"),
+}
+CREATES = {"new_show": "shows", "new_visual": "visuals", "new_group": "groups"}
+CURRENT = {"update_current", "blank"}
+# arguments that are IDs, only these can be temporary IDs
+ID_ARGUMENTS = {"show_id", "visual_id", "group_id", "parameter_id"}
+
+
+def _unreachable(error):
+    # connection problems and timeouts are OSErrors, and a rebooting controller may answer 502, 503 or 504 for a while.
+    # Other errors are answers of the controller.
+    if isinstance(error, LightbullHTTPError):
+        return error.status in RETRY_STATUSES
+    return isinstance(error, (OSError, LightbullCircuitOpenError))
+
+
+def _key(entry):
+    if entry["op"] in UPDATES:
+        entity_type, argument = UPDATES[entry["op"]]
+        return entity_type, entry["args"][argument]
+    if entry["op"] in CURRENT:
+        return ("current",)
+    return None
+
+
+def _references(entry):
+    return {
+        value
+        for argument, value in entry["args"].items()
+        if argument in ID_ARGUMENTS and isinstance(value, str) and value.startswith(TEMPORARY_PREFIX)
+    }
+
+
+def collapse(entries):
+    # Removes mutations that are superseded by later ones: entities created and deleted again (with everything
+    # referencing them), updates before a deletion and updates of the same entity, which are merged into the last one.
+    # Only the last change of the current show is kept, with the show of an earlier one if it only selects a visual.
+    dead = set()
+    for entry in entries:
+        if entry["op"].startswith("delete_") and _key(entry)[1].startswith(TEMPORARY_PREFIX):
+            dead.add(_key(entry)[1])
+    for entry in entries:
+        if entry["op"] in CREATES and _references(entry) & dead:
+            dead.add(entry["id"])
+    entries = [entry for entry in entries if not (_references(entry) | {entry.get("id")}) & dead]
+
+    result = []
+    kept = {}
+    deleted = set()
+    current_done = False
+    for entry in reversed(entries):
+        key = _key(entry)
+        if key is None:
+            result.append(entry)
+            continue
+
+        if key == ("current",):
+            later = kept.get(key)
+            if later is None:
+                kept[key] = later = dict(entry, args=dict(entry["args"]))
+                result.append(later)
+            elif not current_done and entry["op"] == "update_current":
+                # the later call only selected a visual of the show selected by this one
+                later["args"]["show_id"] = entry["args"].get("show_id")
+            current_done = entry["op"] == "blank" or bool(entry["args"].get("show_id")) or current_done
+            continue
+
+        if key in deleted:
+            # updates before a deletion
+            continue
+        if entry["op"].startswith("delete_"):
+            deleted.add(key)
+            result.append(entry)
+            continue
+
+        later = kept.get(key)
+        if later is not None:
+            for argument, value in entry["args"].items():
+                if later["args"].get(argument) is None:
+                    later["args"][argument] = value
+            continue
+        entry = dict(entry, args=dict(entry["args"]))
+        kept[key] = entry
+        result.append(entry)
+
+    result.reverse()
+    return result
+
+
+class LightbullReplay:
+    def __init__(self, entries, collapsed, replayed, failed, remaining, duration, ids):
+        self.entries = entries
+        self.collapsed = collapsed
+        self.replayed = replayed
+        # (entry, error) of mutations the controller refused, they are not replayed again
+        self.failed = failed
+        self.remaining = remaining
+        self.duration = duration
+        # real IDs of the entities created by the replay, by their temporary IDs
+        self.ids = ids
+
+    @property
+    def throughput(self):
+        # replayed mutations per second
+        return self.replayed / self.duration if self.duration else None
+
+    def __repr__(self):
+        return "<LightbullReplay: {} of {} entries ({} collapsed), {} failed, {} remaining, {:.1f}/s>".format(
+            self.replayed,
+            self.entries,
+            self.collapsed,
+            len(self.failed),
+            self.remaining,
+            self.throughput or 0,
+        )
+
+
+class LightbullJournal:
+    # Mutations of LightbullShows that keep working while the controller is unreachable. A call is sent directly if
+    # nothing is pending, otherwise (or if the controller is unreachable) it is appended to the journal file and sent
+    # by replay() later, in order. Entities created meanwhile get temporary IDs, which can be used in later calls
+    # and are replaced by the real IDs during the replay, see resolve().
+
+    def __init__(self, lightbull, path, max_workers=8, fsync=True):
+        self._lightbull = lightbull
+        self._path = pathlib.Path(path)
+        self._max_workers = max_workers
+        self._fsync = fsync
+
+        self._lock = threading.RLock()
+        self._replay_lock = threading.Lock()
+        self._entries = []
+        # real IDs by temporary IDs, only of the ones that pending calls still refer to after a replay
+        self._ids = {}
+        # sequence number of the next entry, done markers refer to entries by it
+        self._next = 0
+        self._thread = None
+        self._stop = threading.Event()
+        self.last_replay = None
+        self.last_error = None
+        self._load()
+
+    @property
+    def pending(self):
+        with self._lock:
+            return len(self._entries)
+
+    def resolve(self, entity_id):
+        # real ID of an entity created with a temporary ID, once it was replayed and until the next replay
+        with self._lock:
+            return self._resolve(entity_id)
+
+    def new_show(self, name, favorite=False):
+        return self._call("new_show", {"name": name, "favorite": favorite})
+
+    def update_show(self, show_id, name=None, favorite=None):
+        return self._call("update_show", {"show_id": show_id, "name": name, "favorite": favorite})
+
+    def delete_show(self, show_id):
+        return self._call("delete_show", {"show_id": show_id})
+
+    def new_visual(self, show_id, name):
+        return self._call("new_visual", {"show_id": show_id, "name": name})
+
+    def update_visual(self, visual_id, name=None):
+        return self._call("update_visual", {"visual_id": visual_id, "name": name})
+
+    def delete_visual(self, visual_id):
+        return self._call("delete_visual", {"visual_id": visual_id})
+
+    def new_group(self, visual_id, parts, effect):
+        return self._call("new_group", {"visual_id": visual_id, "parts": parts, "effect": effect})
+
+    def update_group(self, group_id, parts=None, effect=None):
+        return self._call("update_group", {"group_id": group_id, "parts": parts, "effect": effect})
+
+    def delete_group(self, group_id):
+        return self._call("delete_group", {"group_id": group_id})
+
+    def update_parameter(self, parameter_id, current=None, default=None):
+        return self._call("update_parameter", {"parameter_id": parameter_id, "current": current, "default": default})
+
+    def update_current(self, show_id=None, visual_id=None):
+        return self._call("update_current", {"show_id": show_id, "visual_id": visual_id})
+
+    def blank(self):
+        return self._call("blank", {})
+
+    def replay(self):
+        # sends the pending mutations until none is left or the controller is unreachable again
+        with self._replay_lock:
+            start = time.monotonic()
+            count = 0
+            collapsed = 0
+            replayed = 0
+            failed = []
+            created = {}
+            try:
+                # mutations may be added while the journal is replayed
+                while self.pending:
+                    with self._lock:
+                        before = len(self._entries)
+                        self._entries = collapse(self._entries)
+                        count += before
+                        collapsed += before - len(self._entries)
+                        entries = list(self._entries)
+                        # the collapsed journal is written once per pass, then only markers of done entries are
+                        # appended
+                        self._rewrite()
+
+                    for batch in self._batches(entries):
+                        results = self._run_batch(batch)
+                        unreachable = None
+                        done = set()
+                        with self._lock:
+                            for entry, error in results:
+                                if error is not None and _unreachable(error):
+                                    unreachable = error
+                                    continue
+                                if error is not None:
+                                    failed.append((entry, error))
+                                else:
+                                    replayed += 1
+                                done.add(entry["n"])
+                            ids = {
+                                entry["id"]: self._ids[entry["id"]] for entry in batch if entry.get("id") in self._ids
+                            }
+                            created.update(ids)
+                            if done:
+                                self._append({"done": sorted(done), "ids": ids})
+                            if len(done) == len(batch):
+                                # batches are replayed from the start of the journal
+                                del self._entries[: len(batch)]
+                            else:
+                                self._entries = [entry for entry in self._entries if entry["n"] not in done]
+                        if unreachable is not None:
+                            raise unreachable
+            except (OSError, LightbullError) as e:
+                self.last_error = e
+
+            with self._lock:
+                if count:
+                    self._prune_ids()
+                    # without the markers
+                    try:
+                        self._rewrite()
+                    except OSError as e:
+                        self.last_error = e
+                self.last_replay = LightbullReplay(
+                    count, collapsed, replayed, failed, len(self._entries), time.monotonic() - start, created
+                )
+                return self.last_replay
+
+    def start(self, interval=5):
+        # replays in the background every interval seconds while something is pending
+        if self._thread is not None:
+            return self
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,), name="lightbull-journal", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _run(self, interval):
+        while not self._stop.wait(interval):
+            if self.pending:
+                self.replay()
+
+    def _call(self, op, args):
+        with self._lock:
+            # temporary IDs of entities that were already replayed
+            args = self._resolve_args(args)
+            queued = bool(self._entries)
+        if not queued:
+            try:
+                return self._execute({"op": op, "args": args})
+            except (OSError, LightbullError) as e:
+                if not _unreachable(e):
+                    raise
+                self.last_error = e
+
+        result = None
+        if op in CREATES:
+            result = dict(args, id=TEMPORARY_PREFIX + str(uuid.uuid4()))
+        with self._lock:
+            entry = {"n": self._next, "op": op, "args": args}
+            self._next += 1
+            if op in CREATES:
+                entry["id"] = result["id"]
+            self._entries.append(entry)
+            self._append(entry)
+        return result
+
+    def _execute(self, entry):
+        with self._lock:
+            args = self._resolve_args(entry["args"])
+        result = getattr(self._lightbull.shows, entry["op"])(**args)
+        if "id" in entry:
+            with self._lock:
+                self._ids[entry["id"]] = result["id"]
+        return result
+
+    def _resolve(self, entity_id):
+        # with the lock held
+        if entity_id in self._ids:
+            return self._ids[entity_id]
+        if self.last_replay is not None:
+            return self.last_replay.ids.get(entity_id, entity_id)
+        return entity_id
+
+    def _resolve_args(self, args):
+        # with the lock held
+        return {
+            argument: self._resolve(value) if argument in ID_ARGUMENTS and isinstance(value, str) else value
+            for argument, value in args.items()
+        }
+
+    def _prune_ids(self):
+        # with the lock held, IDs of replayed entities are only required as long as pending calls refer to them
+        referenced = set()
+        for entry in self._entries:
+            referenced |= _references(entry)
+        self._ids = {entity_id: real_id for entity_id, real_id in self._ids.items() if entity_id in referenced}
+
+    def _batches(self, entries):
+        # consecutive updates of a type are sent in parallel (collapsed, so of different entities), everything else
+        # alone and in order
+        batch = []
+        for entry in entries:
+            parallel = entry["op"] in UPDATES and not entry["op"].startswith("delete_")
+            if batch and not (parallel and entry["op"] == batch[0]["op"]):
+                yield batch
+                batch = []
+            if parallel:
+                batch.append(entry)
+            else:
+                yield [entry]
+        if batch:
+            yield batch
+
+    def _run_batch(self, batch):
+        def execute(entry):
+            try:
+                self._execute(entry)
+                return entry, None
+            except (OSError, LightbullError) as e:
+                return entry, e
+
+        if len(batch) == 1:
+            return [execute(batch[0])]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            return list(executor.map(execute, batch))
+
+    # Journal file: JSON lines with the IDs of entities created by earlier replays, the pending mutations and markers
+    # of the mutations that were replayed since (with the IDs of the entities they created)
+
+    def _load(self):
+        try:
+            with open(self._path) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # incomplete last line of a crashed process
+                        continue
+                    self._ids.update(record.get("ids", {}))
+                    if "done" in record:
+                        done = set(record["done"])
+                        self._entries = [entry for entry in self._entries if entry["n"] not in done]
+                    elif "op" in record:
+                        self._entries.append(record)
+                        self._next = max(self._next, record["n"] + 1)
+        except FileNotFoundError:
+            pass
+        self._prune_ids()
+
+    def _append(self, record):
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self._path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            if self._fsync:
+                os.fsync(f.fileno())
+
+    def _rewrite(self):
+        # the journal is replaced atomically, so that it never contains half of a replay
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self._path.parent, prefix=".journal")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(json.dumps({"ids": self._ids}) + "\n")
+                for entry in self._entries:
+                    f.write(json.dumps(entry) + "\n")
+                f.flush()
+                if self._fsync:
+                    os.fsync(f.fileno())
+            os.replace(tmp, self._path)
+        except OSError:
+            os.unlink(tmp)
+            raise
@@ -1,101 +1,276 @@
-import base64
-import configparser
-import datetime
-from importlib.resources import path
+import contextlib
 import json
-import pathlib
-import requests
+import random
+import threading
+import time
 
+from .base import LightbullBase, _parse_json
+from .breaker import LightbullCircuitBreaker
+from .cache import LightbullCache
 from .config import LightbullConfig
-from .error import LightbullError
+from .error import LightbullError, LightbullHTTPError, LightbullTimeoutError
+from .index import DEFAULT_INDEX, LightbullIndex
+from .models import LightbullModels
 from .shows import LightbullShows
 from .system import LightbullSystem
+from .token import DEFAULT_TOKEN_CACHE, load_token, save_token
+from .transport import make_transport
 
+# only requests that can be repeated safely are retried
+IDEMPOTENT_METHODS = {"GET", "PUT", "DELETE"}
+RETRY_STATUSES = {502, 503, 504}
+BACKOFF_MAX = 1
 
-class Lightbull:
-    def __init__(self, api_url=None, password=None):
+
+class Lightbull(LightbullBase):
+    def __init__(
+        self,
+        api_url=None,
+        password=None,
+        pool_size=10,
+        keep_alive=True,
+        timeout=None,
+        cache_ttl=None,
+        cache_size=1024,
+        token_cache=False,
+        transport=None,
+        deadline=None,
+        retries=2,
+        backoff=0.05,
+        circuit_breaker=True,
+        index_cache=False,
+    ):
+        # the transport is selected by the URL (see make_transport) unless one is given
+        if transport is not None and api_url is None:
+            api_url = transport.url
         self._prepare_auth(api_url, password)
-        self._auth()
+        self._transport = transport or make_transport(self._api_url, pool_size, keep_alive, timeout)
+
+        # default time for a call including retries and authentication, see also deadline()
+        self._deadline = deadline
+        self._local = threading.local()
+        self._retries = retries
+        self._backoff = backoff
+        self._breaker = LightbullCircuitBreaker() if circuit_breaker is True else circuit_breaker or None
+        self._retried = 0
+        self._timeouts = 0
+
+        # JWT cache file, so that short-lived processes do not need to authenticate every time
+        self._token_cache = DEFAULT_TOKEN_CACHE if token_cache is True else token_cache or None
+        self._auth_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._refresh_thread = None
+        if not self._load_cached_token():
+            self._auth(self._default_deadline())
+
+        # entity cache, disabled without TTL
+        self.cache = LightbullCache(cache_ttl, cache_size) if cache_ttl else None
 
         self.config = LightbullConfig(self)
         self.shows = LightbullShows(self)
+        # names of shows, visuals and parameters, stored in a file per controller with index_cache
+        self.index = LightbullIndex(self, DEFAULT_INDEX if index_cache is True else index_cache or None)
         self.system = LightbullSystem(self)
+        self.models = LightbullModels(self)
 
     def simulator(self):
         return self._send_get("simulator")
 
-    def _prepare_auth(self, api_url, password):
-        if api_url is not None and password is not None:
-            # everything there, let's use it
-            self._api_url = api_url
-            self._password = password
-        else:
-            # try to read config file
-            try:
-                config = configparser.ConfigParser()
-                config.read(pathlib.Path.home() / ".lightbull")
-                self._api_url = config["lightbull"]["api_url"]
-                self._password = config["lightbull"]["password"]
-            except KeyError:
-                raise LightbullError("Cannot retrieve API URL and password from config file") from None
-
-    def _auth(self):
+    def simulator_stream(self, fps=30, idle_fps=2):
+        # frames of the simulator as NumPy arrays, see LightbullFrameStream
+        from .frames import LightbullFrameStream
+
+        return LightbullFrameStream(self, fps, idle_fps)
+
+    def watch(self, interval=0.1, idle_interval=2):
+        # changes of the current show and visual and of parameters, see LightbullWatcher
+        from .watch import LightbullWatcher
+
+        return LightbullWatcher(self, interval, idle_interval)
+
+    @contextlib.contextmanager
+    def deadline(self, seconds):
+        # calls of this thread within the block must be done in seconds, including retries and authentication
+        previous = getattr(self._local, "deadline", None)
+        deadline = time.monotonic() + seconds
+        self._local.deadline = deadline if previous is None else min(previous, deadline)
+        try:
+            yield
+        finally:
+            self._local.deadline = previous
+
+    def stats(self):
+        return {
+            "retries": self._retried,
+            "timeouts": self._timeouts,
+            "circuit": self._breaker.stats() if self._breaker is not None else None,
+        }
+
+    def close(self):
+        self._transport.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _auth(self, deadline=None):
         # get jwt
-        r = requests.post(self._build_url("auth"), json={"password": self._password})
-        if r.status_code != 200:
-            raise LightbullError("Authentication failed")
+        status, body = self._send("POST", ("auth",), {"password": self._password}, None, deadline)
+        if status != 200:
+            raise LightbullHTTPError("Authentication failed", status)
 
-        # store expiry date and JWT
-        jwt = r.json()["jwt"]
-        jwt_data = json.loads(base64.b64decode(jwt.split(".")[1]))
-        self._jwt_expiry = datetime.datetime.fromtimestamp(jwt_data["exp"])
-        self._jwt = jwt
+        self._store_jwt(json.loads(body)["jwt"])
 
-    def _reauth_if_required(self):
-        if datetime.datetime.now() > self._jwt_expiry - datetime.timedelta(minutes=5):
-            self._auth()
+        if self._token_cache is not None:
+            try:
+                save_token(self._token_cache, self._api_url, self._jwt)
+            except OSError:
+                pass
 
-    def _send_get(self, *parts):
-        self._reauth_if_required()
-        r = requests.get(self._build_url(*parts), headers=self._get_headers())
-        if not r.ok:
-            raise LightbullError(f"API Error: HTTP {r.status_code} - {r.text}")
+    def _load_cached_token(self):
+        if self._token_cache is None:
+            return False
+
+        jwt = load_token(self._token_cache, self._api_url)
+        if jwt is None:
+            return False
 
         try:
-            return r.json()
-        except:
-            return None
+            self._store_jwt(jwt)
+        except (ValueError, IndexError, KeyError):
+            return False
 
-    def _send_post(self, *parts, data={}):
-        self._reauth_if_required()
-        r = requests.post(self._build_url(*parts), headers=self._get_headers(), json=data)
-        if not r.ok:
-            raise LightbullError(f"API Error: HTTP {r.status_code} - {r.text}")
+        return not self._jwt_expired()
 
+    def _reauth(self, jwt, deadline=None):
+        # single flight: threads that waited for the lock use the token another thread got meanwhile
+        if not self._auth_lock.acquire(timeout=-1 if deadline is None else max(0, deadline - time.monotonic())):
+            raise LightbullTimeoutError("Deadline exceeded while waiting for authentication")
         try:
-            return r.json()
-        except:
-            return None
+            if self._jwt == jwt:
+                self._auth(deadline)
+        finally:
+            self._auth_lock.release()
 
-    def _send_put(self, *parts, data={}):
-        self._reauth_if_required()
-        r = requests.put(self._build_url(*parts), headers=self._get_headers(), json=data)
-        if not r.ok:
-            raise LightbullError(f"API Error: HTTP {r.status_code} - {r.text}")
+    def _reauth_if_required(self, deadline=None):
+        if not self._reauth_required():
+            return
 
+        if self._jwt_expired():
+            self._reauth(self._jwt, deadline)
+        else:
+            # token is still valid for a while, get a new one without blocking the request
+            with self._refresh_lock:
+                if self._refresh_thread is None or not self._refresh_thread.is_alive():
+                    self._refresh_thread = threading.Thread(
+                        target=self._refresh, args=(self._jwt,), name="lightbull-auth", daemon=True
+                    )
+                    self._refresh_thread.start()
+
+    def _refresh(self, jwt):
         try:
-            return r.json()
-        except:
-            return None
+            self._reauth(jwt, self._default_deadline())
+        except (LightbullError, OSError):
+            # requests authenticate themselves once the token is expired
+            pass
 
-    def _send_delete(self, *parts):
-        self._reauth_if_required()
-        r = requests.delete(self._build_url(*parts), headers=self._get_headers())
-        if not r.ok:
-            raise LightbullError(f"API Error: HTTP {r.status_code} - {r.text}")
+    def _send(self, method, parts, data, headers, deadline=None, attempt=0):
+        path = self._build_path(*parts)
+        if data is not None:
+            data = json.dumps(data).encode()
+            headers = dict(headers or {})
+            headers["Content-Type"] = "application/json"
 
-    def _build_url(self, *parts):
-        return "/".join([self._api_url, "api", *parts])
+        timeout = None
+        if deadline is not None:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                raise LightbullTimeoutError("Deadline exceeded")
 
-    def _get_headers(self):
-        return {"Authorization": f"Bearer {self._jwt}"}
+        if not self._observers:
+            return self._transport.request(method, path, headers, data, timeout)
+
+        start = time.perf_counter()
+        try:
+            status, body = self._transport.request(method, path, headers, data, timeout)
+        except Exception:
+            self._notify(method, parts, None, 0, time.perf_counter() - start, attempt)
+            raise
+        self._notify(method, parts, status, len(body), time.perf_counter() - start, attempt)
+        return status, body
+
+    def _default_deadline(self):
+        return None if self._deadline is None else time.monotonic() + self._deadline
+
+    def _request(self, method, *parts, data=None):
+        deadline = getattr(self._local, "deadline", None)
+        if deadline is None:
+            deadline = self._default_deadline()
+        retries = self._retries if method in IDEMPOTENT_METHODS else 0
+
+        attempt = 0
+        while True:
+            if self._breaker is not None:
+                self._breaker.acquire()
+
+            error = None
+            status = None
+            try:
+                status, body = self._attempt(method, parts, data, deadline, attempt)
+            except OSError as e:
+                # connection problems and timeouts, including exceeded deadlines
+                error = e
+            finally:
+                # any other exception, e.g. a failed authentication, is a failure as well
+                if self._breaker is not None:
+                    self._breaker.record(status is not None and status < 500)
+
+            if error is None and status not in RETRY_STATUSES:
+                break
+
+            # full jitter backoff, unless there is no time left for another attempt
+            delay = random.uniform(0, min(BACKOFF_MAX, self._backoff * 2**attempt))
+            expired = deadline is not None and time.monotonic() + delay >= deadline
+            if attempt >= retries or expired:
+                if error is None:
+                    break
+                if isinstance(error, LightbullTimeoutError) or deadline is not None and time.monotonic() >= deadline:
+                    self._timeouts += 1
+                    if not isinstance(error, LightbullTimeoutError):
+                        raise LightbullTimeoutError("Deadline exceeded") from error
+                raise error
+
+            time.sleep(delay)
+            attempt += 1
+            self._retried += 1
+
+        if status >= 400:
+            raise LightbullHTTPError(f"API Error: HTTP {status} - {body.decode(errors='replace')}", status)
+
+        return body
+
+    def _attempt(self, method, parts, data, deadline, attempt):
+        self._reauth_if_required(deadline)
+
+        jwt = self._jwt
+        status, body = self._send(method, parts, data, self._get_headers(), deadline, attempt)
+        if status == 401:
+            # token was rejected, e.g. after a restart of the controller, so try once more with a new one
+            self._reauth(jwt, deadline)
+            status, body = self._send(method, parts, data, self._get_headers(), deadline, attempt + 1)
+
+        return status, body
+
+    def _send_get(self, *parts):
+        return _parse_json(self._request("GET", *parts))
+
+    def _send_post(self, *parts, data={}):
+        return _parse_json(self._request("POST", *parts, data=data))
+
+    def _send_put(self, *parts, data={}):
+        return _parse_json(self._request("PUT", *parts, data=data))
+
+    def _send_delete(self, *parts):
+        self._request("DELETE", *parts)
@@ -0,0 +1,146 @@
+import collections
+import threading
+import time
+
+
+class LightbullLiveUpdater:
+    # Sends parameter values from a background thread, so that callers (e.g. MIDI faders) never block.
+    # Values posted for a parameter that was not sent yet replace the pending value (latest wins).
+
+    def __init__(self, lightbull, rate=50, parameter_rate=20):
+        self._lightbull = lightbull
+
+        # minimum time between two sends overall and for the same parameter, None means unlimited
+        self._interval = 1 / rate if rate else 0
+        self._parameter_interval = 1 / parameter_rate if parameter_rate else 0
+
+        self._cond = threading.Condition()
+        self._pending = collections.OrderedDict()
+        self._next_send = 0
+        self._next_parameter_send = {}
+        self._thread = None
+        self._running = False
+
+        self._posted = 0
+        self._coalesced = 0
+        self._sent = 0
+        self._failed = 0
+        self._dropped = 0
+        self._latency_sum = 0
+        self._latency_max = 0
+        self.last_error = None
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+
+        self._thread = threading.Thread(target=self._run, name="lightbull-live", daemon=True)
+        self._thread.start()
+
+    def stop(self, flush=True):
+        with self._cond:
+            if flush:
+                # wait until everything pending is sent
+                while self._pending and self._running:
+                    self._cond.wait()
+            self._running = False
+            self._dropped += len(self._pending)
+            self._pending.clear()
+            self._cond.notify_all()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def update_parameter(self, parameter_id, current=None, default=None):
+        data = {}
+        if current is not None:
+            data["current"] = current
+        if default is not None:
+            data["default"] = default
+
+        with self._cond:
+            self._posted += 1
+            if parameter_id in self._pending:
+                # keep fields of the older value that are not overwritten
+                self._coalesced += 1
+                self._pending[parameter_id].update(data)
+            else:
+                self._pending[parameter_id] = data
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            sent = self._sent + self._failed
+            return {
+                "posted": self._posted,
+                "coalesced": self._coalesced,
+                "sent": self._sent,
+                "failed": self._failed,
+                "dropped": self._dropped,
+                "pending": len(self._pending),
+                "latency_mean": self._latency_sum / sent if sent else None,
+                "latency_max": self._latency_max if sent else None,
+            }
+
+    def _run(self):
+        while True:
+            item = self._next()
+            if item is None:
+                return
+
+            parameter_id, data = item
+            start = time.monotonic()
+            try:
+                self._lightbull.shows.update_parameter(parameter_id, data.get("current"), data.get("default"))
+                error = None
+            except Exception as e:
+                error = e
+            latency = time.monotonic() - start
+
+            with self._cond:
+                if error is None:
+                    self._sent += 1
+                else:
+                    self._failed += 1
+                    self.last_error = error
+                self._latency_sum += latency
+                self._latency_max = max(self._latency_max, latency)
+                self._cond.notify_all()
+
+    def _next(self):
+        with self._cond:
+            while self._running:
+                now = time.monotonic()
+                timeout = None
+
+                if self._pending:
+                    # first pending parameter that may be sent again, in order of posting
+                    ready = None
+                    for parameter_id in self._pending:
+                        next_parameter_send = self._next_parameter_send.get(parameter_id, 0)
+                        if next_parameter_send <= now:
+                            ready = parameter_id
+                            break
+                        if timeout is None or next_parameter_send - now < timeout:
+                            timeout = next_parameter_send - now
+
+                    if ready is not None:
+                        if self._next_send <= now:
+                            self._next_send = now + self._interval
+                            self._next_parameter_send[ready] = now + self._parameter_interval
+                            return ready, self._pending.pop(ready)
+                        timeout = self._next_send - now
+
+                self._cond.wait(timeout)
+
+            return None
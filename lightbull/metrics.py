@@ -0,0 +1,141 @@
+import bisect
+import threading
+
+# upper bounds of the latency histogram buckets in seconds, same as the Prometheus client defaults
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1, 2.5, 5, 7.5, 10)
+
+# resources whose second URL part is an ID
+_ID_RESOURCES = {"shows", "visuals", "groups", "parameters"}
+
+
+def endpoint_template(parts):
+    # URL path with IDs replaced, so that requests to the same endpoint are aggregated
+    if len(parts) > 1 and parts[0] in _ID_RESOURCES:
+        parts = (parts[0], "{id}", *parts[2:])
+    return "/" + "/".join(parts)
+
+
+class LightbullRequest:
+    # passed to observers after every request, status is None if no response was received and attempt is the number
+    # of retries before
+    __slots__ = ("method", "endpoint", "status", "size", "duration", "attempt")
+
+    def __init__(self, method, endpoint, status, size, duration, attempt=0):
+        self.method = method
+        self.endpoint = endpoint
+        self.status = status
+        self.size = size
+        self.duration = duration
+        self.attempt = attempt
+
+    def __repr__(self):
+        return "<LightbullRequest {} {}: {} ({:.1f} ms)>".format(
+            self.method, self.endpoint, self.status, self.duration * 1000
+        )
+
+
+class LightbullMetrics:
+    # Observer that aggregates requests into counters and latency histograms per method and endpoint.
+    # Register it with Lightbull.add_observer().
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self._buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def __call__(self, request):
+        key = (request.method, request.endpoint)
+        index = bisect.bisect_left(self._buckets, request.duration)
+        with self._lock:
+            endpoint = self._endpoints.get(key)
+            if endpoint is None:
+                endpoint = self._endpoints[key] = {
+                    "count": 0,
+                    "errors": 0,
+                    "retries": 0,
+                    "bytes": 0,
+                    "duration": 0,
+                    "statuses": {},
+                    "buckets": [0] * (len(self._buckets) + 1),
+                }
+            endpoint["count"] += 1
+            if request.status is None or request.status >= 400:
+                endpoint["errors"] += 1
+            if request.attempt:
+                endpoint["retries"] += 1
+            endpoint["bytes"] += request.size
+            endpoint["duration"] += request.duration
+            endpoint["statuses"][request.status] = endpoint["statuses"].get(request.status, 0) + 1
+            endpoint["buckets"][index] += 1
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+    def to_dict(self):
+        # {"GET /shows/{id}": {"count", "errors", "retries", "bytes", "duration", "statuses", "buckets"}}, buckets are
+        # cumulative counts by upper bound like in Prometheus
+        with self._lock:
+            result = {}
+            for (method, path), endpoint in sorted(self._endpoints.items()):
+                cumulative = 0
+                buckets = {}
+                for bound, count in zip((*self._buckets, float("inf")), endpoint["buckets"]):
+                    cumulative += count
+                    buckets[bound] = cumulative
+                result["{} {}".format(method, path)] = {
+                    "count": endpoint["count"],
+                    "errors": endpoint["errors"],
+                    "retries": endpoint["retries"],
+                    "bytes": endpoint["bytes"],
+                    "duration": endpoint["duration"],
+                    "statuses": dict(endpoint["statuses"]),
+                    "buckets": buckets,
+                }
+            return result
+
+    def to_prometheus(self, prefix="lightbull"):
+        # text exposition format
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+            lines = [
+                "# HELP {}_requests_total Requests to the lightbull API.".format(prefix),
+                "# TYPE {}_requests_total counter".format(prefix),
+            ]
+            for (method, path), endpoint in endpoints:
+                for status, count in sorted(endpoint["statuses"].items(), key=lambda item: str(item[0])):
+                    labels = _labels(method=method, endpoint=path, status="none" if status is None else status)
+                    lines.append("{}_requests_total{{{}}} {}".format(prefix, labels, count))
+
+            lines.append("# HELP {}_request_retries_total Requests that repeated an earlier one.".format(prefix))
+            lines.append("# TYPE {}_request_retries_total counter".format(prefix))
+            for (method, path), endpoint in endpoints:
+                labels = _labels(method=method, endpoint=path)
+                lines.append("{}_request_retries_total{{{}}} {}".format(prefix, labels, endpoint["retries"]))
+
+            lines.append("# HELP {}_response_bytes_total Size of the response bodies.".format(prefix))
+            lines.append("# TYPE {}_response_bytes_total counter".format(prefix))
+            for (method, path), endpoint in endpoints:
+                labels = _labels(method=method, endpoint=path)
+                lines.append("{}_response_bytes_total{{{}}} {}".format(prefix, labels, endpoint["bytes"]))
+
+            lines.append("# HELP {}_request_duration_seconds Duration of requests.".format(prefix))
+            lines.append("# TYPE {}_request_duration_seconds histogram".format(prefix))
+            for (method, path), endpoint in endpoints:
+                labels = _labels(method=method, endpoint=path)
+                cumulative = 0
+                for bound, count in zip((*self._buckets, "+Inf"), endpoint["buckets"]):
+                    cumulative += count
+                    lines.append(
+                        '{}_request_duration_seconds_bucket{{{},le="{}"}} {}'.format(prefix, labels, bound, cumulative)
+                    )
+                lines.append("{}_request_duration_seconds_sum{{{}}} {}".format(prefix, labels, endpoint["duration"]))
+                lines.append("{}_request_duration_seconds_count{{{}}} {}".format(prefix, labels, endpoint["count"]))
+
+            return "\n".join(lines) + "\n"
+
+
+def _labels(**labels):
+    return ",".join(
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"')) for name, value in labels.items()
+    )
@@ -0,0 +1,143 @@
+import sys
+
+# Compact read-only representations of the API data. IDs, keys, types and part names are interned, as the same
+# strings occur many times across snapshots.
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class Parameter:
+    __slots__ = ("id", "key", "name", "type", "current", "default")
+
+    def __init__(self, id, key, name, type, current, default):
+        self.id = _intern(id)
+        self.key = _intern(key)
+        self.name = name
+        self.type = _intern(type)
+        self.current = current
+        self.default = default
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["id"], data["key"], data["name"], data["type"], data["current"], data["default"])
+
+    def __repr__(self):
+        return "<Parameter {} ({}): {}>".format(self.key, self.id, self.current)
+
+
+class Effect:
+    __slots__ = ("type", "parameters")
+
+    def __init__(self, type, parameters):
+        self.type = _intern(type)
+        self.parameters = tuple(parameters)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["type"], (Parameter.from_dict(parameter) for parameter in data.get("parameters") or ()))
+
+    def get_parameter(self, key):
+        for parameter in self.parameters:
+            if parameter.key == key:
+                return parameter
+        raise KeyError(key)
+
+    def __repr__(self):
+        return "<Effect {}>".format(self.type)
+
+
+class Group:
+    __slots__ = ("id", "parts", "effect")
+
+    def __init__(self, id, parts, effect):
+        self.id = _intern(id)
+        self.parts = tuple(_intern(part) for part in parts)
+        self.effect = effect
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["id"], data["parts"], Effect.from_dict(data["effect"]))
+
+    def __repr__(self):
+        return "<Group {} ({}): {}>".format(self.effect.type, self.id, ",".join(self.parts))
+
+
+class Visual:
+    __slots__ = ("id", "name", "groups")
+
+    def __init__(self, id, name, groups):
+        self.id = _intern(id)
+        self.name = name
+        self.groups = tuple(groups)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["id"], data["name"], (Group.from_dict(group) for group in data.get("groups") or ()))
+
+    def __repr__(self):
+        return "<Visual {} ({})>".format(self.name, self.id)
+
+
+class Show:
+    __slots__ = ("id", "name", "favorite", "visual_ids", "_visuals", "_shows")
+
+    def __init__(self, id, name, favorite, visual_ids, visuals=None, shows=None):
+        self.id = _intern(id)
+        self.name = name
+        self.favorite = favorite
+        self.visual_ids = tuple(_intern(visual_id) for visual_id in visual_ids)
+        self._visuals = tuple(visuals) if visuals is not None else None
+        self._shows = shows
+
+    @classmethod
+    def from_dict(cls, data, shows=None):
+        # visuals are only used if they are complete, e.g. from a snapshot, otherwise they are fetched on access
+        visuals = data.get("visuals")
+        if visuals and "groups" in visuals[0]:
+            visual_ids = [visual["id"] for visual in visuals]
+            visuals = [Visual.from_dict(visual) for visual in visuals]
+        else:
+            visual_ids = data.get("visualIds")
+            if visual_ids is None:
+                visual_ids = [visual["id"] for visual in visuals or ()]
+            visuals = [] if not visual_ids else None
+        return cls(data["id"], data["name"], data["favorite"], visual_ids, visuals, shows)
+
+    @property
+    def visuals(self):
+        if self._visuals is None:
+            if self._shows is None:
+                raise ValueError("Visuals of show {} were not loaded".format(self.id))
+            self._visuals = tuple(Visual.from_dict(self._shows.get_visual(visual_id)) for visual_id in self.visual_ids)
+        return self._visuals
+
+    def __repr__(self):
+        return "<Show {} ({})>".format(self.name, self.id)
+
+
+class LightbullModels:
+    # access to the shows API that returns model objects instead of dicts
+
+    def __init__(self, lightbull):
+        self._lightbull = lightbull
+
+    def get_shows(self):
+        return [Show.from_dict(show, self._lightbull.shows) for show in self._lightbull.shows.get_shows()]
+
+    def get_show(self, show_id):
+        return Show.from_dict(self._lightbull.shows.get_show(show_id), self._lightbull.shows)
+
+    def get_visual(self, visual_id):
+        return Visual.from_dict(self._lightbull.shows.get_visual(visual_id))
+
+    def get_group(self, group_id):
+        return Group.from_dict(self._lightbull.shows.get_group(group_id))
+
+    def get_parameter(self, parameter_id):
+        return Parameter.from_dict(self._lightbull.shows.get_parameter(parameter_id))
+
+    def snapshot(self, max_workers=8):
+        snapshot = self._lightbull.shows.snapshot(max_workers)
+        return [Show.from_dict(show, self._lightbull.shows) for show in snapshot.shows]
@@ -0,0 +1,241 @@
+import json
+import os
+import struct
+import time
+
+from .error import LightbullError
+from .frames import frame_layout_of
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# File format: a header followed by records of fixed size, each with the time (float64, seconds since the epoch) and
+# the LED colors of a frame (uint8 r, g, b for all LEDs of all parts), padded to 8 bytes:
+#
+#     magic (8 bytes) | version (u32) | header size (u32) | frames (u64) | LEDs (u32) | record size (u32) | layout JSON
+#
+# Times never decrease, so that the times of all records form the index for seeking.
+MAGIC = b"LBRECORD"
+VERSION = 1
+_HEADER = struct.Struct("<8sIIQII")
+_FRAMES_OFFSET = 16
+
+# frames processed at once for statistics, to bound the size of temporary arrays
+_CHUNK = 4096
+
+
+def _record_dtype(leds):
+    size = 8 + leds * 3
+    return np.dtype(
+        {
+            "names": ["timestamp", "leds"],
+            "formats": ["<f8", ("u1", (leds, 3))],
+            "offsets": [0, 8],
+            "itemsize": (size + 7) // 8 * 8,
+        }
+    )
+
+
+def _require_numpy():
+    if np is None:
+        raise LightbullError("Recordings require numpy (pip install lightbull[numpy])")
+
+
+class LightbullRecorder:
+    # Appends frames (e.g. of a LightbullFrameStream) to a memory-mapped file, which grows by growth frames at once
+
+    def __init__(self, path, growth=1024):
+        _require_numpy()
+        self._path = path
+        self._growth = growth
+
+        self._layout = None
+        self._header = None
+        self._records = None
+        self._capacity = 0
+        self._header_size = 0
+        self._last_timestamp = None
+        self.frames = 0
+
+    def append(self, frame):
+        if self._layout is None:
+            self._create(frame_layout_of(frame))
+        elif frame_layout_of(frame) != self._layout:
+            raise LightbullError("Parts of the frame differ from the recording, start a new one")
+
+        if self.frames == self._capacity:
+            self._grow()
+
+        # keep the index sorted if the clock goes back
+        timestamp = frame.timestamp if frame.timestamp is not None else time.time()
+        if self._last_timestamp is not None and timestamp < self._last_timestamp:
+            timestamp = self._last_timestamp
+        self._last_timestamp = timestamp
+
+        record = self._records[self.frames]
+        record["timestamp"] = timestamp
+        record["leds"] = frame.data
+        self.frames += 1
+        struct.pack_into("<Q", self._header, _FRAMES_OFFSET, self.frames)
+
+    def record(self, stream, duration=None):
+        # appends the frames of a stream for duration seconds or until it is stopped
+        end = None if duration is None else time.monotonic() + duration
+        while end is None or time.monotonic() < end:
+            frame = stream.get(timeout=None if end is None else max(0, end - time.monotonic()))
+            if frame is None:
+                if end is None:
+                    return
+                continue
+            self.append(frame)
+
+    def flush(self):
+        if self._records is not None:
+            self._header.flush()
+            self._records.flush()
+
+    def close(self):
+        if self._records is None:
+            return
+
+        self.flush()
+        self._header = None
+        self._records = None
+
+        # remove the space reserved for more frames
+        with open(self._path, "r+b") as f:
+            f.truncate(self._header_size + self.frames * _record_dtype(self._leds).itemsize)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _create(self, layout):
+        self._layout = layout
+        self._leds = sum(size for _, size in layout)
+        dtype = _record_dtype(self._leds)
+
+        layout_json = json.dumps([list(part) for part in layout]).encode()
+        self._header_size = (_HEADER.size + len(layout_json) + 63) // 64 * 64
+        with open(self._path, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, VERSION, self._header_size, 0, self._leds, dtype.itemsize))
+            f.write(layout_json.ljust(self._header_size - _HEADER.size))
+
+        self._header = np.memmap(self._path, dtype=np.uint8, mode="r+", shape=(self._header_size,))
+
+    def _grow(self):
+        dtype = _record_dtype(self._leds)
+        self._capacity += self._growth
+        if self._records is not None:
+            self._records.flush()
+        self._records = None
+
+        with open(self._path, "r+b") as f:
+            f.truncate(self._header_size + self._capacity * dtype.itemsize)
+        self._records = np.memmap(self._path, dtype=dtype, mode="r+", offset=self._header_size, shape=(self._capacity,))
+
+
+class LightbullRecording:
+    # Read-only access to a recording. timestamps, leds and the arrays in parts are views of the file, no frames are
+    # copied into memory.
+
+    def __init__(self, path):
+        _require_numpy()
+        self._path = path
+
+        with open(path, "rb") as f:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                raise LightbullError("Not a lightbull recording: {}".format(path))
+            magic, version, header_size, frames, leds, record_size = _HEADER.unpack(header)
+            if magic != MAGIC:
+                raise LightbullError("Not a lightbull recording: {}".format(path))
+            if version != VERSION:
+                raise LightbullError("Unsupported recording version {}".format(version))
+            layout = json.loads(f.read(header_size - _HEADER.size))
+
+        self.layout = tuple((part, size) for part, size in layout)
+        dtype = _record_dtype(leds)
+        if dtype.itemsize != record_size:
+            raise LightbullError("Invalid record size in recording: {}".format(path))
+
+        # a recording that is still written may contain fewer complete frames than the header says
+        frames = min(frames, (os.path.getsize(path) - header_size) // record_size)
+        if frames:
+            self._records = np.memmap(path, dtype=dtype, mode="r", offset=header_size, shape=(frames,))
+        else:
+            self._records = np.zeros(0, dtype=dtype)
+
+        self.timestamps = self._records["timestamp"]
+        self.leds = self._records["leds"]
+        self.parts = {}
+        offset = 0
+        for part, size in self.layout:
+            self.parts[part] = self.leds[:, offset : offset + size]
+            offset += size
+
+    def __len__(self):
+        return len(self._records)
+
+    def __getitem__(self, index):
+        return self.timestamps[index], self.leds[index]
+
+    @property
+    def duration(self):
+        return float(self.timestamps[-1] - self.timestamps[0]) if len(self) else 0
+
+    def seek(self, timestamp):
+        # index of the frame shown at timestamp (the last one before), or -1 if the recording starts later
+        return int(np.searchsorted(self.timestamps, timestamp, side="right")) - 1
+
+    def at(self, timestamp):
+        index = self.seek(timestamp)
+        return self.leds[index] if index >= 0 else None
+
+    def frames(self, start=None, end=None):
+        # yields time and LED colors of the frames from start to end (times or None for the beginning and end)
+        first = 0 if start is None else max(0, self.seek(start))
+        last = len(self) if end is None else self.seek(end) + 1
+        for index in range(first, last):
+            yield self.timestamps[index], self.leds[index]
+
+    def brightness(self):
+        # (frames, parts) array with the mean brightness (0 to 1) of the LEDs of each part
+        result = np.empty((len(self), len(self.layout)), dtype=np.float32)
+        for start in range(0, len(self), _CHUNK):
+            leds = self.leds[start : start + _CHUNK]
+            for i, (part, _) in enumerate(self.layout):
+                values = self.parts[part][start : start + _CHUNK]
+                result[start : start + len(leds), i] = values.mean(axis=(1, 2), dtype=np.float32) / 255
+        return result
+
+    def changes(self):
+        # (frames - 1, parts) array with the fraction of LEDs of each part that changed from one frame to the next
+        result = np.empty((max(0, len(self) - 1), len(self.layout)), dtype=np.float32)
+        for start in range(0, len(self) - 1, _CHUNK):
+            stop = min(start + _CHUNK, len(self) - 1)
+            for i, (part, size) in enumerate(self.layout):
+                values = self.parts[part]
+                changed = (values[start + 1 : stop + 1] != values[start:stop]).any(axis=2)
+                result[start:stop, i] = changed.sum(axis=1) / size if size else 0
+        return result
+
+    def stats(self):
+        # brightness and changes of each part over the whole recording
+        brightness = self.brightness()
+        changes = self.changes()
+        duration = self.duration
+
+        result = {}
+        for i, (part, _) in enumerate(self.layout):
+            result[part] = {
+                "brightness_mean": float(brightness[:, i].mean()) if len(brightness) else None,
+                "brightness_max": float(brightness[:, i].max()) if len(brightness) else None,
+                "changes_per_second": float((changes[:, i] > 0).sum() / duration) if duration else None,
+                "changed_fraction_mean": float(changes[:, i].mean()) if len(changes) else None,
+            }
+        return result
@@ -1,74 +1,191 @@
+import concurrent.futures
+import itertools
+import time
+
+from lightbull.bundle import show_to_bundle
+from lightbull.cache import LightbullCache
 from lightbull.error import LightbullError
+from lightbull.snapshot import LightbullSnapshot
+from lightbull.sync import plan_sync
+
+# known fields are kept for up to this many entities and seconds, older ones are fetched again when required
+KNOWN_SIZE = 4096
+KNOWN_TTL = 600
 
 
 class LightbullShows:
     def __init__(self, lightbull):
         self._lightbull = lightbull
 
+        # last known fields of shows, visuals and groups that are required for updates, by (type, ID)
+        self._known = LightbullCache(KNOWN_TTL, KNOWN_SIZE)
+
     def get_shows(self):
         tmp = self._lightbull._send_get("shows")
         try:
-            return tmp["shows"]
+            shows = tmp["shows"]
         except KeyError:
             return LightbullError("Unexpected data returned from /shows endpoint: {}".format(tmp))
 
+        for show in shows:
+            self._remember_show(show)
+        return shows
+
     def get_show(self, show_id):
-        return self._lightbull._send_get("shows", show_id)
+        return self._get("shows", show_id)
+
+    # IDs by names (and parts and effects of groups), see LightbullIndex
+
+    def find_show(self, show):
+        return self._lightbull.index.show_id(show)
+
+    def find_visual(self, show, visual):
+        return self._lightbull.index.visual_id(show, visual)
+
+    def find_group(self, show, visual, parts=None, effect=None):
+        return self._lightbull.index.group_id(show, visual, parts, effect)
+
+    def find_parameter(self, show, visual, key, parts=None, effect=None):
+        return self._lightbull.index.parameter_id(show, visual, key, parts, effect)
 
     def new_show(self, name, favorite=False):
         r = self._lightbull._send_post("shows", data={"name": name, "favorite": favorite})
-        return r
+        return self._remember_show(r)
 
-    def update_show(self, show_id, name=None, favorite=None):
-        show = self.get_show(show_id)
+    def update_show(self, show_id, name=None, favorite=None, refresh=False):
+        # only fetch the show if a field is missing and not known from an earlier request
+        if name is None or favorite is None:
+            show = self._get_known("shows", show_id, refresh)
+            name = show["name"] if name is None else name
+            favorite = show["favorite"] if favorite is None else favorite
 
         data = {
-            "name": name or show["name"],
-            "favorite": favorite or show["favorite"],
+            "name": name,
+            "favorite": favorite,
         }
 
         self._lightbull._send_put("shows", show_id, data=data)
+        self._known.put("shows", show_id, data)
+        self._invalidate("shows", show_id)
+        self._lightbull.index.invalidate_show(show_id, visuals=False)
 
     def delete_show(self, show_id):
         self._lightbull._send_delete("shows", show_id)
+        self._known.invalidate("shows", show_id)
+        self._invalidate("shows", show_id, cascade=True)
+        self._lightbull.index.invalidate_show(show_id)
+
+    def get_show_tree(self, show_id, max_workers=8, retries=2):
+        return self._load_tree(lambda: [self._fetch("shows", show_id)], max_workers, retries)
+
+    def snapshot(self, max_workers=8, retries=2):
+        return self._load_tree(self.get_shows, max_workers, retries)
+
+    def iter_tree(self, show_id=None, max_workers=8):
+        # (show ID, visual) for every visual as soon as it arrives, after (None, show) before the visuals of a show.
+        # Unlike snapshot(), nothing is kept and at most 2 * max_workers visuals are requested at a time.
+        shows = self.get_shows() if show_id is None else [self._fetch("shows", show_id)]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = {}
+            for show in shows:
+                yield None, show
+                for visual_id in _visual_ids(show):
+                    while len(pending) >= 2 * max_workers:
+                        yield from _finished(pending)
+                    pending[executor.submit(self._fetch, "visuals", visual_id)] = show["id"]
+            while pending:
+                yield from _finished(pending)
+
+    def export_show(self, show_id, max_workers=8):
+        return show_to_bundle(self.get_show_tree(show_id, max_workers).shows[0])
+
+    def import_show(self, bundle, name=None, max_workers=8):
+        data = bundle["show"]
+        show = self.new_show(data["name"] if name is None else name, data.get("favorite", False))
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # visuals are created one after another to keep their order, their groups are created in the
+            # background meanwhile
+            futures = []
+            for visual in data["visuals"]:
+                created = self.new_visual(show["id"], visual["name"])
+                futures.append(executor.submit(self._import_groups, executor, created["id"], visual["groups"]))
+
+            for future in futures:
+                for parameter_future in future.result():
+                    parameter_future.result()
+
+        return show
+
+    def sync_show(self, bundle, show_id=None, dry_run=False, max_workers=8):
+        # bring the show (by ID or by name) to the state described by the bundle with as few changes as possible
+        plan = plan_sync(self, bundle, show_id)
+        if not dry_run:
+            plan.apply(max_workers)
+        return plan
 
     def get_visual(self, visual_id):
-        return self._lightbull._send_get("visuals", visual_id)
+        return self._get("visuals", visual_id)
 
     def new_visual(self, show_id, name):
-        return self._lightbull._send_post("visuals", data={"showId": show_id, "name": name})
+        visual = self._lightbull._send_post("visuals", data={"showId": show_id, "name": name})
+        self._invalidate("shows", show_id)
+        self._lightbull.index.invalidate_show(show_id)
+        self._link("shows", show_id, "visuals", visual)
+        return self._remember_visual(visual)
 
-    def update_visual(self, visual_id, name=None):
-        visual = self.get_visual(visual_id)
+    def update_visual(self, visual_id, name=None, refresh=False):
+        if name is None:
+            name = self._get_known("visuals", visual_id, refresh)["name"]
 
-        data = {"name": name or visual["name"]}
+        data = {"name": name}
 
         self._lightbull._send_put("visuals", visual_id, data=data)
+        self._known.put("visuals", visual_id, data)
+        self._invalidate("visuals", visual_id)
+        self._lightbull.index.invalidate_visual(visual_id)
 
     def delete_visual(self, visual_id):
         self._lightbull._send_delete("visuals", visual_id)
+        self._known.invalidate("visuals", visual_id)
+        self._invalidate("visuals", visual_id, cascade=True)
+        self._lightbull.index.invalidate_visual(visual_id)
 
     def get_group(self, group_id):
-        return self._lightbull._send_get("groups", group_id)
+        return self._get("groups", group_id)
 
     def new_group(self, visual_id, parts, effect):
-        return self._lightbull._send_post("groups", data={"visualId": visual_id, "parts": parts, "effectType": effect})
+        group = self._lightbull._send_post("groups", data={"visualId": visual_id, "parts": parts, "effectType": effect})
+        self._invalidate("visuals", visual_id)
+        self._lightbull.index.invalidate_visual(visual_id)
+        self._link("visuals", visual_id, "groups", group)
+        return self._remember_group(group)
 
-    def update_group(self, group_id, parts=None, effect=None):
-        group = self.get_group(group_id)
+    def update_group(self, group_id, parts=None, effect=None, refresh=False):
+        if parts is None or effect is None:
+            group = self._get_known("groups", group_id, refresh)
+            parts = group["parts"] if parts is None else parts
+            effect = group["effectType"] if effect is None else effect
 
         data = {
-            "parts": parts or group["parts"],
-            "effectType": effect or group["effect"]["type"],
+            "parts": parts,
+            "effectType": effect,
         }
 
         self._lightbull._send_put("groups", group_id, data=data)
+        self._known.put("groups", group_id, data)
+        # a new effect type comes with new parameters
+        self._invalidate("groups", group_id, cascade=True)
+        self._lightbull.index.invalidate_group(group_id)
 
     def delete_group(self, group_id):
         self._lightbull._send_delete("groups", group_id)
+        self._known.invalidate("groups", group_id)
+        self._invalidate("groups", group_id, cascade=True)
+        self._lightbull.index.invalidate_group(group_id)
 
     def get_parameter(self, parameter_id):
-        return self._lightbull._send_get("parameters", parameter_id)
+        return self._get("parameters", parameter_id)
 
     def update_parameter(self, parameter_id, current=None, default=None):
         data = {}
@@ -78,6 +195,7 @@ class LightbullShows:
             data["default"] = default
 
         self._lightbull._send_put("parameters", parameter_id, data=data)
+        self._invalidate("parameters", parameter_id)
 
     def get_current(self):
         return self._lightbull._send_get("current")
@@ -93,3 +211,153 @@ class LightbullShows:
 
     def blank(self):
         return self._lightbull._send_delete("current")
+
+    def _import_groups(self, executor, visual_id, groups):
+        futures = []
+        for group in groups:
+            created = self.new_group(visual_id, group["parts"], group["effect"])
+
+            # only write parameters that differ from what the new group has
+            for parameter in created["effect"]["parameters"]:
+                values = group.get("parameters", {}).get(parameter["key"], {})
+                current = values.get("current")
+                default = values.get("default")
+                current = None if current == parameter["current"] else current
+                default = None if default == parameter["default"] else default
+                if current is not None or default is not None:
+                    futures.append(executor.submit(self.update_parameter, parameter["id"], current, default))
+
+        return futures
+
+    def _get(self, entity_type, entity_id):
+        cache = self._lightbull.cache
+        if cache is not None:
+            entity = cache.get(entity_type, entity_id)
+            if entity is not None:
+                return entity
+
+        return self._fetch(entity_type, entity_id)
+
+    def _fetch(self, entity_type, entity_id):
+        entity = self._lightbull._send_get(entity_type, entity_id)
+        return {
+            "shows": self._remember_show,
+            "visuals": self._remember_visual,
+            "groups": self._remember_group,
+            "parameters": self._remember_parameter,
+        }[entity_type](entity, cache=True)
+
+    def _get_known(self, entity_type, entity_id, refresh):
+        if refresh:
+            return _known_fields(entity_type, self._fetch(entity_type, entity_id))
+        known = self._known.get(entity_type, entity_id)
+        if known is None:
+            # from the entity cache if possible
+            known = _known_fields(entity_type, self._get(entity_type, entity_id))
+            self._known.put(entity_type, entity_id, known)
+        return known
+
+    def _invalidate(self, entity_type, entity_id, cascade=False):
+        if self._lightbull.cache is not None:
+            self._lightbull.cache.invalidate(entity_type, entity_id, cascade)
+
+    def _link(self, parent_type, parent_id, child_type, child):
+        if self._lightbull.cache is not None and isinstance(child, dict) and "id" in child:
+            self._lightbull.cache.link(parent_type, parent_id, child_type, child["id"])
+
+    # Remember fields required for updates and, with cache=True, put complete entities into the cache.
+    # Responses of /shows and of POST requests are not cached, as they might not contain all fields.
+
+    def _remember_show(self, show, cache=False):
+        if isinstance(show, dict) and "id" in show:
+            self._known.put("shows", show["id"], _known_fields("shows", show))
+            if cache and self._lightbull.cache is not None:
+                children = [("visuals", visual_id) for visual_id in _visual_ids(show)]
+                self._lightbull.cache.put("shows", show["id"], show, children)
+        return show
+
+    def _remember_visual(self, visual, cache=False):
+        if isinstance(visual, dict) and "id" in visual:
+            self._known.put("visuals", visual["id"], _known_fields("visuals", visual))
+            groups = visual.get("groups") or []
+            for group in groups:
+                self._remember_group(group, cache)
+            if cache and self._lightbull.cache is not None:
+                children = [("groups", group["id"]) for group in groups]
+                self._lightbull.cache.put("visuals", visual["id"], visual, children)
+        return visual
+
+    def _remember_group(self, group, cache=False):
+        if isinstance(group, dict) and "id" in group:
+            self._known.put("groups", group["id"], _known_fields("groups", group))
+            parameters = group["effect"].get("parameters") or []
+            for parameter in parameters:
+                self._remember_parameter(parameter, cache)
+            if cache and self._lightbull.cache is not None:
+                children = [("parameters", parameter["id"]) for parameter in parameters]
+                self._lightbull.cache.put("groups", group["id"], group, children)
+        return group
+
+    def _remember_parameter(self, parameter, cache=False):
+        if cache and isinstance(parameter, dict) and "id" in parameter and self._lightbull.cache is not None:
+            self._lightbull.cache.put("parameters", parameter["id"], parameter)
+        return parameter
+
+    def _load_tree(self, get_shows, max_workers, retries):
+        start = time.monotonic()
+        requests = itertools.count()
+
+        def fetch(func, *args):
+            next(requests)
+            return func(*args)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for attempt in itertools.count():
+                shows = fetch(get_shows)
+                futures = {}
+                for show in shows:
+                    for visual_id in _visual_ids(show):
+                        futures[visual_id] = executor.submit(fetch, self._fetch, "visuals", visual_id)
+
+                try:
+                    visuals = {visual_id: future.result() for visual_id, future in futures.items()}
+                    break
+                except LightbullError:
+                    # a visual was probably deleted while loading, start over to get a consistent tree
+                    for future in futures.values():
+                        future.cancel()
+                    concurrent.futures.wait(futures.values())
+                    if attempt >= retries:
+                        raise
+
+        tree = []
+        for show in shows:
+            show = dict(show)
+            show["visuals"] = [visuals[visual_id] for visual_id in _visual_ids(show)]
+            tree.append(show)
+
+        # the counter was advanced once per request, its next value is the number of requests
+        return LightbullSnapshot(tree, next(requests), time.monotonic() - start)
+
+
+def _known_fields(entity_type, entity):
+    # fields of an entity that are required for updates
+    if entity_type == "shows":
+        return {"name": entity["name"], "favorite": entity["favorite"]}
+    if entity_type == "visuals":
+        return {"name": entity["name"]}
+    return {"parts": entity["parts"], "effectType": entity["effect"]["type"]}
+
+
+def _visual_ids(show):
+    # /shows only returns the IDs, /shows/<id> might only return the visuals
+    if "visualIds" in show:
+        return show["visualIds"]
+    return [visual["id"] for visual in show.get("visuals") or []]
+
+
+def _finished(pending):
+    # results of the requests in pending (futures by show ID) that are done, waiting for at least one
+    done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+    for future in done:
+        yield pending.pop(future), future.result()
@@ -0,0 +1,18 @@
+class LightbullSnapshot:
+    # shows with their full visuals (including groups and parameters) fetched at one point in time
+
+    def __init__(self, shows, requests, duration):
+        self.shows = shows
+        self.requests = requests
+        self.duration = duration
+
+    def get_show(self, show_id):
+        for show in self.shows:
+            if show["id"] == show_id:
+                return show
+        raise KeyError(show_id)
+
+    def __repr__(self):
+        return "<LightbullSnapshot: {} shows, {} requests in {:.3f}s>".format(
+            len(self.shows), self.requests, self.duration
+        )
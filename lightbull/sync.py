@@ -0,0 +1,237 @@
+import concurrent.futures
+
+# Operations are applied in phases. Operations of one phase run in parallel, except for operations of the same chain,
+# which run one after another, e.g. to create new visuals and new groups of a visual in order.
+PHASE_SHOW = 0
+PHASE_VISUALS = 1
+PHASE_NEW_VISUALS = 2
+PHASE_GROUPS = 3
+PHASE_PARAMETERS = 4
+
+
+class LightbullSyncOperation:
+    def __init__(self, phase, description, func, chain=None):
+        self.phase = phase
+        self.description = description
+        self.chain = chain
+        self._func = func
+
+    def apply(self):
+        self._func()
+
+    def __repr__(self):
+        return "<LightbullSyncOperation: {}>".format(self.description)
+
+
+class LightbullSyncPlan:
+    def __init__(self, operations):
+        self.operations = operations
+
+    def __len__(self):
+        return len(self.operations)
+
+    def __str__(self):
+        lines = [operation.description for operation in self.operations]
+        lines.append("{} operations".format(len(self.operations)))
+        return "\n".join(lines)
+
+    def apply(self, max_workers=8):
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for phase in sorted({operation.phase for operation in self.operations}):
+                chains = {}
+                for operation in self.operations:
+                    if operation.phase == phase:
+                        chain = operation if operation.chain is None else operation.chain
+                        chains.setdefault(id(chain), []).append(operation)
+
+                # result() raises the first error
+                for future in [executor.submit(_apply_all, operations) for operations in chains.values()]:
+                    future.result()
+
+
+def _apply_all(operations):
+    for operation in operations:
+        operation.apply()
+
+
+class _Ref:
+    # ID of an entity that might only be created while applying the plan
+    def __init__(self, id=None):
+        self.id = id
+
+
+def plan_sync(shows, bundle, show_id=None):
+    desired = bundle["show"]
+    operations = []
+
+    # find the show by ID or by name
+    if show_id is None:
+        for show in shows.get_shows():
+            if show["name"] == desired["name"]:
+                show_id = show["id"]
+                break
+
+    if show_id is None:
+        show_ref = _Ref()
+
+        def create_show():
+            show_ref.id = shows.new_show(desired["name"], desired.get("favorite", False))["id"]
+
+        operations.append(LightbullSyncOperation(PHASE_SHOW, "create show '{}'".format(desired["name"]), create_show))
+        current = {"visuals": []}
+    else:
+        show_ref = _Ref(show_id)
+        current = shows.get_show_tree(show_id).shows[0]
+        favorite = desired.get("favorite", False)
+        if current["name"] != desired["name"] or current["favorite"] != favorite:
+            operations.append(
+                LightbullSyncOperation(
+                    PHASE_SHOW,
+                    "update show '{}'".format(desired["name"]),
+                    lambda: shows.update_show(show_id, desired["name"], favorite),
+                )
+            )
+
+    # visuals with the same name are kept, otherwise existing visuals are renamed before new ones are created
+    matched, added, removed = _match(desired["visuals"], current["visuals"], lambda v: v["name"], lambda v: True)
+    for desired_visual, current_visual in matched:
+        visual_ref = _Ref(current_visual["id"])
+        if desired_visual["name"] != current_visual["name"]:
+            operations.append(
+                LightbullSyncOperation(
+                    PHASE_VISUALS,
+                    "rename visual '{}' to '{}'".format(current_visual["name"], desired_visual["name"]),
+                    lambda ref=visual_ref, name=desired_visual["name"]: shows.update_visual(ref.id, name),
+                )
+            )
+        operations.extend(_plan_groups(shows, visual_ref, desired_visual, current_visual.get("groups") or []))
+
+    for visual in removed:
+        operations.append(
+            LightbullSyncOperation(
+                PHASE_VISUALS,
+                "delete visual '{}'".format(visual["name"]),
+                lambda visual_id=visual["id"]: shows.delete_visual(visual_id),
+            )
+        )
+
+    for visual in added:
+        visual_ref = _Ref()
+
+        def create_visual(ref=visual_ref, name=visual["name"]):
+            ref.id = shows.new_visual(show_ref.id, name)["id"]
+
+        operations.append(
+            LightbullSyncOperation(
+                PHASE_NEW_VISUALS, "create visual '{}'".format(visual["name"]), create_visual, chain=show_ref
+            )
+        )
+        operations.extend(_plan_groups(shows, visual_ref, visual, []))
+
+    return LightbullSyncPlan(operations)
+
+
+def _plan_groups(shows, visual_ref, desired_visual, current_groups):
+    operations = []
+    visual_name = desired_visual["name"]
+
+    # groups with the same effect are kept, changing the effect requires a new group
+    matched, added, removed = _match(
+        desired_visual["groups"],
+        current_groups,
+        lambda g: (g["effect"], sorted(g["parts"])),
+        lambda g: g["effect"],
+        current_key=lambda g: (g["effect"]["type"], sorted(g["parts"])),
+        current_loose_key=lambda g: g["effect"]["type"],
+    )
+
+    for desired_group, current_group in matched:
+        if sorted(desired_group["parts"]) != sorted(current_group["parts"]):
+            operations.append(
+                LightbullSyncOperation(
+                    PHASE_GROUPS,
+                    "update parts of {} group in visual '{}' to {}".format(
+                        desired_group["effect"], visual_name, ",".join(desired_group["parts"])
+                    ),
+                    lambda group_id=current_group["id"], parts=desired_group["parts"]: shows.update_group(
+                        group_id, parts=parts
+                    ),
+                )
+            )
+
+        for parameter in current_group["effect"]["parameters"]:
+            current, default = _changed_values(desired_group, parameter)
+            if current is not None or default is not None:
+                operations.append(
+                    LightbullSyncOperation(
+                        PHASE_PARAMETERS,
+                        "update parameter '{}' of {} group in visual '{}'".format(
+                            parameter["key"], desired_group["effect"], visual_name
+                        ),
+                        lambda parameter_id=parameter["id"], current=current, default=default: shows.update_parameter(
+                            parameter_id, current, default
+                        ),
+                    )
+                )
+
+    for group in removed:
+        operations.append(
+            LightbullSyncOperation(
+                PHASE_GROUPS,
+                "delete {} group in visual '{}'".format(group["effect"]["type"], visual_name),
+                lambda group_id=group["id"]: shows.delete_group(group_id),
+            )
+        )
+
+    for group in added:
+
+        def create_group(group=group):
+            created = shows.new_group(visual_ref.id, group["parts"], group["effect"])
+            for parameter in created["effect"]["parameters"]:
+                current, default = _changed_values(group, parameter)
+                if current is not None or default is not None:
+                    shows.update_parameter(parameter["id"], current, default)
+
+        operations.append(
+            LightbullSyncOperation(
+                PHASE_GROUPS,
+                "create {} group in visual '{}' for {}".format(group["effect"], visual_name, ",".join(group["parts"])),
+                create_group,
+                chain=visual_ref,
+            )
+        )
+
+    return operations
+
+
+def _changed_values(desired_group, parameter):
+    values = desired_group.get("parameters", {}).get(parameter["key"], {})
+    current = values.get("current")
+    default = values.get("default")
+    return (
+        None if current == parameter["current"] else current,
+        None if default == parameter["default"] else default,
+    )
+
+
+def _match(desired, current, key, loose_key, current_key=None, current_loose_key=None):
+    # Pairs desired and current entities: first by key, then the remaining ones in order by loose key.
+    # Returns the pairs and the unmatched desired and current entities.
+    current_key = current_key or key
+    current_loose_key = current_loose_key or loose_key
+
+    pairs = [None] * len(desired)
+    remaining = list(current)
+    for matcher, current_matcher in ((key, current_key), (loose_key, current_loose_key)):
+        for i, entity in enumerate(desired):
+            if pairs[i] is not None:
+                continue
+            for candidate in remaining:
+                if matcher(entity) == current_matcher(candidate):
+                    pairs[i] = candidate
+                    remaining.remove(candidate)
+                    break
+
+    matched = [(entity, pair) for entity, pair in zip(desired, pairs) if pair is not None]
+    added = [entity for entity, pair in zip(desired, pairs) if pair is None]
+    return matched, added, remaining
@@ -0,0 +1,292 @@
+import concurrent.futures
+import inspect
+import json
+import threading
+import time
+
+from .error import LightbullError
+
+# time before a cue that is waited for actively instead of sleeping, as sleeping may take longer than requested
+_SPIN = 0.001
+
+# weight of new measurements in the moving averages of the network latency and of oversleeping
+_SMOOTHING = 0.2
+
+
+def _current(lightbull, show=None, visual=None):
+    lightbull.shows.update_current(show, visual)
+
+
+def _blank(lightbull):
+    lightbull.shows.blank()
+
+
+def _parameter(lightbull, parameter, current=None, default=None):
+    lightbull.shows.update_parameter(parameter, current, default)
+
+
+# action name: function and key of the state it changes. Cues with the same key are sent in order, and a cue that is
+# still waiting for the previous one is replaced by a later cue with the same key.
+ACTIONS = {
+    "current": (_current, lambda args: "current"),
+    "blank": (_blank, lambda args: "current"),
+    "parameter": (_parameter, lambda args: ("parameter", args["parameter"])),
+}
+
+
+class LightbullCue:
+    __slots__ = ("at", "action", "args")
+
+    def __init__(self, at, action, **args):
+        if action not in ACTIONS:
+            raise LightbullError("Unknown cue action '{}'".format(action))
+        try:
+            # arguments of the action after the client, so that a wrong cue fails while loading and not while playing
+            inspect.signature(ACTIONS[action][0]).bind(None, **args)
+        except TypeError as e:
+            raise LightbullError("Invalid arguments for cue action '{}': {}".format(action, e))
+        self.at = at
+        self.action = action
+        self.args = args
+
+    @property
+    def key(self):
+        return ACTIONS[self.action][1](self.args)
+
+    def run(self, lightbull):
+        ACTIONS[self.action][0](lightbull, **self.args)
+
+    def __repr__(self):
+        return "<LightbullCue {:.3f} {}>".format(self.at, self.action)
+
+
+class LightbullCueResult:
+    # times are seconds since the start of the timeline
+    __slots__ = ("cue", "planned", "dispatched", "sent", "duration", "skipped", "error")
+
+    def __init__(self, cue, planned):
+        self.cue = cue
+        self.planned = planned
+        self.dispatched = None
+        self.sent = None
+        self.duration = None
+        self.skipped = False
+        self.error = None
+
+    @property
+    def timing_error(self):
+        # estimated arrival at the controller (half of the round trip) compared to the planned time
+        if self.sent is None or self.duration is None:
+            return None
+        return self.sent + self.duration / 2 - self.planned
+
+    def __repr__(self):
+        if self.skipped:
+            status = "skipped"
+        elif self.error is not None:
+            status = "failed: {}".format(self.error)
+        elif self.timing_error is None:
+            status = "pending"
+        else:
+            status = "{:+.1f} ms".format(self.timing_error * 1000)
+        return "<LightbullCueResult {:.3f} {}: {}>".format(self.planned, self.cue.action, status)
+
+
+def load_cues(file):
+    # JSON list of cues, or an object with the list in "cues":
+    #
+    #     [{"at": 0, "action": "current", "show": "<id>", "visual": "<id>"},
+    #      {"at": 1.5, "action": "parameter", "parameter": "<id>", "current": 80},
+    #      {"at": 3, "action": "blank"}]
+    with open(file) as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data["cues"]
+
+    cues = []
+    for i, cue in enumerate(data):
+        try:
+            cue = dict(cue)
+            at = float(cue.pop("at"))
+            cues.append(LightbullCue(at, cue.pop("action"), **cue))
+        except (KeyError, TypeError, ValueError, LightbullError) as e:
+            raise LightbullError("Invalid cue {} in {}: {}".format(i, file, e))
+    return cues
+
+
+class LightbullTimeline:
+    # Plays cues at their times (seconds after the start) against the monotonic clock. A scheduler thread only waits
+    # and hands cues to a thread pool, so a slow request does not delay later cues.
+    #
+    # lead sends cues earlier to make up for the network: a value in seconds or "auto" for half of the measured round
+    # trip time, which is measured before the start and updated with every cue.
+
+    def __init__(self, lightbull, cues, lead="auto", max_workers=4, callback=None):
+        self._lightbull = lightbull
+        self._cues = sorted(cues, key=lambda cue: cue.at)
+        self._auto_lead = lead == "auto"
+        self._lead = 0 if self._auto_lead else lead
+        self._max_workers = max_workers
+        self._callback = callback
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._done = threading.Event()
+        self._executor = None
+        self._thread = None
+        self._chains = {}
+        self._running = 0
+        self._stopped = False
+        self._oversleep = 0
+        self._start = None
+
+        self.results = []
+
+    @property
+    def lead(self):
+        return self._lead
+
+    def calibrate(self, samples=5):
+        # round trip time of a cheap request
+        for _ in range(samples):
+            start = time.monotonic()
+            self._lightbull.shows.get_current()
+            self._update_lead(time.monotonic() - start)
+
+    def start(self, delay=0, position=0):
+        # starts playing after delay seconds, from position seconds of the timeline (earlier cues are not sent)
+        if self._thread is not None:
+            raise LightbullError("Timeline was already started")
+
+        if self._auto_lead and self._lead == 0:
+            self.calibrate()
+
+        self._start = time.monotonic() + delay - position
+        self.results = [LightbullCueResult(cue, cue.at) for cue in self._cues if cue.at >= position]
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=self._max_workers)
+        self._thread = threading.Thread(target=self._run, name="lightbull-timeline", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        # cues that were not sent yet are skipped
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    def wait(self, timeout=None):
+        # until all cues are done, returns False after the timeout
+        return self._done.wait(timeout)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def stats(self):
+        with self._lock:
+            errors = [abs(r.timing_error) for r in self.results if r.timing_error is not None and r.error is None]
+            return {
+                "cues": len(self.results),
+                "sent": sum(1 for r in self.results if r.sent is not None),
+                "skipped": sum(1 for r in self.results if r.skipped),
+                "failed": sum(1 for r in self.results if r.error is not None),
+                "lead": self._lead,
+                "error_mean": sum(errors) / len(errors) if errors else None,
+                "error_max": max(errors) if errors else None,
+            }
+
+    def _now(self):
+        return time.monotonic() - self._start
+
+    def _run(self):
+        for result in self.results:
+            if not self._sleep_until(result.planned - self._lead):
+                break
+            result.dispatched = self._now()
+            self._dispatch(result)
+
+        with self._lock:
+            for result in self.results:
+                if result.dispatched is None:
+                    result.skipped = True
+            self._stopped = True
+            self._check_done()
+
+    def _sleep_until(self, target):
+        # sleeps until shortly before, corrected by how much sleeping overshot before, then waits actively
+        while True:
+            remaining = target - self._now() - self._oversleep - _SPIN
+            if remaining <= 0:
+                break
+            expected = self._now() + remaining
+            if self._stop.wait(remaining):
+                return False
+            overshoot = self._now() - expected
+            self._oversleep = max(0, self._oversleep + _SMOOTHING * (overshoot - self._oversleep))
+
+        while self._now() < target:
+            if self._stop.is_set():
+                return False
+            time.sleep(0)
+        return not self._stop.is_set()
+
+    def _dispatch(self, result):
+        key = result.cue.key
+        with self._lock:
+            if key in self._chains:
+                # previous cue with the same key is still sent, replace a cue that waits for it
+                pending = self._chains[key]
+                if pending is not None:
+                    pending.skipped = True
+                self._chains[key] = result
+                return
+
+            self._chains[key] = None
+            self._running += 1
+        self._executor.submit(self._run_chain, key, result)
+
+    def _run_chain(self, key, result):
+        try:
+            while True:
+                self._send(result)
+                with self._lock:
+                    pending = self._chains[key]
+                    if pending is None:
+                        return
+                    self._chains[key] = None
+                result = pending
+        finally:
+            # also if the callback raised, a cue that still waits is not sent anymore
+            with self._lock:
+                pending = self._chains.pop(key)
+                if pending is not None:
+                    pending.skipped = True
+                self._running -= 1
+                self._check_done()
+
+    def _send(self, result):
+        result.sent = self._now()
+        try:
+            result.cue.run(self._lightbull)
+        except Exception as e:
+            result.error = e
+        result.duration = self._now() - result.sent
+
+        if result.error is None:
+            self._update_lead(result.duration)
+        if self._callback is not None:
+            self._callback(result)
+
+    def _update_lead(self, duration):
+        if self._auto_lead:
+            with self._lock:
+                self._lead += _SMOOTHING * (duration / 2 - self._lead) if self._lead else duration / 2
+
+    def _check_done(self):
+        # with the lock held
+        if self._stopped and not self._running:
+            self._done.set()
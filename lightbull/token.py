@@ -0,0 +1,49 @@
+import base64
+import datetime
+import json
+import os
+import pathlib
+import tempfile
+
+DEFAULT_TOKEN_CACHE = pathlib.Path.home() / ".cache" / "lightbull" / "tokens.json"
+
+
+def jwt_expiry(jwt):
+    # payload is base64url without padding
+    payload = jwt.split(".")[1]
+    jwt_data = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+    return datetime.datetime.fromtimestamp(jwt_data["exp"])
+
+
+def load_token(file, api_url):
+    try:
+        with open(file) as f:
+            return json.load(f).get(api_url)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def save_token(file, api_url, jwt):
+    file = pathlib.Path(file)
+    file.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+
+    # keep valid tokens of other controllers
+    tokens = {}
+    try:
+        with open(file) as f:
+            for url, token in json.load(f).items():
+                if jwt_expiry(token) > datetime.datetime.now():
+                    tokens[url] = token
+    except (OSError, ValueError, AttributeError, IndexError, KeyError):
+        pass
+    tokens[api_url] = jwt
+
+    # mkstemp creates the file only readable for the user, replacing it is atomic
+    fd, tmp = tempfile.mkstemp(dir=file.parent, prefix=".tokens")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(tokens, f)
+        os.replace(tmp, file)
+    except OSError:
+        os.unlink(tmp)
+        raise
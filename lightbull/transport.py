@@ -0,0 +1,158 @@
+import http.client
+import socket
+import threading
+
+# Transports send a request to the API and return the status and the body of the response. The client encodes and
+# decodes JSON itself, so that every transport gets and returns bytes:
+#
+#     transport.request("PUT", "/api/parameters/<id>", headers, b'{"current": 42}', timeout) -> (200, b"...")
+#
+# timeout is the time left until the deadline of the call (or None) and limits the configured timeout. Connection
+# problems and timeouts are raised as OSError.
+
+UNIX_SCHEME = "unix://"
+
+
+def make_transport(api_url, pool_size=10, keep_alive=True, timeout=None):
+    # unix:///run/lightbull.sock for a Unix domain socket, HTTP otherwise
+    if api_url.startswith(UNIX_SCHEME):
+        return LightbullUnixTransport(api_url[len(UNIX_SCHEME) :], pool_size, keep_alive, timeout)
+    return LightbullHTTPTransport(api_url, pool_size, keep_alive, timeout)
+
+
+def _limit(timeout, limit):
+    # configured timeout (a value or a (connect, read) tuple) limited to the time left
+    if limit is None:
+        return timeout
+    if timeout is None:
+        return limit
+    if isinstance(timeout, tuple):
+        return tuple(limit if value is None else min(value, limit) for value in timeout)
+    return min(timeout, limit)
+
+
+class LightbullHTTPTransport:
+    def __init__(self, url, pool_size=10, keep_alive=True, timeout=None):
+        # requests is imported here, as it takes a noticeable part of the CLI startup time
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.url = url
+
+        # one session for all requests, so that connections to the controller are reused
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        if not keep_alive:
+            self._session.headers["Connection"] = "close"
+
+        # either a single value or a (connect, read) tuple, see requests
+        self._timeout = timeout
+
+    def request(self, method, path, headers, body, timeout=None):
+        timeout = _limit(self._timeout, timeout)
+        r = self._session.request(method, self.url + path, headers=headers, data=body, timeout=timeout)
+        return r.status_code, r.content
+
+    def close(self):
+        self._session.close()
+
+
+class LightbullUnixTransport:
+    # HTTP over a Unix domain socket, e.g. when the control software runs on the controller itself
+
+    def __init__(self, path, pool_size=10, keep_alive=True, timeout=None):
+        self.url = UNIX_SCHEME + path
+        self._path = path
+        self._pool_size = pool_size
+        self._keep_alive = keep_alive
+        # the read timeout, connecting to a local socket does not block
+        self._timeout = timeout[1] if isinstance(timeout, tuple) else timeout
+
+        self._lock = threading.Lock()
+        self._idle = []
+
+    def request(self, method, path, headers, body, timeout=None):
+        timeout = _limit(self._timeout, timeout)
+        headers = dict(headers or {})
+        if not self._keep_alive:
+            headers["Connection"] = "close"
+
+        with self._lock:
+            connection = self._idle.pop() if self._idle else None
+
+        reused = connection is not None
+        while True:
+            if connection is None:
+                connection = _UnixHTTPConnection(self._path, timeout)
+            else:
+                connection.timeout = timeout
+                if connection.sock is not None:
+                    connection.sock.settimeout(timeout)
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                response = connection.getresponse()
+                data = response.read()
+                break
+            except (ConnectionError, http.client.HTTPException) as e:
+                connection.close()
+                connection = None
+                # the server may have closed an idle connection, so try once more with a new one
+                if reused:
+                    reused = False
+                    continue
+                if isinstance(e, OSError):
+                    raise
+                raise ConnectionError(str(e)) from e
+            except:
+                connection.close()
+                raise
+
+        if self._keep_alive and not response.will_close:
+            with self._lock:
+                if len(self._idle) < self._pool_size:
+                    self._idle.append(connection)
+                    connection = None
+        if connection is not None:
+            connection.close()
+
+        return response.status, data
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout):
+        super().__init__("localhost", timeout=timeout)
+        self._path = path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self._path)
+        except:
+            sock.close()
+            raise
+        self.sock = sock
+
+
+class LightbullCallableTransport:
+    # Calls a function in the same process instead of sending anything, e.g. LightbullFakeServer.handle for tests:
+    #
+    #     handler(method, path, headers, body) -> (status, body)
+
+    def __init__(self, handler, url="callable://"):
+        self.url = url
+        self._handler = handler
+
+    def request(self, method, path, headers, body, timeout=None):
+        return self._handler(method, path, headers, body)
+
+    def close(self):
+        pass
@@ -0,0 +1,212 @@
+import json
+import threading
+import time
+
+from .error import LightbullError
+
+
+def _show_and_visual(current):
+    return current.get("showId"), current.get("visualId")
+
+
+class LightbullChange:
+    # kind is "current" (value: showId and visualId) or "parameter" (id of the parameter, value: the parameter)
+    __slots__ = ("kind", "id", "old", "new", "timestamp")
+
+    def __init__(self, kind, id, old, new):
+        self.kind = kind
+        self.id = id
+        self.old = old
+        self.new = new
+        self.timestamp = time.time()
+
+    def __repr__(self):
+        if self.kind == "current":
+            return "<LightbullChange current: {} {}>".format(self.new.get("showId"), self.new.get("visualId"))
+        return "<LightbullChange parameter {}: {}>".format(self.id, json.dumps(self.new.get("current")))
+
+
+class LightbullSubscription:
+    __slots__ = ("callback", "current", "parameters")
+
+    def __init__(self, callback, current, parameters):
+        self.callback = callback
+        self.current = current
+        self.parameters = frozenset(parameters)
+
+
+class LightbullWatcher:
+    # Polls the current show and visual and watched parameters in one background thread for all subscribers, which
+    # are only called for changes. Responses that are the same as before are not parsed. Polling slows down from
+    # interval to idle_interval while nothing changes and speeds up again after a change. Callbacks are called from
+    # the polling thread and should return quickly.
+
+    def __init__(self, lightbull, interval=0.1, idle_interval=2, backoff=1.5):
+        self._lightbull = lightbull
+        self._interval = interval
+        self._idle_interval = max(interval, idle_interval)
+        self._backoff = backoff
+
+        self._cond = threading.Condition()
+        self._subscriptions = []
+        self._thread = None
+        self._running = False
+
+        # last response bodies and parsed values, by None for the current show and by ID for parameters
+        self._bodies = {}
+        self.current = None
+        self.parameters = {}
+
+        self._polls = 0
+        self._unchanged = 0
+        self._changes = 0
+        self._failed = 0
+        self.poll_interval = interval
+        self.last_error = None
+
+    def subscribe(self, callback, current=True, parameters=()):
+        # callback(change) for changes of the current show and visual and of the parameters with the given IDs
+        subscription = LightbullSubscription(callback, current, parameters)
+        with self._cond:
+            self._subscriptions.append(subscription)
+            # poll the new parameters soon
+            self.poll_interval = self._interval
+            self._cond.notify_all()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._cond:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+            for parameter_id in list(self.parameters):
+                if not any(parameter_id in s.parameters for s in self._subscriptions):
+                    self.parameters.pop(parameter_id)
+                    self._bodies.pop(parameter_id, None)
+
+    async def events(self, current=True, parameters=()):
+        # changes as asynchronous iterator, e.g. async for change in watcher.events(): ...
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        subscription = self.subscribe(
+            lambda change: loop.call_soon_threadsafe(queue.put_nowait, change), current, parameters
+        )
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self.unsubscribe(subscription)
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return self
+            self._running = True
+
+        self._thread = threading.Thread(target=self._run, name="lightbull-watch", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "subscriptions": len(self._subscriptions),
+                "polls": self._polls,
+                "unchanged": self._unchanged,
+                "changes": self._changes,
+                "failed": self._failed,
+                "interval": self.poll_interval,
+            }
+
+    def _run(self):
+        while True:
+            start = time.monotonic()
+            changed = self._poll()
+
+            with self._cond:
+                if changed:
+                    self.poll_interval = self._interval
+                else:
+                    self.poll_interval = min(self.poll_interval * self._backoff, self._idle_interval)
+
+                end = start + self.poll_interval
+                while self._running and time.monotonic() < end:
+                    self._cond.wait(end - time.monotonic())
+                    # a new subscription shortens the interval
+                    end = min(end, start + self.poll_interval)
+                if not self._running:
+                    return
+
+    def _poll(self):
+        with self._cond:
+            subscriptions = list(self._subscriptions)
+        watch_current = any(s.current for s in subscriptions)
+        parameter_ids = sorted(set().union(*(s.parameters for s in subscriptions)))
+
+        changes = []
+        if watch_current:
+            changes += self._fetch(None, ("current",), "current")
+        for parameter_id in parameter_ids:
+            changes += self._fetch(parameter_id, ("parameters", parameter_id), "parameter")
+
+        for change in changes:
+            for subscription in subscriptions:
+                if change.kind == "current" and subscription.current or change.id in subscription.parameters:
+                    try:
+                        subscription.callback(change)
+                    except Exception as e:
+                        # a broken subscriber does not stop the others
+                        self.last_error = e
+        return bool(changes)
+
+    def _fetch(self, key, parts, kind):
+        try:
+            body = self._lightbull._request("GET", *parts)
+        except (LightbullError, OSError) as e:
+            with self._cond:
+                self._failed += 1
+                self.last_error = e
+            return []
+
+        with self._cond:
+            self._polls += 1
+            if self._bodies.get(key) == body:
+                self._unchanged += 1
+                return []
+            self._bodies[key] = body
+
+        try:
+            new = json.loads(body)
+        except ValueError as e:
+            self.last_error = e
+            return []
+
+        with self._cond:
+            if kind == "current":
+                old, self.current = self.current, new
+                # only the show and visual count, not e.g. the order of fields
+                if old is not None and _show_and_visual(old) == _show_and_visual(new):
+                    return []
+            else:
+                old = self.parameters.get(key)
+                self.parameters[key] = new
+                if old == new:
+                    return []
+            self._changes += 1
+        return [LightbullChange(kind, key, old, new)]
@@ -12,5 +12,6 @@ setup(
     author_email="hertle@narfi.net",
     python_requires=">=3.6",
     install_requires=["requests", "rich"],
+    extras_require={"async": ["aiohttp"], "numpy": ["numpy"]},
     packages=find_packages(),
 )
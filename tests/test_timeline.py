@@ -0,0 +1,41 @@
+import json
+
+import pytest
+
+import lightbull
+from lightbull.error import LightbullError
+from lightbull.fakeserver import LightbullFakeServer
+from lightbull.timeline import LightbullCue, LightbullTimeline, load_cues
+
+
+def test_load_cues_rejects_unknown_argument(tmp_path):
+    path = tmp_path / "cues.json"
+    path.write_text(json.dumps([{"at": 0.1, "action": "parameter", "parameter": "p", "current": 1, "curent": 2}]))
+    with pytest.raises(LightbullError):
+        load_cues(path)
+
+
+def test_load_cues_rejects_missing_time(tmp_path):
+    path = tmp_path / "cues.json"
+    path.write_text(json.dumps([{"action": "blank"}]))
+    with pytest.raises(LightbullError):
+        load_cues(path)
+
+
+def test_cue_rejects_unknown_argument():
+    with pytest.raises(LightbullError):
+        LightbullCue(0.05, "blank", show="x")
+
+
+def test_timeline_finishes_if_a_cue_raises():
+    # a cue whose arguments break only while it is sent, it has to fail without blocking the timeline
+    cue = LightbullCue(0.05, "blank")
+    cue.args = {"show": "x"}
+    with LightbullFakeServer(latency=0) as server:
+        with lightbull.Lightbull(server.url, server.password) as bull:
+            timeline = LightbullTimeline(bull, [cue, LightbullCue(0.1, "blank")], lead=0)
+            with timeline:
+                assert timeline.wait(3)
+            stats = timeline.stats()
+            assert stats["failed"] == 1
+            assert stats["sent"] == 2